@@ -1,4 +1,5 @@
 from .base import (
     ConnectionRule, one_to_one_connection_rule, explicit_connection_rule,
     probabilistic_connection_rule, random_fan_in_connection_rule,
-    random_fan_out_connection_rule, all_to_all_connection_rule)
+    random_fan_out_connection_rule, all_to_all_connection_rule,
+    distance_dependent_connection_rule)
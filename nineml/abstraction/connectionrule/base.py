@@ -26,7 +26,7 @@ class ConnectionRule(ComponentClass):
     _base_len = len(standard_library_basepath)
     standard_types = ('AllToAll', 'OneToOne', 'Explicit',
                       'Probabilistic', 'RandomFanIn',
-                      'RandomFanOut')
+                      'RandomFanOut', 'DistanceDependent')
 
     def __init__(self, name, standard_library, parameters=(),
                  validate=True, **kwargs):  # @UnusedVariable @IgnorePep8
@@ -80,7 +80,8 @@ class ConnectionRule(ComponentClass):
         return cls(
             name=node.attr('name', **options),
             standard_library=standard_library,
-            parameters=node.children(Parameter, **options))
+            parameters=node.children(Parameter, **options),
+            validate=node.visitor.validate)
 
     # connection_rule
     def serialize_node_v1(self, node, **options):  # @UnusedVariable @IgnorePep8
@@ -105,7 +106,8 @@ class ConnectionRule(ComponentClass):
         return cls(
             name=node.attr('name', **options),
             standard_library=standard_library,
-            parameters=node.children(Parameter, **options))
+            parameters=node.children(Parameter, **options),
+            validate=node.visitor.validate)
 
     @property
     def lib_type(self):
@@ -113,7 +115,7 @@ class ConnectionRule(ComponentClass):
 
     def is_random(self):
         return self.lib_type in ('Probabilistic', 'RandomFanIn',
-                                 'RandomFanOut')
+                                 'RandomFanOut', 'DistanceDependent')
 
 
 from .visitors.modifiers import ConnectionRuleRenameSymbol  # @IgnorePep8
@@ -160,3 +162,18 @@ random_fan_out_connection_rule = ConnectionRule(
                       'RandomFanOut'),
     parameters=[Parameter(dimension=un.dimensionless,
                           name='number')])
+
+distance_dependent_connection_rule = ConnectionRule(
+    name='distance_dependent',
+    standard_library=(ConnectionRule.standard_library_basepath +
+                      'DistanceDependent'),
+    parameters=[Parameter(dimension=un.length,
+                          name='sourcePositions'),
+                Parameter(dimension=un.length,
+                          name='destinationPositions'),
+                Parameter(dimension=un.dimensionless,
+                          name='probability'),
+                Parameter(dimension=un.length,
+                          name='lengthScale'),
+                Parameter(dimension=un.length,
+                          name='maximumDistance')])
@@ -495,7 +495,8 @@ class Dynamics(ComponentClass, DynamicPortsObject):
             regimes=node.children(Regime, **options),
             aliases=node.children(Alias, **options),
             state_variables=node.children(StateVariable, **options),
-            constants=node.children(Constant, **options))
+            constants=node.children(Constant, **options),
+            validate=node.visitor.validate)
 
     def serialize_node_v1(self, node, **options):  # @UnusedVariable @IgnorePep8
         node.attr('name', self.name, **options)
@@ -528,7 +529,8 @@ class Dynamics(ComponentClass, DynamicPortsObject):
             aliases=node.children(Alias, parent_elem=dyn_elem, **options),
             state_variables=node.children(StateVariable, parent_elem=dyn_elem,
                                           **options),
-            constants=node.children(Constant, parent_elem=dyn_elem, **options))
+            constants=node.children(Constant, parent_elem=dyn_elem, **options),
+            validate=node.visitor.validate)
 
 # Import visitor modules and those which import visitor modules
 from .visitors.validators import DynamicsValidator  # @IgnorePep8
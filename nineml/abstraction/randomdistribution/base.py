@@ -66,7 +66,8 @@ class RandomDistribution(ComponentClass):
         return cls(
             name=node.attr('name', **options),
             standard_library=node.attr('standard_library', **options),
-            parameters=node.children(Parameter, **options))
+            parameters=node.children(Parameter, **options),
+            validate=node.visitor.validate)
 
     def serialize_node_v1(self, node, **options):  # @UnusedVariable @IgnorePep8
         node.attr('name', self.name, **options)
@@ -90,7 +91,8 @@ class RandomDistribution(ComponentClass):
         return cls(
             name=node.attr('name', **options),
             standard_library=standard_library,
-            parameters=node.children(Parameter, **options))
+            parameters=node.children(Parameter, **options),
+            validate=node.visitor.validate)
 
 from .visitors.modifiers import RandomDistributionRenameSymbol  # @IgnorePep8
 from .visitors.queriers import (RandomDistributionRequiredDefinitions,  # @IgnorePep8
@@ -600,6 +600,10 @@ INDEX_INDEX_ATTR = 'index'
 VALIDATION = 'Validation'
 DIMENSIONALITY = 'dimensionality'
 
+# Network random seed
+RANDOM = 'Random'
+SEED = 'seed'
+
 
 xml_visitor_module_re = re.compile(r'nineml\.abstraction\.\w+\.visitors\.xml')
 
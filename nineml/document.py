@@ -202,7 +202,7 @@ class Document(AnnotatedNineMLObject, dict):
         Ensure all elements are loaded before iterating, as additional
         elements may be added to the document during the load process
         """
-        for name in dict.keys(self):
+        for name in list(self.keys()):
             self[name]
 
     def clone(self, cloner=None, **kwargs):
@@ -221,6 +221,40 @@ class Document(AnnotatedNineMLObject, dict):
         return Document(*list(self.values()), clone=True, cloner=cloner,
                         **kwargs)
 
+    def share_arrays(self):
+        """
+        Moves the values of all array values in the document into a shared
+        memory block so that worker processes the document is passed to
+        (e.g. via a multiprocessing pool) attach to the block instead of
+        receiving their own copies of the arrays (see `nineml.shared`)
+
+        Returns
+        -------
+        shared : nineml.shared.SharedArrays
+            The shared memory block, which should be unlinked (e.g. by using
+            it as a context manager) once the worker processes have attached
+            to it
+        """
+        from nineml.shared import share_arrays
+        return share_arrays(self.values())
+
+    def __reduce_ex__(self, protocol):  # @UnusedVariable
+        # The elements are restored in __setstate__ after the attributes of
+        # the document have been set (instead of via __setitem__, which
+        # would try to add them to the document again), and the unserializer
+        # isn't pickled so all the elements need to be loaded first
+        self._load_all()
+        state = dict(self.__dict__)
+        state['_unserializer'] = None
+        state['_loading'] = []
+        return (Document.__new__, (type(self),),
+                (state, dict(dict.items(self))))
+
+    def __setstate__(self, state):
+        state, elements = state
+        self.__dict__.update(state)
+        dict.update(self, elements)
+
     def find_mismatch(self, other, **kwargs):
         finder = MismatchFinder(**kwargs)
         s_names = sorted(self.keys())
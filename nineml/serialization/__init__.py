@@ -11,7 +11,7 @@ from nineml.base import DocumentLevelObject  # @IgnorePep8
 from nineml.document import Document  # @IgnorePep8
 from nineml.exceptions import (  # @IgnorePep8
     NineMLSerializationError, NineMLIOError, NineMLReloadDocumentException,
-    NineMLSerializerNotImportedError)
+    NineMLSerializerNotImportedError, NineMLUsageError)
 
 DEFAULT_VERSION = 1
 DEFAULT_FORMAT = 'xml'  # see nineml.serialization format_to_serializer.keys()
@@ -42,20 +42,25 @@ try:
     from .hdf5 import HDF5Serializer, HDF5Unserializer
 except ImportError:
     HDF5Serializer = HDF5Unserializer = None
+from .binary import BinarySerializer, BinaryUnserializer  # @IgnorePep8
+from .cache import load_snapshot, save_snapshot  # @IgnorePep8
+from .parallel import unserialize_in_parallel  # @IgnorePep8
 
 
 ext_to_format = {
     '.xml': 'xml',
     '.yml': 'yaml',
     '.h5': 'hdf5',
-    '.json': 'json'}
+    '.json': 'json',
+    '.9mlb': 'binary'}
 
 format_to_serializer = {
     'xml': XMLSerializer,
     'dict': DictSerializer,
     'yaml': YAMLSerializer,
     'json': JSONSerializer,
-    'hdf5': HDF5Serializer}
+    'hdf5': HDF5Serializer,
+    'binary': BinarySerializer}
 
 
 format_to_unserializer = {
@@ -63,10 +68,12 @@ format_to_unserializer = {
     'dict': DictUnserializer,
     'yaml': YAMLUnserializer,
     'json': JSONUnserializer,
-    'hdf5': HDF5Unserializer}
+    'hdf5': HDF5Unserializer,
+    'binary': BinaryUnserializer}
 
 
-def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @ReservedAssignment @IgnorePep8
+def read(url, relative_to=None, reload=False, register=True,
+         streaming=False, cache_dir=None, workers=None, **kwargs):
     """
     Reads a NineML document from the given url or file system path and returns
     a Document object.
@@ -86,6 +93,28 @@ def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @Rese
         or not.
     register : bool
         Whether to store the document in the cache after it is read
+    streaming : bool
+        Whether to only index the document-level elements of the file when it
+        is read and load each element from the file when it is accessed (only
+        supported by formats that support streaming, e.g. XML)
+    cache_dir : str | None
+        A directory to store snapshots of unserialized documents in, which are
+        loaded instead of unserializing the document again when it is read by
+        later processes (as long as neither the document file nor any of the
+        files it references have changed). Only documents on the local file
+        system are cached. See `nineml.serialization.cache`.
+    workers : int | None
+        The number of worker processes to unserialize the elements of the
+        document in. Elements that don't reference each other are
+        unserialized in parallel and then merged into a single document (see
+        `nineml.serialization.parallel`). Only used for documents on the
+        local file system.
+    validate : bool | None
+        Whether to validate the component classes of the document as they are
+        read (passed to the unserializer). If None, the default of the format
+        is used, which is to validate them for all formats. Pass False to skip
+        the validation of trusted files (e.g. binary files written by the
+        library from validated objects) for faster reading.
     """
     if not isinstance(url, basestring):
         raise NineMLIOError(
@@ -115,29 +144,59 @@ def read(url, relative_to=None, reload=False, register=True, **kwargs):  # @Rese
             raise NineMLReloadDocumentException()
         doc = doc_ref()
     except (KeyError, NineMLReloadDocumentException):  # Reload from file
-        # Get the unserializer based on the url extension
-        format = format_from_url(url)  # @ReservedAssignment
-        try:
-            Unserializer = format_to_unserializer[format]
-        except KeyError:
-            raise NineMLSerializationError(
-                "Unrecognised format '{}' in url '{}', can be one of '{}'"
-                .format(format, url,
-                        "', '".join(list(format_to_unserializer.keys()))))
-        if Unserializer is None:
-            raise NineMLSerializerNotImportedError(
-                "Cannot write to '{}' as {} serializer cannot be imported. "
-                "Please check the required dependencies are correctly "
-                "installed".format(url, format))
-        if file_path_re.match(url) is not None:
-            file = open(url)  # @ReservedAssignment
-        elif url_re.match(url) is not None:
-            file = urlopen(url)  # @ReservedAssignment
-        else:
-            raise NineMLIOError(
-                "Unrecognised url '{}'".format(url))
-        with contextlib.closing(file):
-            doc = Unserializer(root=file, url=url, **kwargs).unserialize()
+        if cache_dir is not None and streaming:
+            raise NineMLUsageError(
+                "Documents cannot be both streamed and cached ('{}')"
+                .format(url))
+        if workers is not None and streaming:
+            raise NineMLUsageError(
+                "Documents cannot be both streamed and unserialized in "
+                "parallel ('{}')".format(url))
+        doc = None
+        use_cache = (cache_dir is not None and
+                     file_path_re.match(url) is not None)
+        if use_cache:
+            doc = load_snapshot(url, cache_dir)
+        if doc is None:
+            # Get the unserializer based on the url extension
+            format = format_from_url(url)  # @ReservedAssignment
+            try:
+                Unserializer = format_to_unserializer[format]
+            except KeyError:
+                raise NineMLSerializationError(
+                    "Unrecognised format '{}' in url '{}', can be one of '{}'"
+                    .format(format, url, "', '".join(
+                        list(format_to_unserializer.keys()))))
+            if Unserializer is None:
+                raise NineMLSerializerNotImportedError(
+                    "Cannot write to '{}' as {} serializer cannot be "
+                    "imported. Please check the required dependencies are "
+                    "correctly installed".format(url, format))
+            if streaming:
+                if not Unserializer.supports_streaming:
+                    raise NineMLSerializationError(
+                        "Cannot stream '{}' as {} format does not support "
+                        "streaming".format(url, format))
+                kwargs['streaming'] = True
+            if file_path_re.match(url) is not None:
+                file = Unserializer.open_file(url)  # @ReservedAssignment
+            elif url_re.match(url) is not None:
+                file = urlopen(url)  # @ReservedAssignment
+            else:
+                raise NineMLIOError(
+                    "Unrecognised url '{}'".format(url))
+            with contextlib.closing(file):
+                unserializer = Unserializer(root=file, url=url, **kwargs)
+                if streaming:
+                    # Elements are loaded when they are accessed
+                    doc = unserializer.document
+                elif workers is not None and workers > 1:
+                    doc = unserialize_in_parallel(unserializer, workers,
+                                                  **kwargs)
+                else:
+                    doc = unserializer.unserialize()
+            if use_cache:
+                save_snapshot(doc, url, cache_dir)
         if register:
             nineml.Document.registry[url] = weakref.ref(doc), mtime
     if name is not None:
@@ -158,6 +158,21 @@ class NodeToSerialize(BaseNode):
         """
         self.visitor.set_body(self._serial_elem, value, **options)
 
+    def array(self, array, **options):
+        """
+        Set the body of the elem to an array encoded in bulk (e.g. base64 in
+        XML, a native dataset in HDF5, see `BaseSerializer.set_array`)
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            The array to store in the body of the element
+        options : dict
+            Options that can be passed to specific branches of the element
+            tree (unlikely to be used but included for completeness)
+        """
+        self.visitor.set_array(self._serial_elem, array, **options)
+
 
 class NodeToUnserialize(BaseNode):
 
@@ -435,6 +450,26 @@ class NodeToUnserialize(BaseNode):
                 "Cannot convert body of {} node ({}) to {}"
                 .format(self.name, value, dtype))
 
+    def array(self, dtype, **options):
+        """
+        Returns the array encoded in bulk in the body of the serial element
+        (see `NodeToSerialize.array`)
+
+        Parameters
+        ----------
+        dtype : numpy.dtype
+            The type of the array elements
+
+        Returns
+        -------
+        array : numpy.ndarray | LazyArray
+            The array stored in the body (or a lazily read array for formats
+            that support it, e.g. HDF5)
+        """
+        array = self.visitor.get_array(self._serial_elem, dtype, **options)
+        self.unprocessed_body = False
+        return array
+
     def _get_name_map(self, nineml_classes):
         try:
             nineml_classes = list(nineml_classes)
@@ -5,14 +5,16 @@ from builtins import object
 from future.utils import with_metaclass
 import os.path
 import re
+import base64
 from abc import ABCMeta, abstractmethod
+import numpy
 from nineml.exceptions import (
     NineMLSerializationError, NineMLMissingSerializationError, NineMLNameError)
 import nineml
 from nineml.reference import Reference
 from nineml.base import DocumentLevelObject
 from nineml.annotations import (
-    Annotations, PY9ML_NS, VALIDATION, DIMENSIONALITY)
+    Annotations, PY9ML_NS, VALIDATION, DIMENSIONALITY, RANDOM, SEED)
 from .. import DEFAULT_VERSION, NINEML_BASE_NS
 from nineml.serialization.base.nodes import NodeToSerialize, NodeToUnserialize
 from nineml.utils import is_file_handle
@@ -47,6 +49,13 @@ class BaseVisitor(with_metaclass(ABCMeta, object)):
     # stage.
     supports_bodies = False
 
+    # The encoding used to store arrays in bulk (see set_array/get_array)
+    array_encoding = 'base64'
+
+    # Whether arrays are also encoded in bulk in version 1 documents, for
+    # formats that aren't covered by the version 1 specification
+    compact_arrays_v1 = False
+
     def __init__(self, version, document):
         self._version = self.standardize_version(version)
         self._document = document
@@ -297,6 +306,28 @@ class BaseSerializer(with_metaclass(ABCMeta, BaseVisitor)):
             Serialization format-specific options for the method
         """
 
+    def set_array(self, serial_elem, array, **options):
+        """
+        Sets the body of a serial element to an array encoded in bulk (instead
+        of an element per entry). By default the array is stored as a base64
+        string of its little-endian bytes, which formats with a more compact
+        native representation override.
+
+        Parameters
+        ----------
+        serial_elem : <serial-element>
+            The serial element (dependent on the serialization type)
+        array : numpy.ndarray
+            The (one-dimensional) array to store
+        options : dict(str, object)
+            Serialization format-specific options for the method
+        """
+        array = numpy.ascontiguousarray(
+            array, dtype=array.dtype.newbyteorder('<'))
+        self.set_body(serial_elem,
+                      base64.b64encode(array.tobytes()).decode('ascii'),
+                      **options)
+
     @abstractmethod
     def to_file(self, serial_elem, file, **options):  # @ReservedAssignment
         """
@@ -425,15 +456,29 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
     document : nineml.Document
         Document to serialize or use as a reference when unserializing elements
         of it
+    validate : bool | None
+        Whether to validate the component classes as they are unserialized. If
+        None, the format's default (`validate_by_default`) is used
     """
 
-    def __init__(self, root, version=None, url=None, class_map=None, # @ReservedAssignment @IgnorePep8
-                 document=None):
+    # Whether the format supports streaming the document-level elements from
+    # the file as they are loaded instead of parsing the whole file upfront
+    supports_streaming = False
+
+    # Whether component classes are validated by default as they are
+    # unserialized
+    validate_by_default = True
+
+    def __init__(self, root, version=None, url=None, class_map=None,
+                 document=None, validate=None):
         if class_map is None:
             class_map = {}
         if document is None:
             document = Document(unserializer=self, url=url)
+        if validate is None:
+            validate = self.validate_by_default
         self._url = url
+        self._validate = validate
         # Get root elem either from kwarg or file handle
         if hasattr(root, 'url'):
             self._root = self.from_urlfile(root)
@@ -578,6 +623,14 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
     def url(self):
         return self._url
 
+    @property
+    def validate(self):
+        return self._validate
+
+    @classmethod
+    def open_file(cls, url):
+        return open(url)
+
     def keys(self):
         return iter(self._doc_elems.keys())
 
@@ -683,6 +736,40 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
             The body of the serial element
         """
 
+    def get_array(self, serial_elem, dtype, **options):
+        """
+        Extracts an array encoded in bulk from the body of the serial element
+        (see `BaseSerializer.set_array`)
+
+        Parameters
+        ----------
+        serial_elem : <serial-element>
+            A serial element
+        dtype : numpy.dtype
+            The type of the array elements
+        options : dict(str, object)
+            Serialization format-specific options for the method
+
+        Returns
+        -------
+        array : numpy.ndarray
+            The array stored in the body of the serial element
+        """
+        body = self.get_body(serial_elem, **options)
+        if body is None:
+            return numpy.array([], dtype=dtype)
+        return self._decode_array(body, dtype)
+
+    @classmethod
+    def _decode_array(cls, body, dtype):
+        try:
+            data = base64.b64decode(body)
+        except (TypeError, ValueError):
+            raise NineMLSerializationError(
+                "Could not decode base64 array '{}'".format(body[:20]))
+        return numpy.frombuffer(
+            data, dtype=numpy.dtype(dtype).newbyteorder('<')).astype(dtype)
+
     @abstractmethod
     def get_attr_keys(self, serial_elem, **options):
         """
@@ -858,6 +945,9 @@ class BaseUnserializer(with_metaclass(ABCMeta, BaseVisitor)):
         """
         options['validate_dims'] = annotations.get(
             (VALIDATION, PY9ML_NS), DIMENSIONALITY, default='True') == 'True'
+        random_seed = annotations.get((RANDOM, PY9ML_NS), SEED, default=None)
+        options['random_seed'] = (int(random_seed)
+                                  if random_seed is not None else None)
 
     def _get_v1_component_class_type(self, elem):
         """
@@ -0,0 +1,395 @@
+"""
+A compact binary serialization format ('.9mlb') for fast machine-to-machine
+round-trips, which encodes the same tree of elements and attributes as the
+dictionary serializer (see `nineml.serialization.dict`) but in a length-
+prefixed binary form. Strings (e.g. repeated element and attribute names)
+are interned so each distinct string is only stored once, and arrays are
+stored as their raw (little-endian) bytes.
+
+The file starts with the magic bytes b'9MLB' and a format version byte,
+followed by the root element, where each value is encoded as a type tag byte
+followed by:
+
+    None, False, True   nothing
+    int                 a little-endian signed 64-bit integer
+    float               a little-endian 64-bit float
+    string              a uint32 length and the UTF-8 bytes of the string,
+                        which is appended to the string table
+    string reference    the uint32 index of the string in the string table
+    long integer        the length-prefixed decimal string of the integer
+    map                 a uint32 count and the key (string) and value of each
+                        entry
+    list                a uint32 count and each item
+    array               the length-prefixed NumPy dtype string (either '<f8'
+                        or '<i8'), a uint64 length in bytes and the bytes
+                        of the array
+
+As with the other formats, the component classes are validated when they are
+read by default. As the validation dominates the time taken to read a
+document, files that are known to have been written by the library can be
+read several times faster by passing `validate=False` to `nineml.read` (which
+skips it for the other formats too). The cheaper decoding only makes a
+difference for documents with large arrays. Writing is no faster than the
+text formats, as the time is dominated by the format-independent traversal
+of the object tree (and the printing of its expressions) rather than the
+encoding.
+"""
+import struct
+import numpy
+from nineml.exceptions import NineMLSerializationError
+from .dict import DictSerializer, DictUnserializer
+
+
+MAGIC = b'9MLB'
+FORMAT_VERSION = 1
+
+# Type tags
+NONE = b'\x00'
+FALSE = b'\x01'
+TRUE = b'\x02'
+INT = b'\x03'
+FLOAT = b'\x04'
+STR = b'\x05'
+STR_REF = b'\x06'
+MAP = b'\x07'
+LIST = b'\x08'
+ARRAY = b'\x09'
+LONG = b'\x0a'
+
+_int64 = struct.Struct('<q')
+_float64 = struct.Struct('<d')
+_uint32 = struct.Struct('<I')
+_uint64 = struct.Struct('<Q')
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+# The (little-endian) dtypes arrays are stored in, as only these are read back
+# from the untrusted data
+ARRAY_DTYPES = {b'<f8': numpy.dtype('<f8'), b'<i8': numpy.dtype('<i8')}
+
+
+class BinarySerializer(DictSerializer):
+    """
+    A Serializer class that serializes to the compact binary format
+    """
+
+    # Arrays are stored in the tree as little-endian arrays and written as
+    # their raw bytes
+    array_encoding = 'binary'
+
+    # The binary format isn't covered by the version 1 specification so
+    # arrays are stored in bulk in all versions
+    compact_arrays_v1 = True
+
+    def create_elem(self, name, parent, namespace=None,  # @UnusedVariable
+                    multiple=False, **options):  # @UnusedVariable
+        # Plain dictionaries are used (which preserve their insertion order)
+        # as they are faster to create and encode than OrderedDicts
+        elem = {}
+        if multiple:
+            if name not in parent:
+                parent[name] = []
+            parent[name].append(elem)
+        else:
+            if name in parent:
+                raise NineMLSerializationError(
+                    "'{}' already exists in parent ({}) when creating "
+                    "singleton element".format(name, parent))
+            parent[name] = elem
+        if namespace is not None:
+            self.set_attr(elem, self.NS_ATTR, namespace, **options)
+        return elem
+
+    def create_root(self, **options):  # @UnusedVariable
+        return {self.NS_ATTR: self.nineml_namespace}
+
+    def set_array(self, serial_elem, array, **options):  # @UnusedVariable
+        self.set_body(serial_elem, numpy.ascontiguousarray(
+            array, dtype=array.dtype.newbyteorder('<')), **options)
+
+    def to_file(self, serial_elem, file,  # @ReservedAssignment
+                **options):  # @UnusedVariable
+        file.write(self.to_str(serial_elem, **options))
+
+    def to_str(self, serial_elem, **options):  # @UnusedVariable
+        """
+        Encodes the serial element into the binary format
+
+        Returns
+        -------
+        data : bytes
+            The encoded element
+        """
+        return encode(self.to_elem(serial_elem, **options))
+
+
+class BinaryUnserializer(DictUnserializer):
+    """
+    A Unserializer class that unserializes the compact binary format
+    """
+
+    def get_array(self, serial_elem, dtype, **options):  # @UnusedVariable
+        body = serial_elem.get(self.BODY_ATTR)
+        if isinstance(body, numpy.ndarray):
+            return body.astype(dtype, copy=False)
+        return super(BinaryUnserializer, self).get_array(serial_elem, dtype,
+                                                         **options)
+
+    def from_file(self, file, **options):  # @ReservedAssignment
+        return self.from_str(file.read(), **options)
+
+    def from_str(self, string, **options):
+        return self.from_elem(decode(string), **options)
+
+    @classmethod
+    def open_file(cls, url):
+        return open(url, 'rb')
+
+
+def encode(value):
+    """
+    Encodes a tree of dictionaries, lists, strings, numbers and NumPy arrays
+    into the binary format
+
+    Parameters
+    ----------
+    value : dict | list | str | int | float | bool | None | numpy.ndarray
+        The root of the tree to encode
+
+    Returns
+    -------
+    data : bytes
+        The encoded tree, including the magic bytes and format version
+    """
+    chunks = [MAGIC, bytes(bytearray([FORMAT_VERSION]))]
+    _Encoder(chunks.append).encode(value)
+    return b''.join(chunks)
+
+
+def decode(data):
+    """
+    Decodes a tree encoded with `encode`
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded tree
+
+    Returns
+    -------
+    value : dict | list | str | int | float | bool | None | numpy.ndarray
+        The decoded tree. Arrays are read-only views of `data`
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise NineMLSerializationError(
+            "Data is not in the binary NineML format (starts with {})"
+            .format(bytes(data[:len(MAGIC)])))
+    version = bytearray(data[len(MAGIC):len(MAGIC) + 1])[0]
+    if version > FORMAT_VERSION:
+        raise NineMLSerializationError(
+            "Binary NineML format version {} is newer than the supported "
+            "version {}".format(version, FORMAT_VERSION))
+    decoder = _Decoder(data)
+    try:
+        value, pos = decoder.decode(len(MAGIC) + 1)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise NineMLSerializationError(
+            "Truncated or corrupt binary NineML data: {}".format(e))
+    if pos != len(data):
+        raise NineMLSerializationError(
+            "Unexpected trailing data after the end of the binary NineML "
+            "data ({} bytes)".format(len(data) - pos))
+    return value
+
+
+class _Encoder(object):
+
+    def __init__(self, write):
+        self._write = write
+        self._strings = {}
+        self._encoders = {
+            dict: self._encode_map,
+            list: self._encode_list,
+            str: self._encode_str,
+            float: self._encode_float,
+            int: self._encode_int,
+            bool: self._encode_bool,
+            type(None): self._encode_none,
+            numpy.ndarray: self._encode_array}
+
+    def encode(self, value):
+        try:
+            encoder = self._encoders[type(value)]
+        except KeyError:
+            encoder = self._encoder_for_subclass(value)
+        encoder(value)
+
+    def _encoder_for_subclass(self, value):
+        # Subclasses of the supported types (e.g. OrderedDict or NumPy
+        # scalars), checking bool before int as it is a subclass of int
+        for cls in (dict, list, str, bool, numpy.bool_, float, numpy.floating,
+                    int, numpy.integer, numpy.ndarray):
+            if isinstance(value, cls):
+                if cls is numpy.bool_:
+                    return lambda v: self._encode_bool(bool(v))
+                elif cls is numpy.floating:
+                    return lambda v: self._encode_float(float(v))
+                elif cls is numpy.integer:
+                    return lambda v: self._encode_int(int(v))
+                return self._encoders[cls]
+        raise NineMLSerializationError(
+            "Cannot encode {} ({}) in binary NineML format"
+            .format(value, type(value)))
+
+    def _encode_map(self, value):
+        write = self._write
+        write(MAP + _uint32.pack(len(value)))
+        for key, item in value.items():
+            self._encode_str(key)
+            self.encode(item)
+
+    def _encode_list(self, value):
+        self._write(LIST + _uint32.pack(len(value)))
+        for item in value:
+            self.encode(item)
+
+    def _encode_str(self, value):
+        try:
+            self._write(STR_REF + _uint32.pack(self._strings[value]))
+        except KeyError:
+            self._strings[value] = len(self._strings)
+            encoded = value.encode('utf-8')
+            self._write(STR + _uint32.pack(len(encoded)) + encoded)
+
+    def _encode_float(self, value):
+        self._write(FLOAT + _float64.pack(value))
+
+    def _encode_int(self, value):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            self._write(INT + _int64.pack(value))
+        else:
+            encoded = str(value).encode('ascii')
+            self._write(LONG + _uint32.pack(len(encoded)) + encoded)
+
+    def _encode_bool(self, value):
+        self._write(TRUE if value else FALSE)
+
+    def _encode_none(self, value):  # @UnusedVariable
+        self._write(NONE)
+
+    def _encode_array(self, value):
+        if value.dtype.kind in 'iu':
+            dtype = b'<i8'
+        elif value.dtype.kind == 'f':
+            dtype = b'<f8'
+        else:
+            raise NineMLSerializationError(
+                "Cannot encode array of dtype '{}' in binary NineML format, "
+                "only integer and float arrays are supported"
+                .format(value.dtype))
+        value = numpy.ascontiguousarray(value, dtype=ARRAY_DTYPES[dtype])
+        self._write(ARRAY + _uint32.pack(len(dtype)) + dtype +
+                    _uint64.pack(value.nbytes))
+        self._write(value.tobytes())
+
+
+class _Decoder(object):
+
+    def __init__(self, data):
+        self._data = data
+        self._view = memoryview(data)
+        self._strings = []
+
+    def decode(self, pos):
+        """
+        Decodes the value starting at the given position, returning the value
+        and the position after it. The checks for the most frequent tags
+        (string references and maps) come first and the state is held in
+        local variables as this is the bottleneck when reading.
+        """
+        data = self._data
+        view = self._view
+        strings = self._strings
+        unpack_uint32 = _uint32.unpack_from
+        unpack_float = _float64.unpack_from
+        unpack_int = _int64.unpack_from
+        str_ref, map_tag, str_tag, list_tag, float_tag, int_tag = (
+            STR_REF[0], MAP[0], STR[0], LIST[0], FLOAT[0], INT[0])
+
+        def read_bytes(pos, length):
+            end = pos + length
+            if end > len(data):
+                raise IndexError("{} bytes required at byte {}".format(
+                    length, pos))
+            return view[pos:end], end
+
+        def decode(pos):
+            tag = data[pos]
+            pos += 1
+            if tag == str_ref:
+                return strings[unpack_uint32(data, pos)[0]], pos + 4
+            elif tag == map_tag:
+                count = unpack_uint32(data, pos)[0]
+                pos += 4
+                value = {}
+                for _ in range(count):
+                    key, pos = decode(pos)
+                    value[key], pos = decode(pos)
+                return value, pos
+            elif tag == str_tag:
+                encoded, pos = read_bytes(pos + 4,
+                                          unpack_uint32(data, pos)[0])
+                value = str(encoded, 'utf-8')
+                strings.append(value)
+                return value, pos
+            elif tag == list_tag:
+                count = unpack_uint32(data, pos)[0]
+                pos += 4
+                value = []
+                for _ in range(count):
+                    item, pos = decode(pos)
+                    value.append(item)
+                return value, pos
+            elif tag == float_tag:
+                return unpack_float(data, pos)[0], pos + 8
+            elif tag == int_tag:
+                return unpack_int(data, pos)[0], pos + 8
+            elif tag == NONE[0]:
+                return None, pos
+            elif tag == FALSE[0]:
+                return False, pos
+            elif tag == TRUE[0]:
+                return True, pos
+            elif tag == LONG[0]:
+                encoded, pos = read_bytes(pos + 4,
+                                          unpack_uint32(data, pos)[0])
+                return int(str(encoded, 'ascii')), pos
+            elif tag == ARRAY[0]:
+                dtype_pos = pos + 4
+                dtype, pos = read_bytes(dtype_pos,
+                                        unpack_uint32(data, pos)[0])
+                try:
+                    dtype = ARRAY_DTYPES[bytes(dtype)]
+                except KeyError:
+                    raise NineMLSerializationError(
+                        "Unsupported array dtype {} at byte {} of binary "
+                        "NineML data (only {} are supported)".format(
+                            bytes(dtype), dtype_pos, ', '.join(
+                                str(d, 'ascii') for d in ARRAY_DTYPES)))
+                nbytes = _uint64.unpack_from(data, pos)[0]
+                if nbytes % dtype.itemsize:
+                    raise NineMLSerializationError(
+                        "Length of array at byte {} of binary NineML data "
+                        "({} bytes) is not a multiple of its item size ({})"
+                        .format(pos, nbytes, dtype.itemsize))
+                encoded, pos = read_bytes(pos + 8, nbytes)
+                array = numpy.frombuffer(encoded, dtype=dtype)
+                if array.flags.writeable:
+                    array.flags.writeable = False
+                return array, pos
+            raise NineMLSerializationError(
+                "Unrecognised type tag {} at byte {} of binary NineML data"
+                .format(tag, pos - 1))
+
+        return decode(pos)
@@ -0,0 +1,229 @@
+"""
+Persistent on-disk cache of unserialized documents (see the `cache_dir`
+argument of `nineml.read`), which stores a pickled snapshot of each document
+read from the local file system so that later processes can load the snapshot
+instead of unserializing (and validating) the document again.
+
+Each snapshot records the path, modification time, size and SHA-256 hash of
+the file it was read from, of every other document file it references and of
+the external data files of its array values, along with the version of the
+library it was written by, and is discarded if any of these have changed when
+it is loaded. The referenced documents restored from a snapshot are added to
+the document registry (see `nineml.Document.registry`) as if they had been
+read by `nineml.read`.
+"""
+import os.path
+import time
+import pickle
+import hashlib
+import weakref
+import tempfile
+from io import BytesIO
+from logging import getLogger
+from nineml.document import Document
+from nineml.values import ArrayValue
+from nineml.version import __version__
+
+
+logger = getLogger('NineML')
+
+# The extension of the snapshot files stored in the cache directory
+SNAPSHOT_EXT = '.9mlpkl'
+
+# The number of bytes read at a time when hashing files
+HASH_CHUNK_SIZE = 2 ** 20
+
+
+def snapshot_path(path, cache_dir):
+    """
+    The path of the snapshot of the document at the given path in the cache
+    directory
+
+    Parameters
+    ----------
+    path : str
+        The absolute path of the document file
+    cache_dir : str
+        The directory the snapshots are stored in
+    """
+    return os.path.join(
+        cache_dir,
+        hashlib.sha256(os.path.realpath(path).encode('utf-8')).hexdigest() +
+        SNAPSHOT_EXT)
+
+
+def load_snapshot(path, cache_dir):
+    """
+    Loads the snapshot of the document at the given path from the cache
+    directory if it exists and is still valid
+
+    Parameters
+    ----------
+    path : str
+        The absolute path of the document file
+    cache_dir : str
+        The directory the snapshots are stored in
+
+    Returns
+    -------
+    document : Document | None
+        The document loaded from the snapshot or None if there isn't a valid
+        snapshot for the document
+    """
+    try:
+        with open(snapshot_path(path, cache_dir), 'rb') as f:
+            # The header is pickled separately so the snapshot can be checked
+            # without loading the document
+            version, signatures = pickle.load(f)
+            if version != __version__ or not all(
+                    file_signature(p, s) == s for p, s in signatures.items()):
+                return None
+            # The referenced documents are pickled after the document with
+            # the same pickler, so they are the same objects that the
+            # document references
+            unpickler = pickle.Unpickler(f)
+            document = unpickler.load()
+            referenced = unpickler.load()
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, ValueError,
+            AttributeError, ImportError) as e:
+        if not isinstance(e, (IOError, OSError)) or os.path.exists(
+                snapshot_path(path, cache_dir)):
+            logger.warning("Could not load cached snapshot of '{}': {}"
+                           .format(path, e))
+        return None
+    _register(referenced)
+    return document
+
+
+def save_snapshot(document, path, cache_dir):
+    """
+    Saves a snapshot of the document read from the given path to the cache
+    directory. Documents that reference documents or external data files that
+    aren't on the local file system aren't cached as they can't be checked
+    for changes.
+
+    Parameters
+    ----------
+    document : Document
+        The document to save
+    path : str
+        The absolute path of the document file
+    cache_dir : str
+        The directory the snapshots are stored in
+
+    Returns
+    -------
+    saved : bool
+        Whether the snapshot was saved
+    """
+    try:
+        # Pickle the document first to find the files it references
+        data, urls = _pickle_document(document, path)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        logger.warning("Could not cache snapshot of '{}': {}".format(path, e))
+        return False
+    if not all(os.path.isfile(u) for u in urls):
+        return False
+    signatures = dict((u, file_signature(u)) for u in urls)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Write the snapshot to a temporary file first so that processes
+        # loading the snapshot concurrently never see a partially written
+        # file
+        fd, tmp_path = tempfile.mkstemp(suffix=SNAPSHOT_EXT, dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((__version__, signatures), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(data)
+            os.replace(tmp_path, snapshot_path(path, cache_dir))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except (IOError, OSError) as e:
+        logger.warning("Could not cache snapshot of '{}': {}".format(path, e))
+        return False
+    return True
+
+
+def file_signature(path, cached=None):
+    """
+    Returns the modification time, size and SHA-256 hash of a file, or None if
+    the file doesn't exist
+
+    Parameters
+    ----------
+    path : str
+        The path of the file
+    cached : tuple(int, int, str) | None
+        A previously calculated signature of the file. If the modification
+        time and size of the file match the cached signature then the cached
+        signature is returned without hashing the file again
+    """
+    try:
+        stat = os.stat(path)
+    except (IOError, OSError):
+        return None
+    if cached is not None:
+        if stat.st_size != cached[1]:
+            return None
+        elif stat.st_mtime_ns == cached[0]:
+            return cached
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    if cached is not None and sha256.hexdigest() == cached[2]:
+        # The file has been touched but not changed
+        return cached
+    return (stat.st_mtime_ns, stat.st_size, sha256.hexdigest())
+
+
+def _register(documents):
+    """
+    Adds the documents restored from a snapshot to the document registry,
+    unless an up-to-date document for the same url is already registered
+    """
+    for document in documents:
+        try:
+            mtime = time.ctime(os.path.getmtime(document.url))
+        except (IOError, OSError):
+            continue
+        try:
+            doc_ref, loaded_mtime = Document.registry[document.url]
+            if doc_ref() is not None and loaded_mtime == mtime:
+                continue
+        except KeyError:
+            pass
+        Document.registry[document.url] = weakref.ref(document), mtime
+
+
+class _DocumentPickler(pickle.Pickler):
+    """
+    Pickler that records the documents that are pickled along with the
+    document being cached (i.e. the documents it references) and the URLs of
+    their files and of the external data files of their array values
+    """
+
+    def __init__(self, *args, **kwargs):
+        pickle.Pickler.__init__(self, *args, **kwargs)
+        self.urls = set()
+        self.documents = []
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Document) and obj.url is not None:
+            if obj.url not in self.urls:
+                self.documents.append(obj)
+            self.urls.add(obj.url)
+        elif isinstance(obj, ArrayValue) and obj.datafile is not None:
+            self.urls.add(obj.datafile_path)
+        return None
+
+
+def _pickle_document(document, path):
+    buff = BytesIO()
+    pickler = _DocumentPickler(buff, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dump(document)
+    pickler.dump([d for d in pickler.documents if d.url != path])
+    return buff.getvalue(), pickler.urls
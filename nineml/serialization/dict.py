@@ -3,6 +3,7 @@ from nineml.exceptions import NineMLSerializationNotSupportedError
 from itertools import repeat, chain
 from . import NINEML_BASE_NS
 from collections import OrderedDict
+import numpy
 from nineml.document import Document
 from nineml.serialization.base import (
     BaseSerializer, BaseUnserializer)
@@ -16,6 +17,9 @@ class DictSerializer(BaseSerializer):
     Is used as the base class for the Pickle, JSON and YAML serializers
     """
 
+    # Arrays are stored as plain lists in dictionaries
+    array_encoding = 'list'
+
     def create_elem(self, name, parent, namespace=None, multiple=False,  # @UnusedVariable @IgnorePep8
                     **options):  # @UnusedVariable
         elem = OrderedDict()
@@ -42,6 +46,13 @@ class DictSerializer(BaseSerializer):
     def set_body(self, serial_elem, value, **options):  # @UnusedVariable @IgnorePep8
         self.set_attr(serial_elem, self.BODY_ATTR, value, **options)
 
+    def set_array(self, serial_elem, array, **options):  # @UnusedVariable
+        if self.array_encoding == 'list':
+            self.set_body(serial_elem, array.tolist(), **options)
+        else:
+            super(DictSerializer, self).set_array(serial_elem, array,
+                                                  **options)
+
     def to_file(self, serial_elem, file, **options):  # @UnusedVariable  @IgnorePep8 @ReservedAssignment
         raise NineMLSerializationNotSupportedError(
             "'dict' format cannot be written to file"
@@ -89,10 +100,11 @@ class DictUnserializer(BaseUnserializer):
         return iter(children)
 
     def get_all_children(self, parent, **options):  # @UnusedVariable
+        # NB: the body can be a list if it holds an array (see get_array)
         return chain(
             ((n, e) for n, e in parent.items() if isinstance(e, dict)),
             *(zip(repeat(n), e) for n, e in parent.items()
-              if isinstance(e, list)))
+              if isinstance(e, list) and n != self.BODY_ATTR))
 
     def get_attr(self, serial_elem, name, **options):  # @UnusedVariable
         try:
@@ -116,6 +128,12 @@ class DictUnserializer(BaseUnserializer):
             body = None
         return body
 
+    def get_array(self, serial_elem, dtype, **options):  # @UnusedVariable
+        body = serial_elem.get(self.BODY_ATTR, [])
+        if isinstance(body, list):
+            return numpy.array(body, dtype=dtype)
+        return self._decode_array(body, dtype)  # base64 from JSON/YAML
+
     def get_attr_keys(self, serial_elem, **options):  # @UnusedVariable
         return (n for n, e in serial_elem.items()
                 if not self._is_child(e) and n not in (self.BODY_ATTR,
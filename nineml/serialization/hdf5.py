@@ -1,5 +1,6 @@
 from builtins import zip
 import h5py
+import numpy
 from . import NINEML_BASE_NS
 from tempfile import mkstemp
 import contextlib
@@ -12,20 +13,52 @@ from nineml.serialization.base import (
     BaseSerializer, BaseUnserializer)
 from nineml.exceptions import NineMLNameError
 from nineml.utils import is_file_handle
+from nineml.utils.external_arrays import LazyArray
 
 
 class HDF5Serializer(BaseSerializer):
     """
     A Serializer class that serializes to the HDF5 format
+
+    Parameters
+    ----------
+    fname : str | file
+        The path of (or a handle to) the file to write
+    compression : str | None
+        The compression filter applied to the datasets arrays are stored in
+        (see `h5py.Group.create_dataset`). Only arrays of at least
+        `COMPRESSION_THRESHOLD` bytes are compressed.
+    compression_opts : int | None
+        The options of the compression filter (e.g. the gzip level)
+    chunk_size : int
+        The number of elements in each chunk of chunked datasets
+    compact_arrays_v1 : bool
+        Whether to also store arrays in datasets in version 1 documents
+        instead of as a group per array element (which is very slow for large
+        arrays). As this changes the layout of version 1 files, which can't
+        then be read by previous versions of the library, it is off by
+        default. Arrays are stored in datasets in version 2 documents unless
+        `compact_arrays=False` is passed to `nineml.write`
     """
 
-    def __init__(self, fname, **kwargs):  # @UnusedVariable @IgnorePep8 @ReservedAssignment
+    array_encoding = 'dataset'
+
+    # Arrays smaller than this (in bytes) are stored in contiguous,
+    # uncompressed datasets
+    COMPRESSION_THRESHOLD = 2 ** 16
+
+    def __init__(self, fname, compression='gzip', compression_opts=4,
+                 chunk_size=2 ** 16, compact_arrays_v1=False, **kwargs):
         if is_file_handle(fname):
             # Close the file and reopen with the h5py File object
             file_ = fname
             fname = file_.name
             file_.close()
         self._file = h5py.File(fname, 'w')
+        self._compression = compression
+        self._compression_opts = compression_opts
+        self._chunk_size = chunk_size
+        self.compact_arrays_v1 = compact_arrays_v1
         super(HDF5Serializer, self).__init__(**kwargs)
 
     def create_elem(self, name, parent, namespace=None, multiple=False,
@@ -59,6 +92,19 @@ class HDF5Serializer(BaseSerializer):
     def set_body(self, serial_elem, value, **options):  # @UnusedVariable @IgnorePep8
         self.set_attr(serial_elem, self.BODY_ATTR, value, **options)
 
+    def set_array(self, serial_elem, array, **options):  # @UnusedVariable
+        # Arrays are stored as native datasets (attributes are limited to
+        # 64kB), which are chunked and compressed if they are large
+        if self._compression is not None and (
+                array.nbytes >= self.COMPRESSION_THRESHOLD):
+            serial_elem.create_dataset(
+                self.BODY_ATTR, data=array,
+                chunks=(min(self._chunk_size, len(array)),),
+                compression=self._compression,
+                compression_opts=self._compression_opts, shuffle=True)
+        else:
+            serial_elem.create_dataset(self.BODY_ATTR, data=array)
+
     def to_file(self, serial_elem, file, **options):  # @UnusedVariable  @IgnorePep8 @ReservedAssignment
         if file.name != self._file.filename:
             raise NineMLSerializationError(
@@ -103,9 +149,12 @@ class HDF5Unserializer(BaseUnserializer):
         return iter(children.values())
 
     def get_all_children(self, parent, **options):  # @UnusedVariable
+        # Datasets hold the values of arrays (see get_array) not children
+        groups = [(n, e) for n, e in parent.items()
+                  if isinstance(e, h5py.Group)]
         return chain(
-            ((n, e) for n, e in parent.items() if not e.attrs[self.MULT_ATTR]),
-            *(zip(repeat(n), iter(e.values())) for n, e in parent.items()
+            ((n, e) for n, e in groups if not e.attrs[self.MULT_ATTR]),
+            *(zip(repeat(n), iter(e.values())) for n, e in groups
               if e.attrs[self.MULT_ATTR]))
 
     def get_attr(self, serial_elem, name, **options):  # @UnusedVariable
@@ -117,6 +166,15 @@ class HDF5Unserializer(BaseUnserializer):
         except KeyError:
             return None
 
+    def get_array(self, serial_elem, dtype, **options):  # @UnusedVariable
+        try:
+            dataset = serial_elem[self.BODY_ATTR]
+        except KeyError:
+            return numpy.array([], dtype=dtype)
+        # The dataset is only read (in part if it is sliced) when the values
+        # of the array value are accessed
+        return LazyArray(dataset, dtype=dtype)
+
     def get_attr_keys(self, serial_elem, **options):  # @UnusedVariable
         return iter(serial_elem.attrs.keys())
 
@@ -8,6 +8,10 @@ class JSONSerializer(DictSerializer):
     A Serializer class that serializes to JSON
     """
 
+    # Arrays are stored as base64 strings, which are much more compact than
+    # lists of numbers in text
+    array_encoding = 'base64'
+
     def to_file(self, serial_elem, file, skipkeys=False, ensure_ascii=True, #   @IgnorePep8 @ReservedAssignment
                 check_circular=True, allow_nan=True, cls=None, indent=None,
                 separators=None, default=None,
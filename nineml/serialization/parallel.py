@@ -0,0 +1,248 @@
+"""
+Parallel unserialization of the document-level elements of a document (see
+the `workers` argument of `nineml.read`).
+
+The references between the elements of the document are determined from the
+serialized tree (any attribute or body of an element that matches the name
+of another document-level element is treated as a reference to it), and the
+elements are grouped into the connected components of the resulting graph,
+which can be unserialized independently of each other. Units and dimensions,
+which are referenced by most elements but are quick to unserialize, are
+unserialized in the main process beforehand and left out of the graph so
+that they don't join every element into a single component.
+
+The components are distributed between a pool of worker processes, which
+each unserialize their share of the elements from the file and send them back
+pickled. References to the document and to elements outside the share of the
+worker are pickled by name so that they are resolved to the objects in the
+merged document when the elements are unpickled.
+"""
+import os.path
+import pickle
+from io import BytesIO
+from past.builtins import basestring
+import nineml
+from nineml.base import DocumentLevelObject
+from nineml.document import Document
+from nineml.units import Unit, Dimension
+
+
+def unserialize_in_parallel(unserializer, workers, **kwargs):
+    """
+    Unserializes all the document-level elements indexed by the unserializer
+    in a pool of worker processes and merges them into its document
+
+    Parameters
+    ----------
+    unserializer : BaseUnserializer
+        The unserializer of a document on the local file system
+    workers : int
+        The number of worker processes
+    kwargs : dict
+        Keyword arguments passed to the unserializers in the worker processes
+
+    Returns
+    -------
+    document : Document
+        The unserialized document
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    url = unserializer.url
+    shares = _divide_elements(unserializer, workers)
+    if len(shares) > 1 and url is not None and os.path.isfile(url):
+        for name in _shared_elements(unserializer):
+            unserializer.document[name]
+        if type(unserializer).supports_streaming:
+            # Only the elements in each share need to be parsed by the
+            # workers
+            kwargs['streaming'] = True
+        with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+            results = list(executor.map(
+                _unserialize_share, [url] * len(shares), shares,
+                [kwargs] * len(shares)))
+        for result in results:
+            _merge(unserializer, result)
+    # Load any elements that weren't merged from the workers (e.g. if the
+    # document wasn't split between them)
+    return unserializer.unserialize()
+
+
+def element_dependencies(unserializer):
+    """
+    Determines the names of the other document-level elements each element
+    of the document references (or may reference) from the serialized tree
+
+    Parameters
+    ----------
+    unserializer : BaseUnserializer
+        The unserializer of the document
+
+    Returns
+    -------
+    dependencies : dict(str, set(str))
+        The names of the elements referenced by each element, mapped by name
+    sizes : dict(str, int)
+        The number of serial elements in each element, which is used as an
+        estimate of the time taken to unserialize it
+    """
+    names = set(unserializer.keys())
+    dependencies = {}
+    sizes = {}
+    for name in names:
+        serial_elem = unserializer._doc_elems[name][0]
+        strings = set()
+        sizes[name] = _collect_strings(unserializer, serial_elem, strings)
+        strings.discard(name)
+        dependencies[name] = strings & names
+    return dependencies, sizes
+
+
+def _collect_strings(unserializer, serial_elem, strings):
+    """
+    Adds the string attributes and bodies of the serial element and its
+    descendants to the set and returns the number of serial elements
+    """
+    count = 1
+    for key in unserializer.get_attr_keys(serial_elem):
+        value = unserializer.get_attr(serial_elem, key)
+        if isinstance(value, basestring):
+            strings.add(value)
+    body = unserializer.get_body(serial_elem)
+    if isinstance(body, basestring):
+        strings.add(body.strip())
+    for _, child in unserializer.get_all_children(serial_elem):
+        count += _collect_strings(unserializer, child, strings)
+    return count
+
+
+def _divide_elements(unserializer, workers):
+    """
+    Groups the elements into the connected components of their dependency
+    graph and divides the components into (at most) `workers` shares of
+    roughly equal size
+    """
+    dependencies, sizes = element_dependencies(unserializer)
+    shared = _shared_elements(unserializer)
+    dependencies = dict((n, d - shared) for n, d in dependencies.items()
+                        if n not in shared)
+    # Find the connected components with a union-find
+    parents = dict((n, n) for n in dependencies)
+
+    def find(name):
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+        return name
+
+    for name, deps in dependencies.items():
+        for dep in deps:
+            parents[find(name)] = find(dep)
+    components = {}
+    for name in sorted(dependencies):
+        components.setdefault(find(name), []).append(name)
+    # Assign the largest components first to the smallest share
+    shares = [[] for _ in range(min(workers, len(components)))]
+    share_sizes = [0] * len(shares)
+    for component in sorted(components.values(),
+                            key=lambda c: (-sum(sizes[n] for n in c), c)):
+        i = share_sizes.index(min(share_sizes))
+        shares[i].extend(component)
+        share_sizes[i] += sum(sizes[n] for n in component)
+    return shares
+
+
+def _shared_elements(unserializer):
+    """
+    The names of the units and dimensions of the document
+    """
+    return set(n for n, (_, cls) in unserializer._doc_elems.items()
+               if cls is not None and issubclass(cls, (Unit, Dimension)))
+
+
+def _unserialize_share(url, names, kwargs):
+    """
+    Unserializes the named elements of the document in a worker process and
+    returns them pickled
+    """
+    from nineml.serialization import format_to_unserializer, format_from_url
+    Unserializer = format_to_unserializer[format_from_url(url)]
+    with Unserializer.open_file(url) as f:
+        unserializer = Unserializer(root=f, url=url, **kwargs)
+    document = unserializer.document
+    for name in names:
+        document[name]
+    # Return the named elements along with any nested document-level
+    # objects that were added to the document while they were loaded
+    doc_names = set(unserializer.keys())
+    elements = [o for n, o in dict.items(document)
+                if n in names or n not in doc_names]
+    buff = BytesIO()
+    _SharePickler(buff, document, set(names), doc_names).dump(elements)
+    return buff.getvalue()
+
+
+def _merge(unserializer, result):
+    """
+    Unpickles the elements unserialized by a worker and adds them to the
+    document of the unserializer
+    """
+    document = unserializer.document
+    for element in _ShareUnpickler(BytesIO(result), document).load():
+        if element.name not in dict.keys(document):
+            dict.__setitem__(document, element.name, element)
+            if element.name in unserializer._doc_elems:
+                unserializer._loaded_elems.append(element.name)
+
+
+class _SharePickler(pickle.Pickler):
+    """
+    Pickles the elements unserialized by a worker, pickling references to the
+    document, other documents and elements that aren't in the share of the
+    worker by name
+    """
+
+    def __init__(self, file, document, names,  # @ReservedAssignment
+                 doc_names):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._document = document
+        self._names = names
+        self._doc_names = doc_names
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Document):
+            if obj is self._document:
+                return ('document',)
+            elif obj.url is not None:
+                return ('url', obj.url)
+        elif isinstance(obj, DocumentLevelObject) and obj.document is not None:
+            if obj.document is self._document:
+                if (obj.name in self._doc_names and
+                        obj.name not in self._names):
+                    return ('element', None, obj.name)
+            elif obj.document.url is not None:
+                return ('element', obj.document.url, obj.name)
+        return None
+
+
+class _ShareUnpickler(pickle.Unpickler):
+    """
+    Unpickles the elements pickled by `_SharePickler`, resolving the
+    references to the merged document, other documents and elements
+    """
+
+    def __init__(self, file, document):  # @ReservedAssignment
+        pickle.Unpickler.__init__(self, file)
+        self._document = document
+
+    def persistent_load(self, pid):
+        if pid[0] == 'document':
+            return self._document
+        elif pid[0] == 'url':
+            return nineml.read(pid[1])
+        elif pid[0] == 'element':
+            _, url, name = pid
+            if url is None:
+                return self._document[name]
+            return nineml.read(url)[name]
+        raise pickle.UnpicklingError(
+            "Unrecognised persistent id {}".format(pid))
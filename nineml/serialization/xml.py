@@ -1,4 +1,7 @@
+import os.path
 import re
+from xml.parsers import expat
+from past.builtins import basestring
 from future.utils import native_str_to_bytes, bytes_to_native_str
 from lxml import etree
 from lxml.builder import ElementMaker
@@ -6,7 +9,7 @@ from nineml.document import Document
 from nineml.exceptions import (
     NineMLSerializationError, NineMLMissingSerializationError)
 from nineml.serialization.base import BaseSerializer, BaseUnserializer
-from nineml.exceptions import NineMLNameError
+from nineml.exceptions import NineMLNameError, NineMLUsageError
 from . import DEFAULT_VERSION
 
 # Extracts the xmlns from an lxml element tag
@@ -21,6 +24,16 @@ def strip_xmlns(tag_name):
     return xmlns_re.match(tag_name).group(2)
 
 
+def expat_to_lxml_name(name):
+    # Converts a namespaced name returned by an expat parser with ' ' as the
+    # namespace separator to lxml's '{namespace}name' form
+    try:
+        namespace, name = name.split(' ')
+    except ValueError:
+        return name
+    return '{{{}}}{}'.format(namespace, name)
+
+
 def value_str(value):
     # Ensure all decimal places are preserved for floats
     return repr(value) if isinstance(value, float) else str(value)
@@ -74,12 +87,31 @@ class XMLSerializer(BaseSerializer):
 
 
 class XMLUnserializer(BaseUnserializer):
-    "Unserializer class for the XML format"
+    """
+    Unserializer class for the XML format
+
+    Parameters
+    ----------
+    streaming : bool
+        Whether to index the document-level elements of the file on a single
+        pass with a streaming parser instead of parsing the whole file. The
+        subtree of each element is then only read from the file and parsed
+        when the element is loaded (e.g. via `Document.__getitem__`) and is
+        discarded afterwards, so the memory required to load elements from
+        large documents is bounded by the size of the largest element. Only
+        supported for files on the local file system.
+    """
 
     supports_bodies = True
+    supports_streaming = True
+
+    # The number of bytes read from the file at a time when indexing it
+    STREAM_CHUNK_SIZE = 2 ** 20
 
     def __init__(self, root, version=None,  # @ReservedAssignment @IgnorePep8
-                 url=None, document=None, **kwargs):
+                 url=None, document=None, streaming=False, **kwargs):
+        self._streaming = streaming
+        self._streamed = None
         super(XMLUnserializer, self).__init__(
             root, version=version, url=url, document=document, **kwargs)
         if self.root is not None:
@@ -105,6 +137,11 @@ class XMLUnserializer(BaseUnserializer):
                 if n == nineml_type)
 
     def get_all_children(self, parent, **options):  # @UnusedVariable
+        if self._streamed is not None:
+            if parent is self.root:
+                return ((strip_xmlns(e.tag), e) for e in self._streamed)
+            elif isinstance(parent, StreamedElement):
+                parent = parent.parse()
         return ((strip_xmlns(e.tag), e) for e in parent.getchildren()
                 if not isinstance(e, etree._Comment))
 
@@ -128,7 +165,22 @@ class XMLUnserializer(BaseUnserializer):
     def get_namespace(self, serial_elem, **options):  # @UnusedVariable
         return extract_xmlns(serial_elem.tag)
 
+    def visit(self, serial_elem, nineml_cls, **options):
+        if isinstance(serial_elem, StreamedElement):
+            # Parse the subtree of the streamed document-level element and
+            # clear it once it has been unserialized
+            serial_elem = serial_elem.parse()
+            try:
+                return super(XMLUnserializer, self).visit(
+                    serial_elem, nineml_cls, **options)
+            finally:
+                serial_elem.clear()
+        return super(XMLUnserializer, self).visit(serial_elem, nineml_cls,
+                                                  **options)
+
     def from_file(self, file):  # @ReservedAssignment
+        if self._streaming:
+            return self._index_file(file)
         try:
             xml = etree.parse(file)
         except (etree.LxmlError, IOError) as e:
@@ -150,3 +202,163 @@ class XMLUnserializer(BaseUnserializer):
 
     def from_elem(self, serial_elem, **options):  # @UnusedVariable
         return serial_elem
+
+    def _index_file(self, file):  # @ReservedAssignment
+        """
+        Records the tag, attributes and byte range of each document-level
+        element in the file on a single pass of a streaming parser and
+        returns a childless copy of the root element
+        """
+        try:
+            path = file.name
+        except AttributeError:
+            path = None
+        if not isinstance(path, basestring) or not os.path.isfile(path):
+            raise NineMLUsageError(
+                "Streaming is only supported for files on the local file "
+                "system ('{}')".format(getattr(file, 'url', path)))
+        index = _XMLFileIndex(path)
+        with open(path, 'rb') as f:
+            try:
+                index.build(f, self.STREAM_CHUNK_SIZE)
+            except expat.ExpatError as e:
+                raise NineMLSerializationError(
+                    "Could not read file path '{}': \n{}".format(path, e))
+        self._streamed = index.elements
+        return etree.Element(index.root_tag, attrib=index.root_attrib,
+                             nsmap=index.nsmap)
+
+
+class StreamedElement(object):
+    """
+    Stand-in for a document-level element of a streamed XML file, which holds
+    the tag and attributes of the element and parses its subtree from the
+    file on demand
+
+    Parameters
+    ----------
+    tag : str
+        The tag of the element in '{namespace}name' form
+    attrib : dict(str, str)
+        The attributes of the element
+    start : int
+        The offset of the start of the element in the file in bytes
+    index : _XMLFileIndex
+        The index of the file the element is in
+    """
+
+    def __init__(self, tag, attrib, start, index):
+        self.tag = tag
+        self.attrib = attrib
+        self.start = start
+        self.end = None
+        self._index = index
+
+    def __repr__(self):
+        return "{}('{}', start={}, end={})".format(
+            self.__class__.__name__, self.tag, self.start, self.end)
+
+    def parse(self):
+        """
+        Reads the element from the file and parses its subtree
+
+        Returns
+        -------
+        elem : lxml.etree._Element
+            The parsed element
+        """
+        return self._index.parse(self.start, self.end)
+
+
+class _XMLFileIndex(object):
+    """
+    Index of the byte ranges of the document-level elements of an XML file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.root_tag = None
+        self.root_attrib = {}
+        self.nsmap = {}
+        self.encoding = None
+        self.elements = []
+        self._depth = 0
+        self._parser = None
+
+    def build(self, file, chunk_size):  # @ReservedAssignment
+        parser = self._parser = expat.ParserCreate(namespace_separator=' ')
+        parser.XmlDeclHandler = self._xml_decl
+        parser.StartNamespaceDeclHandler = self._start_namespace_decl
+        parser.StartElementHandler = self._start_element
+        parser.EndElementHandler = self._end_element
+        try:
+            while True:
+                chunk = file.read(chunk_size)
+                parser.Parse(chunk, not chunk)
+                if not chunk:
+                    break
+        finally:
+            self._parser = None
+
+    def parse(self, start, end):
+        """
+        Parses the element in the given byte range of the file, wrapping it
+        in an element that declares the namespaces of the root element so
+        that the element can be parsed on its own
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            fragment = f.read(end - start)
+        # Escape any quotes in the namespace URIs
+        nsattrs = ''.join(
+            ' {}="{}"'.format('xmlns' + (':' + p if p else ''),
+                              ns.replace('"', '&quot;'))
+            for p, ns in self.nsmap.items())
+        wrapper = '<wrapper{}>'.format(nsattrs).encode(
+            self.encoding or 'utf-8')
+        parser = etree.XMLParser(encoding=self.encoding, huge_tree=True)
+        try:
+            wrapped = etree.fromstring(
+                wrapper + fragment + '</wrapper>'.encode(
+                    self.encoding or 'utf-8'), parser)
+        except etree.LxmlError as e:
+            raise NineMLSerializationError(
+                "Could not parse element at bytes {}-{} of file path '{}': "
+                "\n{}".format(start, end, self.path, e))
+        # Skip any comments or processing instructions preceding the element
+        elem = next(e for e in wrapped if isinstance(e.tag, basestring))
+        wrapped.remove(elem)
+        return elem
+
+    def _xml_decl(self, version, encoding, standalone):  # @UnusedVariable
+        self.encoding = encoding
+
+    def _start_namespace_decl(self, prefix, uri):
+        if self._depth == 0:
+            self.nsmap[prefix] = uri
+
+    def _start_element(self, name, attrs):
+        offset = self._parser.CurrentByteIndex
+        if self._depth == 1:
+            self._end_previous(offset)
+            self.elements.append(StreamedElement(
+                expat_to_lxml_name(name),
+                dict((expat_to_lxml_name(k), v) for k, v in attrs.items()),
+                offset, self))
+        elif self._depth == 0:
+            self.root_tag = expat_to_lxml_name(name)
+            self.root_attrib = dict(
+                (expat_to_lxml_name(k), v) for k, v in attrs.items())
+        self._depth += 1
+
+    def _end_element(self, name):  # @UnusedVariable
+        self._depth -= 1
+        if self._depth == 0:
+            self._end_previous(self._parser.CurrentByteIndex)
+
+    def _end_previous(self, offset):
+        # The end of each element is taken to be the start of the next
+        # document-level element (or the closing tag of the root), as the
+        # offset of the end of an empty element isn't reported by expat
+        if self.elements and self.elements[-1].end is None:
+            self.elements[-1].end = offset
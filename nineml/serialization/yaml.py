@@ -27,6 +27,10 @@ class YAMLSerializer(DictSerializer):
     A Serializer class that serializes to YAML
     """
 
+    # Arrays are stored as base64 strings, which are much more compact than
+    # lists of numbers in text
+    array_encoding = 'base64'
+
     def to_file(self, serial_elem, file, **options):
         yaml.dump(self._prepare_dict(serial_elem, **options), stream=file,
                   Dumper=Dumper)
@@ -0,0 +1,197 @@
+"""
+Sharing of the array values of NineML objects between processes via
+`multiprocessing.shared_memory`, so that a document handed to a pool of
+worker processes holds a single copy of its arrays on each node instead of
+one copy per process.
+
+The arrays are moved into a shared memory block with `share_arrays` (or
+`Document.share_arrays`), after which the array values are pickled as
+references to the block and rebuilt in the worker processes as read-only
+views onto it (see `attach`).
+"""
+import numpy
+from nineml.visitors.base import BaseVisitor
+from nineml.exceptions import NineMLUsageError
+
+
+# The byte alignment of the arrays within the shared memory blocks
+ALIGNMENT = 64
+
+# The blocks that have been attached to in the current process, mapped by
+# name
+_attached = {}
+
+
+class SharedArrays(object):
+    """
+    A block of shared memory the values of array values are stored in
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory
+        The shared memory block
+    owner : bool
+        Whether the block was created by this process (and is therefore
+        responsible for unlinking it)
+    """
+
+    def __init__(self, shm, owner=False):
+        self._shm = shm
+        self._owner = owner
+
+    def __repr__(self):
+        return "{}(name='{}', size={})".format(
+            self.__class__.__name__, self.name, self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # @UnusedVariable
+        if self._owner:
+            self.unlink()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def size(self):
+        return self._shm.size
+
+    @property
+    def owner(self):
+        return self._owner
+
+    def view(self, offset, dtype, shape):
+        """
+        A read-only array view onto the shared memory block
+
+        Parameters
+        ----------
+        offset : int
+            The offset of the array in bytes from the start of the block
+        dtype : str
+            The data type of the array
+        shape : tuple(int)
+            The shape of the array
+        """
+        array = numpy.ndarray(shape, dtype=dtype, buffer=self._shm.buf,
+                              offset=offset)
+        array.flags.writeable = False
+        return array
+
+    def unlink(self):
+        """
+        Removes the name of the shared memory block so that it is freed once
+        all processes have released their views of it. Should be called by
+        the process that created the block once the workers have attached to
+        it. The block can't be attached to by name afterwards, including from
+        this process
+        """
+        self._shm.unlink()
+        if _attached.get(self.name) is self:
+            del _attached[self.name]
+
+
+def share_arrays(nineml_objects):
+    """
+    Moves the values of all array values in the NineML objects (e.g. the
+    elements of a document) into a single shared memory block and replaces
+    them with read-only views onto the block. Values that haven't been
+    loaded from, or are memory-mapped from, external data files are left as
+    they are as they are already shared via the file.
+
+    Parameters
+    ----------
+    nineml_objects : iterable(BaseNineMLObject)
+        The objects containing the array values to share
+
+    Returns
+    -------
+    shared : SharedArrays
+        The shared memory block, which should be unlinked (e.g. by using it
+        as a context manager) once the worker processes have attached to it
+    """
+    from multiprocessing import shared_memory
+    collector = _ArrayValueCollector()
+    for nineml_obj in nineml_objects:
+        collector.visit(nineml_obj)
+    offsets = []
+    size = 0
+    for array_value in collector.array_values:
+        offsets.append(size)
+        size += -(-array_value.values.nbytes // ALIGNMENT) * ALIGNMENT
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    shared = SharedArrays(shm, owner=True)
+    _attached[shared.name] = shared
+    for array_value, offset in zip(collector.array_values, offsets):
+        values = array_value.values
+        numpy.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf,
+                      offset=offset)[...] = values
+        array_value._array = shared.view(offset, values.dtype.str,
+                                         values.shape)
+        array_value._shared = (shared.name, offset, values.dtype.str,
+                               values.shape)
+    return shared
+
+
+def attach(name):
+    """
+    Attaches to a shared memory block created by `share_arrays` (in another
+    process). Blocks are only attached to once per process.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory block
+
+    Returns
+    -------
+    shared : SharedArrays
+        The shared memory block
+    """
+    try:
+        return _attached[name]
+    except KeyError:
+        pass
+    from multiprocessing import shared_memory
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        raise NineMLUsageError(
+            "Could not attach to shared memory block '{}', which may have "
+            "been unlinked by the process that created it".format(name))
+    # The block is unlinked by the process that created it, so it shouldn't
+    # be tracked (and unlinked when this process exits) here
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except (ImportError, AttributeError):
+        pass
+    shared = _attached[name] = SharedArrays(shm)
+    return shared
+
+
+class _ArrayValueCollector(BaseVisitor):
+    """
+    Collects the (loaded) array values in a NineML object that aren't
+    already shared or memory-mapped
+    """
+
+    def __init__(self):
+        super(_ArrayValueCollector, self).__init__()
+        self.array_values = []
+        self._ids = set()
+
+    def action_arrayvalue(self, array_value, **kwargs):  # @UnusedVariable
+        # Values in external data files that haven't been loaded are left
+        # where they are, but lazily read values are read into the block
+        if (id(array_value) not in self._ids and
+                (array_value.is_loaded() or array_value.datafile is None) and
+                array_value._shared is None and
+                not isinstance(array_value.values, numpy.memmap)):
+            self._ids.add(id(array_value))
+            self.array_values.append(array_value)
+
+    def default_action(self, obj, nineml_cls, **kwargs):  # @UnusedVariable
+        pass
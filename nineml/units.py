@@ -7,6 +7,8 @@ import operator
 from sympy import Symbol
 import sympy
 import math
+import numpy
+from collections import OrderedDict
 from nineml.base import AnnotatedNineMLObject, DocumentLevelObject
 from nineml.exceptions import (
     NineMLUsageError, NineMLDimensionError, NineMLValueError,
@@ -403,6 +405,134 @@ class Unit(AnnotatedNineMLObject, DocumentLevelObject):
         return self.__rtruediv__(other)
 
 
+# The (scale, offset) factors used to convert values between pairs of units,
+# mapped by the dimensions, powers and offsets of the units (which are
+# cheaper to compare than the units themselves)
+_conversion_factors = {}
+
+
+def conversion_factors(from_units, to_units):
+    """
+    Returns the scale and offset to convert values from one unit to another
+    (i.e. `to_value = from_value * scale + offset`), which are cached for
+    each pair of units
+
+    Parameters
+    ----------
+    from_units : Unit
+        The units to convert from
+    to_units : Unit
+        The units to convert to (must have the same dimension)
+
+    Returns
+    -------
+    scale : int | float
+        The factor to multiply the value by
+    offset : float
+        The offset to add to the scaled value
+    """
+    key = (from_units.dimension._dims, from_units.power, from_units.offset,
+           to_units.dimension._dims, to_units.power, to_units.offset)
+    try:
+        return _conversion_factors[key]
+    except KeyError:
+        pass
+    if from_units.dimension._dims != to_units.dimension._dims:
+        raise NineMLDimensionError(
+            "Can't convert quantity dimension from '{}' to '{}'"
+            .format(from_units.dimension, to_units.dimension))
+    scale = 10 ** (from_units.power - to_units.power)
+    offset = (from_units.offset - to_units.offset) * 10.0 ** -to_units.power
+    factors = _conversion_factors[key] = (scale, offset)
+    return factors
+
+
+def convert_value(value, scale, offset=0.0):
+    """
+    Scales and offsets a value (e.g. by the factors returned by
+    `conversion_factors`). Array values are converted in a single NumPy
+    operation and values that don't need to be converted are returned as is
+    (as values are immutable).
+
+    Parameters
+    ----------
+    value : SingleValue | ArrayValue | RandomDistributionValue
+        The value to convert
+    scale : int | float
+        The factor to multiply the value by
+    offset : float
+        The offset to add to the scaled value
+
+    Returns
+    -------
+    converted : SingleValue | ArrayValue | RandomDistributionValue
+        The converted value
+    """
+    if scale == 1 and offset == 0:
+        return value
+    if value.is_array():
+        array = numpy.multiply(value.values, scale)
+        if offset:
+            array += offset
+        array.flags.writeable = False  # So it isn't copied by ArrayValue
+        return ArrayValue(array)
+    elif value.is_single():
+        return SingleValue(value.value * scale + offset)
+    raise NineMLUsageError(
+        "Cannot convert the units of random distribution value '{}'"
+        .format(value))
+
+
+def convert_properties(component, target_units):
+    """
+    Converts the properties of a component (e.g. the per-cell properties of
+    a population's cells before they are passed to a simulator) to the given
+    units in bulk
+
+    Parameters
+    ----------
+    component : Component | list(Property)
+        The component (or list of properties) to convert the properties of
+    target_units : dict(str, Unit) | list(Unit)
+        Either a mapping from the names of the properties to the units to
+        convert them to, or a list of units, in which case each property is
+        converted to the unit in the list with the same dimension. Properties
+        that aren't matched are left in their current units
+
+    Returns
+    -------
+    converted : OrderedDict(str, Quantity)
+        The converted quantities of the properties mapped by their names
+    """
+    try:
+        properties = component.properties
+    except AttributeError:
+        properties = component
+    if isinstance(target_units, dict):
+        units_of = (lambda p: target_units.get(p.name))
+    else:
+        by_dimension = {}
+        for units in target_units:
+            dims = units.dimension._dims
+            if by_dimension.get(dims, units) is not units:
+                raise NineMLUsageError(
+                    "Target units '{}' and '{}' have the same dimension"
+                    .format(by_dimension[dims], units))
+            by_dimension[dims] = units
+        units_of = (lambda p: by_dimension.get(p.units.dimension._dims))
+    converted = OrderedDict()
+    for prop in sorted(properties, key=lambda p: p.name):
+        units = units_of(prop)
+        if units is None:
+            converted[prop.name] = prop.quantity
+        else:
+            converted[prop.name] = Quantity(
+                convert_value(prop.value,
+                              *conversion_factors(prop.units, units)),
+                units)
+    return converted
+
+
 class Quantity(AnnotatedNineMLObject):
 
     """
@@ -469,6 +599,30 @@ class Quantity(AnnotatedNineMLObject):
             raise NineMLUsageError(
                 "Cannot get item from random distribution")
 
+    def sample(self, size, rng=None):
+        """
+        Draws samples from a quantity with a random distribution value (see
+        `RandomDistributionValue.sample`)
+
+        Parameters
+        ----------
+        size : int
+            The number of samples to draw
+        rng : numpy.random.Generator | int | None
+            The generator to draw the samples from, or a seed to create one
+            with `numpy.random.default_rng`
+
+        Returns
+        -------
+        samples : Quantity
+            An array quantity of the samples in the units of the quantity
+        """
+        if not self.value.is_random():
+            raise NineMLUsageError(
+                "Cannot sample from quantity with non-random value ({})"
+                .format(self))
+        return Quantity(self.value.sample(size, rng=rng), self.units)
+
     def set_units(self, units):
         if units.dimension != self.units.dimension:
             raise NineMLDimensionError(
@@ -482,11 +636,8 @@ class Quantity(AnnotatedNineMLObject):
         Returns a float value in terms of the given units (dimensions must be
         equivalent)
         """
-        if units.dimension != self.units.dimension:
-            raise NineMLDimensionError(
-                "Can't change convert quantity dimension from '{}' to '{}'"
-                .format(self.units.dimension, units.dimension))
-        return self.value * 10 ** (self.units.power - units.power)
+        return convert_value(self.value,
+                             *conversion_factors(self.units, units))
 
     def __repr__(self):
         return '{} * {}'.format(
@@ -577,12 +728,7 @@ class Quantity(AnnotatedNineMLObject):
 
     def _scaled_value(self, qty):
         try:
-            if qty.units.dimension != self.units.dimension:
-                raise NineMLDimensionError(
-                    "Cannot scale value as dimensions do not match ('{}' and "
-                    "'{}')".format(self.units.dimension.name,
-                                   qty.units.dimension.name))
-            return qty.value * 10 ** (self.units.power - qty.units.power)
+            qty_units = qty.units
         except AttributeError:
             if self.units == unitless:
                 return float(qty.value)
@@ -590,6 +736,16 @@ class Quantity(AnnotatedNineMLObject):
                 raise NineMLDimensionError(
                     "Can only add/subtract numbers from dimensionless "
                     "quantities")
+        if qty_units.dimension._dims != self.units.dimension._dims:
+            raise NineMLDimensionError(
+                "Cannot scale value as dimensions do not match ('{}' and "
+                "'{}')".format(self.units.dimension.name,
+                               qty_units.dimension.name))
+        # Only the scale of the conversion is applied as the offsets of the
+        # units only apply to absolute conversions (see `in_units`), e.g.
+        # 20 degC + 1 K = 21 degC
+        scale, _ = conversion_factors(qty_units, self.units)
+        return convert_value(qty.value, scale)
 
     @classmethod
     def parse(cls, qty):
@@ -6,7 +6,9 @@ from .randomdistribution import RandomDistributionProperties
 from .population import Population
 from .dynamics import Initial, DynamicsProperties
 from .connectionrule import (
-    ConnectionRuleProperties, Connectivity, InverseConnectivity)
+    ConnectionRuleProperties, Connectivity, InverseConnectivity,
+    SparseConnectivity, DegreeStats)
+from .connectivity_cache import ConnectivityCache
 from .multi import MultiDynamics, MultiDynamicsProperties, append_namespace
 from .port_connections import (
     AnalogPortConnection, EventPortConnection)
@@ -93,6 +93,13 @@ class Property(BaseULObject):
     def units(self):
         return self.quantity.units
 
+    def sample(self, size, rng=None):
+        """
+        Draws samples from a property with a random distribution value (see
+        `Quantity.sample`)
+        """
+        return self.quantity.sample(size, rng=rng)
+
     def __repr__(self):
         units = self.units.name
         if u"µ" in units:
@@ -43,6 +43,23 @@ class ComponentArray(BaseULObject, DocumentLevelObject):
     def component_class(self):
         return self.dynamics_properties.component_class
 
+    def property_table(self, rng=None, as_dict=False):
+        """
+        The properties and initial values of each of the components in SI
+        units (see `DynamicsProperties.property_table`)
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator | int | None
+            The generator to sample random distribution values from, or a
+            seed to create one with `numpy.random.default_rng`
+        as_dict : bool
+            Whether to return a dictionary of column arrays instead of a
+            structured array
+        """
+        return self.dynamics_properties.property_table(
+            self.size, rng=rng, as_dict=as_dict)
+
     def serialize_node(self, node, **options):  # @UnusedVariable
         node.attr('name', self.name, **options)
         node.attr('Size', self.size, in_body=True, **options)
@@ -1,5 +1,5 @@
-from builtins import zip
 from abc import ABCMeta, abstractmethod
+import numpy
 from . import BaseULObject
 from nineml.abstraction.connectionrule import (
     explicit_connection_rule, one_to_one_connection_rule)
@@ -81,12 +81,14 @@ class BaseConnectionGroup(
     def delay(self):
         return self._delay
 
-    @property
-    def connections(self):
-        return self._connectivity.connections()
+    def connections(self, source_indices=None, destination_indices=None):
+        return self._connectivity.connections(
+            source_indices=source_indices,
+            destination_indices=destination_indices)
 
     @classmethod
-    def from_port_connection(self, port_conn, projection, component_arrays):
+    def from_port_connection(self, port_conn, projection, component_arrays,
+                             connection_arrays=None):
         if isinstance(port_conn, EventPortConnection):
             cls = AnalogConnectionGroup
         else:
@@ -101,21 +103,24 @@ class BaseConnectionGroup(
                 name=name + '_connectivity',
                 definition=one_to_one_connection_rule)
         else:
+            # Work with the connection index arrays instead of lists of
+            # connection tuples to keep the memory usage down for large
+            # projections
+            if connection_arrays is None:
+                connection_arrays = projection.connectivity.connection_arrays()
+            src, dest = connection_arrays
             if (port_conn.sender_role == 'pre' and
                     port_conn.receiver_role == 'post'):
-                source_inds, dest_inds = list(zip(*projection.connections()))
+                source_inds, dest_inds = src, dest
             elif (port_conn.sender_role == 'post' and
                   port_conn.receiver_role == 'pre'):
-                source_inds, dest_inds = list(zip(*(
-                    (d, s) for s, d in projection.connections())))
+                source_inds, dest_inds = dest, src
             elif port_conn.sender_role == 'pre':
-                source_inds, dest_inds = list(zip(*(
-                    (s, i) for i, (s, _) in enumerate(
-                        sorted(projection.connections())))))
+                source_inds = numpy.sort(src, kind='stable')
+                dest_inds = numpy.arange(len(src))
             elif port_conn.receiver_role == 'post':
-                source_inds, dest_inds = list(zip(*(
-                    (i, d) for i, (_, d) in enumerate(
-                        sorted(projection.connections())))))
+                source_inds = numpy.arange(len(dest))
+                dest_inds = dest[numpy.lexsort((dest, src))]
             else:
                 assert False
             conn_props = ConnectionRuleProperties(
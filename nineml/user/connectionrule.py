@@ -1,17 +1,69 @@
 from builtins import zip
 from builtins import range
-import sys
+import collections
 from itertools import chain, product
 import math
+import hashlib
 from abc import ABCMeta, abstractmethod
 from itertools import repeat
-from random import Random, randint
+from random import Random
+import numpy
 from nineml.base import BaseNineMLObject
 from nineml.exceptions import NineMLUsageError, NineMLUsageError
 from nineml.user.component import Component
+from nineml.utils.seeding import new_seed
+from nineml.utils.pickling import reduce_with_arrays
 from future.utils import with_metaclass
 
 
+# Constants of the SplitMix64 generator, which is used as a counter-based
+# generator so that any of the random numbers drawn to generate the
+# connections can be regenerated independently of the others
+_SPLITMIX64_GAMMA = numpy.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX64_MULT1 = numpy.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX64_MULT2 = numpy.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(z):
+    """
+    The SplitMix64 mixing function applied element-wise to uint64 values
+    """
+    z = numpy.array(z, dtype=numpy.uint64)  # copy so it can be mixed inplace
+    with numpy.errstate(over='ignore'):
+        z ^= z >> 30
+        z *= _SPLITMIX64_MULT1
+        z ^= z >> 27
+        z *= _SPLITMIX64_MULT2
+    z ^= z >> 31
+    return z
+
+
+def _stream_uniforms(key, rows, counters):
+    """
+    Returns uniform random numbers in [0, 1) for each (row, counter) pair,
+    where each row is an independent SplitMix64 stream seeded from `key`
+    and `counters` are the positions of the numbers within the streams.
+
+    Parameters
+    ----------
+    key : numpy.uint64
+        The key the streams are derived from (i.e. the hashed random seed)
+    rows : numpy.ndarray(int)
+        The indices of the streams
+    counters : numpy.ndarray(int)
+        The positions in the streams (broadcast against `rows`)
+    """
+    rows = numpy.asarray(rows).astype(numpy.uint64)
+    counters = numpy.asarray(counters).astype(numpy.uint64)
+    with numpy.errstate(over='ignore'):
+        row_keys = _splitmix64(key + (rows + 1) * _SPLITMIX64_GAMMA)
+        z = _splitmix64(row_keys + (counters + 1) * _SPLITMIX64_GAMMA)
+    z >>= 11
+    uniforms = z.astype(numpy.float64)
+    uniforms *= 2.0 ** -53
+    return uniforms
+
+
 class ConnectionRuleProperties(Component):
     """
     docstring needed
@@ -30,6 +82,65 @@ class ConnectionRuleProperties(Component):
         return self.component_class.lib_type
 
 
+class DegreeStats(collections.namedtuple('DegreeStats',
+                                         'in_degrees out_degrees')):
+    """
+    The in-degree and out-degree of every destination and source of a
+    connectivity (see `BaseConnectivity.degree_stats`)
+
+    Parameters
+    ----------
+    in_degrees : numpy.ndarray(int)
+        The number of connections to each destination
+    out_degrees : numpy.ndarray(int)
+        The number of connections from each source
+    """
+
+    @property
+    def num_connections(self):
+        return int(self.in_degrees.sum())
+
+    @property
+    def max_in_degree(self):
+        return int(self.in_degrees.max()) if len(self.in_degrees) else 0
+
+    @property
+    def max_out_degree(self):
+        return int(self.out_degrees.max()) if len(self.out_degrees) else 0
+
+    @property
+    def mean_in_degree(self):
+        return (float(self.in_degrees.mean()) if len(self.in_degrees)
+                else 0.0)
+
+    @property
+    def mean_out_degree(self):
+        return (float(self.out_degrees.mean()) if len(self.out_degrees)
+                else 0.0)
+
+    def in_degree_distribution(self):
+        """
+        The number of destinations with each in-degree (indexed by degree)
+        """
+        return numpy.bincount(self.in_degrees)
+
+    def out_degree_distribution(self):
+        """
+        The number of sources with each out-degree (indexed by degree)
+        """
+        return numpy.bincount(self.out_degrees)
+
+    def summary(self):
+        """
+        The scalar statistics in a dictionary
+        """
+        return {'num_connections': self.num_connections,
+                'max_in_degree': self.max_in_degree,
+                'max_out_degree': self.max_out_degree,
+                'mean_in_degree': self.mean_in_degree,
+                'mean_out_degree': self.mean_out_degree}
+
+
 class BaseConnectivity(with_metaclass(ABCMeta, BaseNineMLObject)):
     """
     An abstract base classes for instances of connectivity
@@ -39,6 +150,11 @@ class BaseConnectivity(with_metaclass(ABCMeta, BaseNineMLObject)):
     nineml_attr = ('source_size', 'destination_size')
     nineml_child = {'rule_properties': ConnectionRuleProperties}
 
+    # The default maximum number of candidate pairs in each block of
+    # connections generated by `iter_blocks` (bounds the size of the
+    # temporary arrays used to generate the connections)
+    batch_size = 2 ** 22
+
     def __init__(self, rule_properties, source_size,
                  destination_size, **kwargs):  # @UnusedVariable
         if (rule_properties.lib_type == 'OneToOne' and
@@ -92,9 +208,202 @@ class BaseConnectivity(with_metaclass(ABCMeta, BaseNineMLObject)):
                         self.source_size, self.destination_size))
 
     @abstractmethod
-    def connections(self):
+    def connections(self, source_indices=None, destination_indices=None):
         pass
 
+    def connection_arrays(self, dtype=numpy.int64, source_indices=None,
+                          destination_indices=None):
+        """
+        Returns the source and destination indices of every connection as a
+        pair of NumPy arrays. Derived classes should override this method
+        with a vectorized implementation where possible.
+
+        Parameters
+        ----------
+        dtype : numpy.dtype
+            The integer type of the returned index arrays
+        source_indices : array-like(int) | None
+            If provided, only the connections from these source indices are
+            returned
+        destination_indices : array-like(int) | None
+            If provided, only the connections to these destination indices
+            are returned
+
+        Returns
+        -------
+        source_indices : numpy.ndarray
+            The source index of each connection
+        destination_indices : numpy.ndarray
+            The destination index of each connection
+        """
+        conns = numpy.fromiter(chain.from_iterable(self.connections()),
+                               dtype=dtype)
+        return self._filter_arrays(
+            conns[0::2].copy(), conns[1::2].copy(),
+            self._check_indices(source_indices, self.source_size, 'source'),
+            self._check_indices(destination_indices, self.destination_size,
+                                'destination'))
+
+    def num_connections(self):
+        """
+        The total number of connections (counted a block at a time)
+        """
+        return sum(len(src) for src, _ in self.iter_blocks())
+
+    def degree_stats(self, block_size=None):
+        """
+        Computes the in-degree of every destination and the out-degree of
+        every source. The degrees are determined analytically where the
+        connection rule allows it and otherwise accumulated one block of
+        connections at a time (see `iter_blocks`), so the full list of
+        connections is never held in memory.
+
+        Parameters
+        ----------
+        block_size : int | None
+            The maximum number of candidate pairs in each block the degrees
+            are accumulated over
+
+        Returns
+        -------
+        stats : DegreeStats
+            The in-degrees and out-degrees, from which the total number of
+            connections, the maximum fan-in, etc... can be derived
+        """
+        in_degrees, out_degrees = self._analytic_degrees()
+        if in_degrees is None or out_degrees is None:
+            counted_in = (
+                numpy.zeros(self.destination_size, dtype=numpy.int64)
+                if in_degrees is None else None)
+            counted_out = (numpy.zeros(self.source_size, dtype=numpy.int64)
+                           if out_degrees is None else None)
+            for src, dest in self.iter_blocks(block_size=block_size):
+                if counted_in is not None:
+                    counted_in += numpy.bincount(
+                        dest, minlength=self.destination_size)
+                if counted_out is not None:
+                    counted_out += numpy.bincount(
+                        src, minlength=self.source_size)
+            if in_degrees is None:
+                in_degrees = counted_in
+            if out_degrees is None:
+                out_degrees = counted_out
+        return DegreeStats(in_degrees, out_degrees)
+
+    def _analytic_degrees(self):
+        """
+        Returns the in-degrees and out-degrees of the connectivity if they
+        can be determined without generating the connections (None
+        otherwise)
+        """
+        return None, None
+
+    def iter_blocks(self, block_size=None, dtype=numpy.int64,
+                    source_indices=None, destination_indices=None):
+        """
+        Iterates over the connections in blocks of NumPy arrays. Derived
+        classes should override this method with an implementation that
+        generates each block independently where possible, as this default
+        implementation generates all the connections up front.
+
+        Parameters
+        ----------
+        block_size : int | None
+            The maximum number of connections in each block. If None
+            `batch_size` is used
+        dtype : numpy.dtype
+            The integer type of the returned index arrays
+        source_indices : array-like(int) | None
+            If provided, only the connections from these source indices are
+            returned
+        destination_indices : array-like(int) | None
+            If provided, only the connections to these destination indices
+            are returned
+
+        Yields
+        ------
+        source_indices : numpy.ndarray
+            The source index of each connection in the block
+        destination_indices : numpy.ndarray
+            The destination index of each connection in the block
+        """
+        block_size = self._check_block_size(block_size)
+        src, dest = self.connection_arrays(
+            dtype=dtype, source_indices=source_indices,
+            destination_indices=destination_indices)
+        for start in range(0, len(src), block_size):
+            yield (src[start:start + block_size],
+                   dest[start:start + block_size])
+
+    def num_blocks(self, block_size=None):
+        """
+        The number of blocks yielded by `iter_blocks` for the given block size
+        """
+        block_size = self._check_block_size(block_size)
+        return -(-len(self.connection_arrays()[0]) // block_size)
+
+    def block(self, index, block_size=None, dtype=numpy.int64):
+        """
+        Returns a single block of the connections yielded by `iter_blocks`
+        """
+        block_size = self._check_block_size(block_size)
+        src, dest = self.connection_arrays(dtype=dtype)
+        start = index * block_size
+        if not 0 <= start < len(src):
+            raise NineMLUsageError(
+                "Block index {} is out of range for {} with {} blocks"
+                .format(index, self, -(-len(src) // block_size)))
+        return src[start:start + block_size], dest[start:start + block_size]
+
+    @property
+    def independent_blocks(self):
+        """
+        Whether each block of connections yielded by `iter_blocks` can be
+        generated independently of the others (see `block`)
+        """
+        return False
+
+    def _check_block_size(self, block_size):
+        if block_size is None:
+            block_size = self.batch_size
+        if block_size < 1:
+            raise NineMLUsageError(
+                "Block size must be a positive integer ({} given)"
+                .format(block_size))
+        return int(block_size)
+
+    @classmethod
+    def _check_indices(cls, indices, size, name):
+        """
+        Converts the indices used to select a subset of the connections into
+        a sorted array of unique indices and checks they are in range
+        """
+        if indices is None:
+            return None
+        indices = numpy.unique(numpy.asarray(indices, dtype=numpy.int64))
+        if len(indices) and (indices[0] < 0 or indices[-1] >= size):
+            raise NineMLUsageError(
+                "{} indices must be between 0 and {} (given {}-{})"
+                .format(name.capitalize(), size - 1, indices[0],
+                        indices[-1]))
+        return indices
+
+    @classmethod
+    def _filter_arrays(cls, src, dest, sources, destinations):
+        """
+        Selects the connections from `sources` to `destinations` (if not
+        None) from the source and destination index arrays
+        """
+        if sources is not None:
+            mask = numpy.isin(src, sources)
+            src = src[mask]
+            dest = dest[mask]
+        if destinations is not None:
+            mask = numpy.isin(dest, destinations)
+            src = src[mask]
+            dest = dest[mask]
+        return src, dest
+
     @abstractmethod
     def has_been_sampled(self):
         pass
@@ -106,8 +415,29 @@ class Connectivity(BaseConnectivity):
     """
     nineml_type = '_Connectivity'
 
+    # The engines that can be used to generate the connections of random
+    # connection rules
+    engines = ('random', 'vectorized')
+
+    # The engine used by connectivities that are not passed an engine
+    # explicitly. The 'random' engine generates the same connections for a
+    # given seed as previous versions
+    default_engine = 'random'
+
+    # The methods that can be used to sample probabilistic connectivity
+    sampling_methods = ('bernoulli', 'geometric')
+
+    # The connection rules that don't draw any random numbers, which are
+    # generated with vectorized operations by both engines
+    deterministic_rules = ('AllToAll', 'OneToOne', 'Explicit')
+
+    # The ConnectivityCache used by connectivities that are not passed a
+    # cache explicitly (no cache is used if None)
+    default_cache = None
+
     def __init__(self, rule_properties, source_size,
                  destination_size, random_seed=None, rng_cls=None,
+                 engine=None, sampling='bernoulli', cache=None,
                  **kwargs):  # @UnusedVariable
         """
         Parameters
@@ -121,28 +451,140 @@ class Connectivity(BaseConnectivity):
             Size of the destination component array
         random_seed : int | None
             Seed for the random generator (if required). If None then a
-            random integer is drawn from random.randint
+            random integer is drawn (see `nineml.utils.seeding`)
         rng_cls : random generator class (i.e. random.Random) | None
-            Class for the random generator. Can be any random generator that
-            implements the 'random' method to return a float between 0 and 1
-            (e.g. numpy.Random). If not supplied then random.Random is used
+            Class for the random generator used by the 'random' engine. Can be
+            any random generator that implements the 'random' method to return
+            a float between 0 and 1 (e.g. numpy.Random). If not supplied then
+            random.Random is used
+        engine : str | None
+            The engine used to generate the connections of random connection
+            rules. Either 'random', where they are generated one candidate
+            pair at a time from a generator of `rng_cls` (the same
+            connections as previous versions), or 'vectorized', where they
+            are generated in vectorized blocks from counter-based random
+            streams derived from `random_seed` (see `iter_blocks`), which is
+            much faster for large projections and allows the blocks to be
+            generated independently (e.g. in parallel). The two engines
+            select different (but equally distributed) connections for the
+            same seed. If None `default_engine` is used
+        sampling : str
+            The method used to sample 'Probabilistic' connectivity with the
+            vectorized engine. Either 'bernoulli', where a uniform number is
+            drawn for every candidate pair, or 'geometric', where the gaps
+            between consecutive connections are drawn from a geometric
+            distribution so that the cost scales with the number of
+            connections made instead of the number of candidate pairs. The
+            two methods select different (but equally distributed)
+            connections for the same seed. Only 'bernoulli' sampling can be
+            used with the 'random' engine.
+        cache : ConnectivityCache | None
+            An on-disk cache to load the connections from if they have been
+            generated previously (and to store them in if not). If None
+            `default_cache` is used
         """
         super(Connectivity, self).__init__(
             rule_properties, source_size, destination_size)
+        if sampling not in self.sampling_methods:
+            raise NineMLUsageError(
+                "Unrecognised sampling method '{}', can be one of '{}'"
+                .format(sampling, "', '".join(self.sampling_methods)))
+        if engine is None:
+            engine = self.default_engine
+        if engine not in self.engines:
+            raise NineMLUsageError(
+                "Unrecognised connectivity engine '{}', can be one of '{}'"
+                .format(engine, "', '".join(self.engines)))
+        if engine == 'vectorized':
+            if rng_cls is not None:
+                raise NineMLUsageError(
+                    "A random generator class ({}) cannot be used with the "
+                    "'vectorized' engine".format(rng_cls))
+        else:
+            if sampling != 'bernoulli':
+                raise NineMLUsageError(
+                    "'{}' sampling requires the 'vectorized' engine ('{}' "
+                    "engine given)".format(sampling, engine))
+            if rng_cls is None:
+                rng_cls = Random
         if random_seed is None:
-            random_seed = randint(0, sys.maxsize)
+            random_seed = new_seed()
         self._seed = random_seed
-        if rng_cls is None:
-            rng_cls = Random
         self._rng_cls = rng_cls
+        self._engine = engine
+        self._sampling = sampling
+        self._cache = cache if cache is not None else self.default_cache
+        self._explicit = None
+        self._spatial_index = None
+        # The hash of the connectivity memoized by ConnectivityCache
+        self._content_hash = None
+
+    def __getstate__(self):
+        # The explicit index arrays (which share the memory of the rule
+        # properties) and the spatial index are regenerated on demand instead
+        # of being pickled
+        state = dict(self.__dict__)
+        state['_explicit'] = None
+        state['_spatial_index'] = None
+        return state
+
+    @property
+    def random_seed(self):
+        return self._seed
+
+    @property
+    def rng_cls(self):
+        return self._rng_cls
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def sampling(self):
+        return self._sampling
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def independent_blocks(self):
+        return self._vectorized
+
+    @property
+    def _vectorized(self):
+        """
+        Whether the connections are generated with vectorized operations
+        """
+        return (self._engine == 'vectorized' or
+                self.lib_type in self.deterministic_rules)
 
-    def connections(self):
+    def connections(self, source_indices=None, destination_indices=None):
         """
         Returns an iterator over all the source/destination index pairings
         with a connection.
-        `src`  -- the indices to get the connections from
-        `dest` -- the indices to get the connections to
+
+        Parameters
+        ----------
+        source_indices : array-like(int) | None
+            If provided, only the connections from these source indices are
+            returned
+        destination_indices : array-like(int) | None
+            If provided, only the connections to these destination indices
+            are returned (e.g. the indices of the destination population
+            owned by the local MPI rank). The connections are the same as
+            those returned in a serial run, but (unless the connections are
+            generated by the 'random' engine) only the requested connections
+            are generated
         """
+        if (self._vectorized or source_indices is not None or
+                destination_indices is not None):
+            return chain.from_iterable(
+                zip(src.tolist(), dest.tolist())
+                for src, dest in self.iter_blocks(
+                    source_indices=source_indices,
+                    destination_indices=destination_indices))
         if self.lib_type == 'AllToAll':
             conn = self._all_to_all()
         elif self.lib_type == 'OneToOne':
@@ -155,6 +597,8 @@ class Connectivity(BaseConnectivity):
             conn = self._random_fan_in()
         elif self.lib_type == 'RandomFanOut':
             conn = self._random_fan_out()
+        elif self.lib_type == 'DistanceDependent':
+            conn = self._distance_dependent()
         else:
             assert False
         return conn
@@ -168,9 +612,8 @@ class Connectivity(BaseConnectivity):
         return ((i, i) for i in range(self._source_size))
 
     def _explicit_connection_list(self):  # @UnusedVariable
-        return zip(
-            self._rule_properties.property('sourceIndices').value.values,
-            self._rule_properties.property('destinationIndices').value.values)
+        src, dest = self._explicit_indices
+        return zip(src.tolist(), dest.tolist())
 
     def _probabilistic_connectivity(self):  # @UnusedVariable
         # Reinitialize the connectivity generator with the same RNG so that
@@ -200,6 +643,528 @@ class Connectivity(BaseConnectivity):
                   for _ in range(N)))
             for s in range(self._source_size)))
 
+    def _distance_dependent(self):  # @UnusedVariable
+        rng = self._rng_cls(self._seed)
+        src_pos, dest_pos = self._positions
+        max_dist = self._si_value('maximumDistance')
+        for d in range(self._destination_size):
+            dists = numpy.sqrt(((src_pos - dest_pos[d]) ** 2).sum(axis=1))
+            probs = self._distance_probabilities(dists)
+            for s in range(self._source_size):
+                if dists[s] <= max_dist and rng.random() < probs[s]:
+                    yield (s, d)
+
+    def connection_arrays(self, dtype=numpy.int64, source_indices=None,
+                          destination_indices=None):
+        """
+        Returns the source and destination indices of every connection as a
+        pair of NumPy arrays, which are generated with vectorized operations
+        (see `iter_blocks`).
+
+        Parameters
+        ----------
+        dtype : numpy.dtype
+            The integer type of the returned index arrays
+        source_indices : array-like(int) | None
+            If provided, only the connections from these source indices are
+            returned
+        destination_indices : array-like(int) | None
+            If provided, only the connections to these destination indices
+            are returned
+
+        Returns
+        -------
+        source_indices : numpy.ndarray
+            The source index of each connection
+        destination_indices : numpy.ndarray
+            The destination index of each connection
+        """
+        use_cache = (self._cache is not None and source_indices is None and
+                     destination_indices is None)
+        if use_cache:
+            cached = self._cache.load(self)
+            if cached is not None:
+                return (cached[0].astype(dtype, copy=False),
+                        cached[1].astype(dtype, copy=False))
+        if not self._vectorized:
+            # Fall back to the generator implementation so that the
+            # connections are drawn from the random generator
+            src, dest = super(Connectivity, self).connection_arrays(
+                dtype=dtype, source_indices=source_indices,
+                destination_indices=destination_indices)
+        else:
+            blocks = list(self.iter_blocks(
+                dtype=dtype, source_indices=source_indices,
+                destination_indices=destination_indices))
+            if len(blocks) == 1:
+                src, dest = blocks[0]
+            else:
+                src = self._concatenate([s for s, _ in blocks], dtype=dtype)
+                dest = self._concatenate([d for _, d in blocks], dtype=dtype)
+        if use_cache:
+            self._cache.store(self, src, dest)
+        return src, dest
+
+    def num_connections(self):
+        in_degrees, _ = self._analytic_degrees()
+        if in_degrees is not None:
+            return int(in_degrees.sum())
+        if self._cache is not None:
+            cached = self._cache.load(self)
+            if cached is not None:
+                return len(cached[0])
+        return super(Connectivity, self).num_connections()
+
+    def _analytic_degrees(self):
+        S = self._source_size
+        D = self._destination_size
+        in_degrees = out_degrees = None
+        if self.lib_type == 'AllToAll':
+            in_degrees = numpy.full(D, S, dtype=numpy.int64)
+            out_degrees = numpy.full(S, D, dtype=numpy.int64)
+        elif self.lib_type == 'OneToOne':
+            in_degrees = numpy.ones(D, dtype=numpy.int64)
+            out_degrees = numpy.ones(S, dtype=numpy.int64)
+        elif self.lib_type == 'Explicit':
+            src, dest = self._explicit_indices
+            in_degrees = numpy.bincount(dest, minlength=D)
+            out_degrees = numpy.bincount(src, minlength=S)
+        elif self.lib_type == 'RandomFanIn':
+            in_degrees = numpy.full(D, self._number, dtype=numpy.int64)
+        elif self.lib_type == 'RandomFanOut':
+            out_degrees = numpy.full(S, self._number, dtype=numpy.int64)
+        if ((in_degrees is None or out_degrees is None) and
+                self._cache is not None):
+            cached = self._cache.load(self)
+            if cached is not None:
+                in_degrees = numpy.bincount(cached[1], minlength=D)
+                out_degrees = numpy.bincount(cached[0], minlength=S)
+        return in_degrees, out_degrees
+
+    def iter_blocks(self, block_size=None, dtype=numpy.int64,
+                    source_indices=None, destination_indices=None):
+        """
+        Iterates over the connections in blocks of NumPy arrays. The
+        connections are generated a block of "rows" at a time (source indices
+        for 'AllToAll', 'OneToOne' and 'RandomFanOut' rules, destination
+        indices for 'Probabilistic', 'RandomFanIn' and 'DistanceDependent'
+        rules and the entries of the index lists for 'Explicit' rules),
+        where every block spans
+        the same number of rows and contains at most `block_size` candidate
+        pairs, so the memory required to generate each block is bounded by
+        `block_size` regardless of the size of the projection.
+
+        The random connection rules draw the random numbers for each row from
+        its own counter-based stream (derived from the random seed), so any
+        block can be regenerated on its own (see `block`) and the connections
+        do not depend on the block size. For the same reason, when the
+        connections are restricted to a subset of the rows (e.g. the
+        destination indices owned by the local MPI rank for 'Probabilistic'
+        and 'RandomFanIn' rules) only the selected rows are generated, and
+        the connections are identical to those of a serial run. Note that if
+        the connections of a random rule are generated by the 'random'
+        engine they are generated in full and then split into blocks of
+        `block_size` connections.
+
+        Parameters
+        ----------
+        block_size : int | None
+            The maximum number of candidate pairs in each block. If None
+            `batch_size` is used
+        dtype : numpy.dtype
+            The integer type of the returned index arrays
+        source_indices : array-like(int) | None
+            If provided, only the connections from these source indices are
+            returned
+        destination_indices : array-like(int) | None
+            If provided, only the connections to these destination indices
+            are returned
+
+        Yields
+        ------
+        source_indices : numpy.ndarray
+            The source index of each connection in the block
+        destination_indices : numpy.ndarray
+            The destination index of each connection in the block
+        """
+        if not self._vectorized:
+            for block in super(Connectivity, self).iter_blocks(
+                    block_size=block_size, dtype=dtype,
+                    source_indices=source_indices,
+                    destination_indices=destination_indices):
+                yield block
+            return
+        sources = self._check_indices(source_indices, self._source_size,
+                                      'source')
+        destinations = self._check_indices(
+            destination_indices, self._destination_size, 'destination')
+        if sources is None and destinations is None:
+            for index in range(self.num_blocks(block_size)):
+                yield self.block(index, block_size=block_size, dtype=dtype)
+            return
+        # Only generate the rows that are selected by the indices along the
+        # row axis
+        if self._row_axis == 'source' and sources is not None:
+            rows = sources
+        elif self._row_axis == 'destination' and destinations is not None:
+            rows = destinations
+        else:
+            rows = numpy.arange(self._row_layout()[0])
+        rows_per_block = self._rows_per_block(block_size)
+        for start in range(0, len(rows), rows_per_block):
+            src, dest = self._generate_rows(
+                rows[start:start + rows_per_block], sources=sources,
+                destinations=destinations)
+            yield src.astype(dtype, copy=False), dest.astype(dtype,
+                                                             copy=False)
+
+    def num_blocks(self, block_size=None):
+        """
+        The number of blocks yielded by `iter_blocks` for the given block size
+
+        Parameters
+        ----------
+        block_size : int | None
+            The maximum number of candidate pairs in each block. If None
+            `batch_size` is used
+        """
+        if not self._vectorized:
+            return super(Connectivity, self).num_blocks(block_size)
+        num_rows = self._row_layout()[0]
+        rows_per_block = self._rows_per_block(block_size)
+        return (num_rows + rows_per_block - 1) // rows_per_block
+
+    def block(self, index, block_size=None, dtype=numpy.int64):
+        """
+        Generates a single block of the connections yielded by `iter_blocks`
+        (without generating any of the preceding blocks)
+
+        Parameters
+        ----------
+        index : int
+            The index of the block
+        block_size : int | None
+            The maximum number of candidate pairs in each block. If None
+            `batch_size` is used
+        dtype : numpy.dtype
+            The integer type of the returned index arrays
+
+        Returns
+        -------
+        source_indices : numpy.ndarray
+            The source index of each connection in the block
+        destination_indices : numpy.ndarray
+            The destination index of each connection in the block
+        """
+        if not self._vectorized:
+            return super(Connectivity, self).block(
+                index, block_size=block_size, dtype=dtype)
+        num_blocks = self.num_blocks(block_size)
+        if not 0 <= index < num_blocks:
+            raise NineMLUsageError(
+                "Block index {} is out of range for {} with {} blocks"
+                .format(index, self, num_blocks))
+        num_rows = self._row_layout()[0]
+        rows_per_block = self._rows_per_block(block_size)
+        start = index * rows_per_block
+        src, dest = self._generate_rows(
+            numpy.arange(start, min(start + rows_per_block, num_rows)))
+        return src.astype(dtype, copy=False), dest.astype(dtype, copy=False)
+
+    def _generate_rows(self, rows, sources=None, destinations=None):
+        """
+        Generates the connections in the given rows
+
+        Parameters
+        ----------
+        rows : numpy.ndarray(int)
+            Sorted indices of the rows to generate
+        sources : numpy.ndarray(int) | None
+            Sorted source indices to restrict the connections to
+        destinations : numpy.ndarray(int) | None
+            Sorted destination indices to restrict the connections to
+        """
+        if self.lib_type == 'AllToAll':
+            src, dest = self._all_to_all_rows(rows, destinations)
+        elif self.lib_type == 'OneToOne':
+            src, dest = self._one_to_one_rows(rows, destinations)
+        elif self.lib_type == 'Explicit':
+            src, dest = self._filter_arrays(
+                *self._explicit_connection_rows(rows), sources=sources,
+                destinations=destinations)
+        elif self.lib_type == 'Probabilistic':
+            if self._sampling == 'geometric':
+                src, dest = self._probabilistic_geometric_rows(rows, sources)
+            else:
+                src, dest = self._probabilistic_connectivity_rows(rows,
+                                                                  sources)
+        elif self.lib_type == 'RandomFanIn':
+            src, dest = self._random_fan_in_rows(rows, sources)
+        elif self.lib_type == 'RandomFanOut':
+            src, dest = self._random_fan_out_rows(rows, destinations)
+        elif self.lib_type == 'DistanceDependent':
+            src, dest = self._distance_dependent_rows(rows, sources)
+        else:
+            assert False
+        return src, dest
+
+    def _row_layout(self):
+        """
+        Returns the number of rows the connections are generated in and the
+        number of candidate pairs in each row
+        """
+        if self.lib_type == 'AllToAll':
+            layout = (self._source_size, self._destination_size)
+        elif self.lib_type == 'OneToOne':
+            layout = (self._source_size, 1)
+        elif self.lib_type == 'Explicit':
+            layout = (len(self._explicit_indices[0]), 1)
+        elif self.lib_type == 'Probabilistic':
+            layout = (self._destination_size, self._source_size)
+        elif self.lib_type == 'RandomFanIn':
+            layout = (self._destination_size, self._number)
+        elif self.lib_type == 'RandomFanOut':
+            layout = (self._source_size, self._number)
+        elif self.lib_type == 'DistanceDependent':
+            layout = (self._destination_size,
+                      self._spatial_grid.max_candidates)
+        else:
+            assert False
+        return layout
+
+    @property
+    def _row_axis(self):
+        """
+        Whether the rows the connections are generated in correspond to the
+        sources or destinations (or neither)
+        """
+        if self.lib_type in ('AllToAll', 'OneToOne', 'RandomFanOut'):
+            axis = 'source'
+        elif self.lib_type in ('Probabilistic', 'RandomFanIn',
+                               'DistanceDependent'):
+            axis = 'destination'
+        else:
+            axis = None
+        return axis
+
+    def _rows_per_block(self, block_size):
+        return max(1, self._check_block_size(block_size) //
+                   max(1, self._row_layout()[1]))
+
+    @property
+    def _number(self):
+        return int(self._rule_properties.property('number').value)
+
+    @property
+    def _probability(self):
+        return float(self._rule_properties.property('probability').value)
+
+    @property
+    def _stream_key(self):
+        # The type of the rule and the sizes of the populations are mixed
+        # into the hashed seed so that rules with the same seed draw from
+        # unrelated streams (e.g. the rows of 'RandomFanIn' and
+        # 'RandomFanOut' rules would otherwise select mirrored index sets)
+        rule_hash = int.from_bytes(
+            hashlib.sha256(self.lib_type.encode('utf-8')).digest()[:8],
+            'little')
+        key = _splitmix64(numpy.uint64(self._seed % 2 ** 64))
+        for value in (rule_hash, self._source_size, self._destination_size):
+            with numpy.errstate(over='ignore'):
+                key = _splitmix64(key + numpy.uint64(value % 2 ** 64) *
+                                  _SPLITMIX64_GAMMA)
+        return key
+
+    def _all_to_all_rows(self, src, destinations=None):
+        if destinations is None:
+            destinations = numpy.arange(self._destination_size)
+        return (numpy.repeat(src, len(destinations)),
+                numpy.tile(destinations, len(src)))
+
+    def _one_to_one_rows(self, indices, destinations=None):
+        assert self._source_size == self._destination_size
+        if destinations is not None:
+            indices = indices[numpy.isin(indices, destinations)]
+        return indices, indices.copy()
+
+    def _explicit_connection_rows(self, entries):
+        src, dest = self._explicit_indices
+        return src[entries], dest[entries]
+
+    @property
+    def _explicit_indices(self):
+        # Explicit indices are stored as integer arrays so this is normally
+        # a no-op, but if they were provided as floats they are converted
+        # once instead of for every block
+        if self._explicit is None:
+            self._explicit = tuple(
+                numpy.asarray(self._rule_properties.property(n).value.values,
+                              dtype=numpy.int64)
+                for n in ('sourceIndices', 'destinationIndices'))
+        return self._explicit
+
+    def _probabilistic_connectivity_rows(self, dest, sources=None):
+        # Draws a uniform number for every (selected) source of each
+        # destination row, where the position in the stream of the row is
+        # the source index
+        if sources is None:
+            sources = numpy.arange(self._source_size)
+        uniforms = _stream_uniforms(self._stream_key, dest[:, None],
+                                    sources[None, :])
+        rows, cols = numpy.nonzero(uniforms < self._probability)
+        return sources[cols], dest[rows]
+
+    def _probabilistic_geometric_rows(self, dest, sources=None):
+        # Skips ahead through the sources of each destination row by drawing
+        # the gaps between accepted sources from a geometric distribution
+        # (via its inverse CDF), which requires one draw per connection
+        # instead of one per candidate pair
+        p = self._probability
+        num_src = self._source_size
+        if p <= 0.0 or not num_src:
+            return self._concatenate([]), self._concatenate([])
+        if p >= 1.0:
+            return self._filter_arrays(
+                numpy.tile(numpy.arange(num_src), len(dest)),
+                numpy.repeat(dest, num_src), sources, None)
+        log_q = math.log1p(-p)
+        # Draw enough gaps to reach the end of each row with high probability
+        # (more are drawn for the rows that don't)
+        expected = num_src * p
+        num_draws = int(min(num_src + 1,
+                            expected + 5 * math.sqrt(expected) + 16))
+        key = self._stream_key
+        last = numpy.full(len(dest), -1, dtype=numpy.int64)
+        offset = 0
+        srcs = []
+        dests = []
+        while len(dest):
+            uniforms = _stream_uniforms(
+                key, dest[:, None],
+                numpy.arange(offset, offset + num_draws)[None, :])
+            gaps = numpy.minimum(numpy.floor(numpy.log1p(-uniforms) / log_q),
+                                 num_src).astype(numpy.int64) + 1
+            pos = last[:, None] + numpy.cumsum(gaps, axis=1)
+            valid = pos < num_src
+            rows, cols = numpy.nonzero(valid)
+            srcs.append(pos[rows, cols])
+            dests.append(dest[rows])
+            unfinished = valid[:, -1]
+            last = pos[unfinished, -1]
+            dest = dest[unfinished]
+            offset += num_draws
+        src = self._concatenate(srcs)
+        dest = self._concatenate(dests)
+        if len(srcs) > 1:
+            # Restore the destination-major order of the connections
+            order = numpy.argsort(dest, kind='stable')
+            src = src[order]
+            dest = dest[order]
+        return self._filter_arrays(src, dest, sources, None)
+
+    def _random_fan_in_rows(self, dest, sources=None):
+        N = self._number
+        uniforms = _stream_uniforms(self._stream_key, dest[:, None],
+                                    numpy.arange(N)[None, :])
+        src = numpy.minimum((uniforms * self._source_size).astype(
+            numpy.int64), self._source_size - 1)
+        return self._filter_arrays(src.ravel(), numpy.repeat(dest, N),
+                                   sources, None)
+
+    def _random_fan_out_rows(self, src, destinations=None):
+        N = self._number
+        uniforms = _stream_uniforms(self._stream_key, src[:, None],
+                                    numpy.arange(N)[None, :])
+        dest = numpy.minimum((uniforms * self._destination_size).astype(
+            numpy.int64), self._destination_size - 1)
+        return self._filter_arrays(numpy.repeat(src, N), dest.ravel(),
+                                   None, destinations)
+
+    def _distance_dependent_rows(self, dest, sources=None):
+        # Finds the candidate sources of each destination row from the
+        # spatial grid, evaluates the distance kernel on all of them at once
+        # and then accepts each candidate with a draw from the stream of the
+        # row at the position of the source index (so the connections don't
+        # depend on the layout of the grid)
+        grid = self._spatial_grid
+        src, rows = grid.candidates(dest)
+        if sources is not None:
+            selected = numpy.isin(src, sources)
+            src = src[selected]
+            rows = rows[selected]
+        src_pos, dest_pos = self._positions
+        dists = numpy.sqrt(
+            ((src_pos[src] - dest_pos[dest[rows]]) ** 2).sum(axis=1))
+        within = dists <= grid.max_distance
+        src = src[within]
+        rows = rows[within]
+        uniforms = _stream_uniforms(self._stream_key, dest[rows], src)
+        accepted = uniforms < self._distance_probabilities(dists[within])
+        return src[accepted], dest[rows[accepted]]
+
+    def _distance_probabilities(self, distances):
+        """
+        The Gaussian kernel of the 'DistanceDependent' rule, p(d) =
+        probability * exp(-d^2 / (2 * lengthScale^2))
+        """
+        length_scale = self._si_value('lengthScale')
+        return self._probability * numpy.exp(
+            -distances ** 2 / (2.0 * length_scale ** 2))
+
+    @property
+    def _positions(self):
+        """
+        The positions of the sources and destinations in SI units as (N, ndim)
+        arrays
+        """
+        grid = self._spatial_grid
+        return grid.source_positions, grid.positions
+
+    @property
+    def _spatial_grid(self):
+        if self._spatial_index is None:
+            src_pos = self._position_array('sourcePositions',
+                                           self._source_size)
+            dest_pos = self._position_array('destinationPositions',
+                                            self._destination_size)
+            if not len(src_pos):
+                src_pos = src_pos.reshape((0, dest_pos.shape[1]))
+            elif not len(dest_pos):
+                dest_pos = dest_pos.reshape((0, src_pos.shape[1]))
+            if src_pos.shape[1] != dest_pos.shape[1]:
+                raise NineMLUsageError(
+                    "Source and destination positions of {} have different "
+                    "numbers of dimensions ({} and {})".format(
+                        self, src_pos.shape[1], dest_pos.shape[1]))
+            self._spatial_index = _SpatialGrid(
+                src_pos, dest_pos, self._si_value('maximumDistance'))
+        return self._spatial_index
+
+    def _position_array(self, name, size):
+        values = numpy.ravel(self._si_value(name))
+        if not size:
+            return values.reshape((0, 1))
+        if len(values) % size:
+            raise NineMLUsageError(
+                "Length of '{}' ({}) is not a multiple of the size of the "
+                "population ({}), it should be the coordinates of each cell "
+                "concatenated together".format(name, len(values), size))
+        return values.reshape((size, len(values) // size))
+
+    def _si_value(self, name):
+        prop = self._rule_properties.property(name)
+        if prop.value.is_array():
+            value = numpy.asarray(prop.value.values, dtype=numpy.float64)
+        else:
+            value = float(prop.value)
+        return value * 10.0 ** prop.units.power
+
+    @classmethod
+    def _concatenate(cls, arrays, dtype=numpy.int64):
+        if not arrays:
+            return numpy.array([], dtype=dtype)
+        return numpy.concatenate(arrays)
+
     @property
     def key(self):
         return '{}__{}__{}__{}'.format(self.rule_properties.name,
@@ -211,37 +1176,412 @@ class Connectivity(BaseConnectivity):
         return True  # Because seed and RNG class is set at start
 
 
-class InverseConnectivity(BaseNineMLObject):
+class _SpatialGrid(object):
+    """
+    A uniform grid of cells, which are as wide as the maximum distance
+    between connected cells, that the source positions of a
+    'DistanceDependent' connectivity are binned into. The candidate sources of
+    a destination are then restricted to the sources in the grid cell the
+    destination falls in and its immediate neighbours, so the candidate pairs
+    are found in O(N log N) time (for sorting the sources into the grid)
+    instead of testing all O(N * M) pairs.
+
+    Parameters
+    ----------
+    source_positions : numpy.ndarray(float)
+        The (num_sources, ndim) positions of the sources
+    positions : numpy.ndarray(float)
+        The (num_destinations, ndim) positions of the destinations
+    max_distance : float
+        The maximum distance between connected cells
+    """
+
+    def __init__(self, source_positions, positions, max_distance):
+        if max_distance < 0.0:
+            raise NineMLUsageError(
+                "Maximum distance of distance dependent connectivity must be "
+                "positive ({} given)".format(max_distance))
+        self.source_positions = source_positions
+        self.positions = positions
+        self.max_distance = max_distance
+        ndim = positions.shape[1]
+        all_positions = numpy.vstack((source_positions, positions))
+        if len(all_positions):
+            origin = all_positions.min(axis=0)
+            extent = float((all_positions.max(axis=0) - origin).max())
+        else:
+            origin = numpy.zeros(ndim)
+            extent = 0.0
+        if 0.0 < max_distance < extent:
+            cell_size = max_distance
+        else:
+            # All the sources fall in the same cell (or the one next to it)
+            cell_size = max(extent, max_distance, 1.0)
+        # Offset the cell coordinates by one so that the neighbours of the
+        # outermost cells have non-negative coordinates
+        src_coords = self._cell_coords(source_positions, origin, cell_size)
+        self._coords = self._cell_coords(positions, origin, cell_size)
+        self._shape = tuple(
+            int(c) + 2 for c in numpy.vstack(
+                (src_coords, self._coords,
+                 numpy.zeros((1, ndim), dtype=numpy.int64))).max(axis=0))
+        src_cells = numpy.ravel_multi_index(src_coords.T, self._shape)
+        self._order = numpy.argsort(src_cells, kind='stable')
+        self._sorted_cells = src_cells[self._order]
+        self._offsets = numpy.array(list(product((-1, 0, 1), repeat=ndim)),
+                                    dtype=numpy.int64).reshape((-1, ndim))
+        self.max_candidates = (int(self._counts(numpy.arange(
+            len(positions))).sum(axis=1).max()) if len(positions) else 0)
+
+    @classmethod
+    def _cell_coords(cls, positions, origin, cell_size):
+        return numpy.floor((positions - origin) / cell_size).astype(
+            numpy.int64) + 1
+
+    def _ranges(self, dest):
+        """
+        The start and end of the sorted sources in each of the neighbouring
+        cells of the destinations
+        """
+        neighbours = (self._coords[dest][:, None, :] +
+                      self._offsets[None, :, :])
+        cells = numpy.ravel_multi_index(
+            neighbours.reshape((-1, neighbours.shape[2])).T, self._shape)
+        starts = numpy.searchsorted(self._sorted_cells, cells, side='left')
+        ends = numpy.searchsorted(self._sorted_cells, cells, side='right')
+        return (starts.reshape((len(dest), -1)),
+                ends.reshape((len(dest), -1)))
+
+    def _counts(self, dest):
+        starts, ends = self._ranges(dest)
+        return ends - starts
+
+    def candidates(self, dest):
+        """
+        Returns the candidate sources of each destination and the positions
+        of the destinations they belong to in `dest`, ordered by destination
+        and then source index
+
+        Parameters
+        ----------
+        dest : numpy.ndarray(int)
+            The indices of the destinations
+        """
+        starts, ends = self._ranges(dest)
+        starts = starts.ravel()
+        counts = ends.ravel() - starts
+        total = int(counts.sum())
+        rows = numpy.repeat(
+            numpy.repeat(numpy.arange(len(dest)), self._offsets.shape[0]),
+            counts)
+        # The position of each candidate within the range of its cell
+        within = numpy.arange(total) - numpy.repeat(
+            numpy.cumsum(counts) - counts, counts)
+        src = self._order[numpy.repeat(starts, counts) + within]
+        order = numpy.lexsort((src, rows))
+        return src[order], rows[order]
+
+
+class SparseConnectivity(BaseConnectivity):
+    """
+    A sampled connectivity stored in compressed sparse row (CSR) form, i.e.
+    the destination indices of the connections sorted by source index, with
+    the compressed sparse column (CSC) form (the source indices of the
+    connections sorted by destination index) derived from it on demand.
+    Provides O(1) access to the connections from a source or to a
+    destination without regenerating the connectivity.
+
+    Parameters
+    ----------
+    rule_properties: ConnectionRuleProperties
+        Connection rule and properties of the connectivity that was sampled
+    source_size : int
+        Size of the source component array
+    destination_size : int
+        Size of the destination component array
+    indptr : numpy.ndarray(int)
+        The offsets into `indices` of the connections from each source
+        (of length `source_size` + 1)
+    indices : numpy.ndarray(int)
+        The destination indices of the connections, sorted by source index
+    """
+    nineml_type = '_SparseConnectivity'
+
+    def __init__(self, rule_properties, source_size, destination_size,
+                 indptr, indices, **kwargs):  # @UnusedVariable
+        super(SparseConnectivity, self).__init__(
+            rule_properties, source_size, destination_size)
+        indptr = self._read_only(indptr)
+        indices = self._read_only(indices)
+        if len(indptr) != source_size + 1 or indptr[-1] != len(indices):
+            raise NineMLUsageError(
+                "CSR index pointer (length {}) does not match source size "
+                "({}) and number of connections ({})".format(
+                    len(indptr), source_size, len(indices)))
+        self._indptr = indptr
+        self._indices = indices
+        self._csc = None
+        self._digest = None
+
+    @classmethod
+    def from_connectivity(cls, connectivity):
+        """
+        Samples the connections of a connectivity object and stores them in
+        CSR form
+
+        Parameters
+        ----------
+        connectivity : BaseConnectivity
+            The connectivity to sample
+        """
+        if isinstance(connectivity, SparseConnectivity):
+            return connectivity
+        src, dest = connectivity.connection_arrays()
+        # A stable sort preserves the order the connections from each source
+        # were generated in
+        order = numpy.argsort(src, kind='stable')
+        return cls(connectivity.rule_properties, connectivity.source_size,
+                   connectivity.destination_size,
+                   cls._offsets(src, connectivity.source_size),
+                   dest[order])
+
+    def __eq__(self, other):
+        try:
+            return (super(SparseConnectivity, self).__eq__(other) and
+                    numpy.array_equal(self._indptr, other._indptr) and
+                    numpy.array_equal(self._indices, other._indices))
+        except AttributeError:
+            return False
+
+    def __reduce_ex__(self, protocol):
+        # The index arrays are pickled as PickleBuffers for protocol 5 so
+        # they can be transferred out-of-band (the CSC form is regenerated on
+        # demand)
+        state = dict(self.__dict__)
+        del state['_indptr']
+        del state['_indices']
+        state['_csc'] = None
+        return reduce_with_arrays(
+            self, protocol,
+            {'_indptr': self._indptr, '_indices': self._indices},
+            state=state)
+
+    @property
+    def csr(self):
+        """
+        The index pointer and destination indices of the connections sorted
+        by source index
+        """
+        return self._indptr, self._indices
+
+    @property
+    def csc(self):
+        """
+        The index pointer and source indices of the connections sorted by
+        destination index (generated on first access)
+        """
+        if self._csc is None:
+            src = numpy.repeat(numpy.arange(self._source_size),
+                               numpy.diff(self._indptr))
+            order = numpy.argsort(self._indices, kind='stable')
+            self._csc = (
+                self._read_only(self._offsets(self._indices,
+                                              self._destination_size)),
+                self._read_only(src[order]))
+        return self._csc
+
+    def __len__(self):
+        return len(self._indices)
+
+    def num_connections(self):
+        return len(self._indices)
+
+    def _analytic_degrees(self):
+        return (numpy.bincount(self._indices,
+                               minlength=self._destination_size),
+                numpy.diff(self._indptr))
+
+    def destinations_of(self, source_index):
+        """
+        The destination indices of the connections from a source (a view of
+        the CSR indices)
+        """
+        return self._indices[self._indptr[source_index]:
+                             self._indptr[source_index + 1]]
+
+    def sources_of(self, destination_index):
+        """
+        The source indices of the connections to a destination (a view of
+        the CSC indices)
+        """
+        indptr, indices = self.csc
+        return indices[indptr[destination_index]:
+                       indptr[destination_index + 1]]
+
+    def out_degrees(self, source_indices=None):
+        """
+        The number of connections from each source (or the given sources)
+        """
+        return self._degrees(self._indptr, source_indices)
+
+    def in_degrees(self, destination_indices=None):
+        """
+        The number of connections to each destination (or the given
+        destinations)
+        """
+        return self._degrees(self.csc[0], destination_indices)
+
+    def connections(self, source_indices=None, destination_indices=None):
+        return zip(*(a.tolist() for a in self.connection_arrays(
+            source_indices=source_indices,
+            destination_indices=destination_indices)))
+
+    def connection_arrays(self, dtype=numpy.int64, source_indices=None,
+                          destination_indices=None):
+        sources = self._check_indices(source_indices, self._source_size,
+                                      'source')
+        destinations = self._check_indices(
+            destination_indices, self._destination_size, 'destination')
+        if sources is None:
+            src = numpy.repeat(numpy.arange(self._source_size),
+                               numpy.diff(self._indptr))
+            dest = self._indices
+        else:
+            # Slice out the selected rows
+            src = numpy.repeat(sources, self.out_degrees(sources))
+            dest = self._concatenate_rows(self._indptr, self._indices,
+                                          sources)
+        src, dest = self._filter_arrays(src, dest, None, destinations)
+        return src.astype(dtype, copy=False), dest.astype(dtype, copy=False)
+
+    def to_scipy_sparse(self, format='csr',  # @ReservedAssignment
+                        dtype=numpy.float64):
+        """
+        Returns the connectivity as a scipy.sparse matrix with a row for each
+        source and a column for each destination, which shares the index
+        arrays of the connectivity. Note that multiple connections between
+        the same pair are stored as separate entries (which scipy sums when
+        the matrix is operated on).
+
+        Parameters
+        ----------
+        format : str
+            Either 'csr' or 'csc'
+        dtype : numpy.dtype
+            The type of the (unit) values of the matrix
+        """
+        try:
+            import scipy.sparse
+        except ImportError:
+            raise NineMLUsageError(
+                "scipy needs to be installed to convert {} to a sparse "
+                "matrix".format(self))
+        shape = (self._source_size, self._destination_size)
+        if format == 'csr':
+            indptr, indices = self.csr
+            matrix = scipy.sparse.csr_matrix(
+                (numpy.ones(len(indices), dtype=dtype), indices, indptr),
+                shape=shape)
+        elif format == 'csc':
+            indptr, indices = self.csc
+            matrix = scipy.sparse.csc_matrix(
+                (numpy.ones(len(indices), dtype=dtype), indices, indptr),
+                shape=shape)
+        else:
+            raise NineMLUsageError(
+                "Unrecognised sparse matrix format '{}', can be either 'csr' "
+                "or 'csc'".format(format))
+        return matrix
+
+    @property
+    def key(self):
+        return '{}__{}__{}__{}'.format(self.rule_properties.name,
+                                       self.source_size,
+                                       self.destination_size,
+                                       self.digest())
+
+    def digest(self):
+        """
+        A hash of the CSR index arrays of the connections, which is only
+        calculated once as the arrays are read-only
+
+        Returns
+        -------
+        digest : str
+            The hexadecimal SHA-256 digest
+        """
+        if self._digest is None:
+            hsh = hashlib.sha256()
+            hsh.update(numpy.ascontiguousarray(self._indptr))
+            hsh.update(numpy.ascontiguousarray(self._indices))
+            self._digest = hsh.hexdigest()
+        return self._digest
+
+    def has_been_sampled(self):
+        return True
+
+    @classmethod
+    def _offsets(cls, indices, size):
+        offsets = numpy.zeros(size + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(indices, minlength=size), out=offsets[1:])
+        return offsets
+
+    @classmethod
+    def _degrees(cls, indptr, indices):
+        if indices is None:
+            return numpy.diff(indptr)
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        return indptr[indices + 1] - indptr[indices]
+
+    @classmethod
+    def _concatenate_rows(cls, indptr, indices, rows):
+        if not len(rows):
+            return numpy.array([], dtype=indices.dtype)
+        return numpy.concatenate([indices[indptr[r]:indptr[r + 1]]
+                                  for r in rows])
+
+    @classmethod
+    def _read_only(cls, array):
+        array = numpy.asarray(array, dtype=numpy.int64)
+        if array.flags.writeable:
+            array = array.view()
+            array.flags.writeable = False
+        return array
+
+
+class InverseConnectivity(BaseConnectivity):
     """
     Inverts the connectivity so that the source and destination are effectively
     flipped. Used when mapping a projection connectivity to a reverse
     connection to from the synapse or post-synaptic cell to the pre-synaptic
-    cell
+    cell.
+
+    The connectivity is sampled into a SparseConnectivity the first time its
+    connections are accessed, which the inverse is then a transpose view of
+    (i.e. its CSR form is the CSC form of the sampled connectivity and vice
+    versa), so the connections are not regenerated on each access.
     """
     nineml_type = '_InverseConnectivity'
-    nineml_child = {'connectivity': Connectivity}
+    nineml_attr = ()
+    nineml_child = {'connectivity': BaseConnectivity}
 
-    def __init__(self, connectivity):  # @UnusedVariable
+    def __init__(self, connectivity, **kwargs):  # @UnusedVariable
         self._connectivity = connectivity
+        self._sparse = None
 
     @property
     def connectivity(self):
         return self._connectivity
 
     def __eq__(self, other):
-        return self._connectivity == other._connectivity
+        try:
+            return self._connectivity == other._connectivity
+        except AttributeError:
+            return False
 
     @property
     def rule_properties(self):
-        return self._connectivity._rule_props
-
-    @property
-    def rule(self):
-        return self.rule_properties.component_class
-
-    @property
-    def lib_type(self):
-        return self.rule_properties.lib_type
+        return self._connectivity.rule_properties
 
     @property
     def source_size(self):
@@ -251,15 +1591,67 @@ class InverseConnectivity(BaseNineMLObject):
     def destination_size(self):
         return self._connectivity.source_size
 
-    def __repr__(self):
-        return ("{}(rule={}, src_size={}, dest_size={})"
-                .format(self.__class__.__name__, self.lib_type,
-                        self.source_size, self.destination_size))
+    @property
+    def sparse(self):
+        """
+        The (sampled) SparseConnectivity the inverse is a view of
+        """
+        if self._sparse is None:
+            self._sparse = SparseConnectivity.from_connectivity(
+                self._connectivity)
+        return self._sparse
 
-    @abstractmethod
-    def connections(self):
-        return ((j, i) for i, j in self._connectivity.connections)
+    @property
+    def csr(self):
+        return self.sparse.csc
+
+    @property
+    def csc(self):
+        return self.sparse.csr
+
+    def __len__(self):
+        return len(self.sparse)
+
+    def num_connections(self):
+        return len(self.sparse)
+
+    def _analytic_degrees(self):
+        in_degrees, out_degrees = self.sparse._analytic_degrees()
+        return out_degrees, in_degrees
+
+    def destinations_of(self, source_index):
+        return self.sparse.sources_of(source_index)
+
+    def sources_of(self, destination_index):
+        return self.sparse.destinations_of(destination_index)
+
+    def out_degrees(self, source_indices=None):
+        return self.sparse.in_degrees(source_indices)
+
+    def in_degrees(self, destination_indices=None):
+        return self.sparse.out_degrees(destination_indices)
+
+    def connections(self, source_indices=None, destination_indices=None):
+        return zip(*(a.tolist() for a in self.connection_arrays(
+            source_indices=source_indices,
+            destination_indices=destination_indices)))
+
+    def connection_arrays(self, dtype=numpy.int64, source_indices=None,
+                          destination_indices=None):
+        src, dest = self.sparse.connection_arrays(
+            dtype=dtype, source_indices=destination_indices,
+            destination_indices=source_indices)
+        return dest, src
+
+    def to_scipy_sparse(self, format='csr',  # @ReservedAssignment
+                        dtype=numpy.float64):
+        return self.sparse.to_scipy_sparse(
+            format=('csc' if format == 'csr' else
+                    'csr' if format == 'csc' else format), dtype=dtype).T
+
+    @property
+    def key(self):
+        return 'inverse__' + self._connectivity.key
 
-    @abstractmethod
     def has_been_sampled(self):
-        return self._connectivity.has_been_sampled
+        return self._connectivity.has_been_sampled()
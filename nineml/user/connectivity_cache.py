@@ -0,0 +1,217 @@
+import os
+import hashlib
+import tempfile
+import numpy
+from nineml.exceptions import NineMLUsageError
+
+
+class ConnectivityCache(object):
+    """
+    An on-disk cache of the connections sampled from Connectivity objects,
+    which are stored as .npy files named by a hash of the contents of the
+    connectivity (see `content_hash`) and memory-mapped back on later runs
+    instead of being regenerated. When the total size of the cached files
+    exceeds `max_bytes` the least recently used files are evicted.
+
+    To use the cache, either pass it to the Connectivity (or Projection) via
+    the `cache` keyword argument or set it as the default cache of all
+    connectivities with `Connectivity.default_cache = ConnectivityCache(...)`
+
+    Parameters
+    ----------
+    directory : str
+        Path to the directory the cached connections are stored in (created
+        if it doesn't exist)
+    max_bytes : int | None
+        The maximum total size of the cached files. If None the size of
+        the cache is unbounded
+    """
+
+    # Incremented whenever the way the connections are generated (or
+    # stored) changes so that stale files are not reused
+    format_version = 2
+
+    suffix = '.npy'
+
+    def __init__(self, directory, max_bytes=None):
+        if max_bytes is not None and max_bytes < 0:
+            raise NineMLUsageError(
+                "Maximum size of connectivity cache must be positive ({} "
+                "given)".format(max_bytes))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._directory = directory
+        self._max_bytes = max_bytes
+
+    def __repr__(self):
+        return "{}(directory='{}', max_bytes={})".format(
+            self.__class__.__name__, self._directory, self._max_bytes)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    def content_hash(self, connectivity):
+        """
+        A hash of everything that determines the connections of the
+        connectivity, i.e. the connection rule, the names, units and values
+        of its properties, the sizes of the source and destination, the
+        random seed, the engine, the class of the random generator and the
+        sampling method. The hash is memoized by the connectivity so that the
+        values of the properties are only hashed once
+
+        Parameters
+        ----------
+        connectivity : Connectivity
+            The connectivity to hash
+        """
+        memoized = connectivity._content_hash
+        if memoized is not None and memoized[0] == self.format_version:
+            return memoized[1]
+        digest = hashlib.sha256()
+
+        def update(*items):
+            for item in items:
+                digest.update(str(item).encode('utf-8'))
+                digest.update(b'\0')
+
+        rule_props = connectivity.rule_properties
+        rng_cls = connectivity.rng_cls
+        update(self.format_version, type(connectivity).__name__,
+               rule_props.lib_type, rule_props.standard_library,
+               connectivity.source_size, connectivity.destination_size,
+               connectivity.random_seed, connectivity.engine,
+               connectivity.sampling,
+               (None if rng_cls is None
+                else rng_cls.__module__ + '.' + rng_cls.__name__))
+        for prop in sorted(rule_props.properties, key=lambda p: p.name):
+            update(prop.name, tuple(prop.units.dimension), prop.units.power,
+                   prop.units.offset)
+            if prop.value.is_array():
+                digest.update(numpy.ascontiguousarray(
+                    prop.value.values, dtype=numpy.float64).tobytes())
+            elif prop.value.is_single():
+                update(repr(float(prop.value)))
+            else:
+                update(prop.value.key)
+        content_hash = digest.hexdigest()
+        connectivity._content_hash = (self.format_version, content_hash)
+        return content_hash
+
+    def path(self, connectivity):
+        """
+        The path of the file the connections of the connectivity are cached
+        in
+        """
+        return os.path.join(self._directory,
+                            self.content_hash(connectivity) + self.suffix)
+
+    def load(self, connectivity):
+        """
+        Memory-maps the cached connections of the connectivity
+
+        Parameters
+        ----------
+        connectivity : Connectivity
+            The connectivity to load the connections of
+
+        Returns
+        -------
+        connections : (numpy.memmap, numpy.memmap) | None
+            The (read-only) source and destination indices of the
+            connections or None if they are not in the cache
+        """
+        path = self.path(connectivity)
+        try:
+            conns = numpy.load(path, mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            return None
+        try:
+            os.utime(path, None)  # Mark as recently used
+        except OSError:
+            pass
+        return conns[0], conns[1]
+
+    def store(self, connectivity, source_indices, destination_indices):
+        """
+        Stores the connections of the connectivity in the cache and evicts
+        the least recently used files if the cache is larger than
+        `max_bytes`
+
+        Parameters
+        ----------
+        connectivity : Connectivity
+            The connectivity the connections were generated from
+        source_indices : numpy.ndarray(int)
+            The source indices of the connections
+        destination_indices : numpy.ndarray(int)
+            The destination indices of the connections
+        """
+        conns = numpy.empty((2, len(source_indices)), dtype=numpy.int64)
+        conns[0] = source_indices
+        conns[1] = destination_indices
+        # Write to a temporary file first and then move it into place so that
+        # concurrent readers never see a partially written file
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self._directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                numpy.save(f, conns)
+            os.replace(tmp_path, self.path(connectivity))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        """
+        Removes the least recently used files from the cache until its total
+        size is no more than `max_bytes`
+
+        Parameters
+        ----------
+        max_bytes : int | None
+            The size to reduce the cache to. If None the `max_bytes` of the
+            cache is used
+        """
+        if max_bytes is None:
+            max_bytes = self._max_bytes
+        if max_bytes is None:
+            return
+        entries = []
+        for fname in os.listdir(self._directory):
+            if fname.endswith(self.suffix):
+                path = os.path.join(self._directory, fname)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # Removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(e[1] for e in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Removes all files from the cache
+        """
+        self.evict(max_bytes=0)
+
+    @property
+    def size(self):
+        """
+        The total size of the files in the cache in bytes
+        """
+        return sum(
+            os.path.getsize(os.path.join(self._directory, f))
+            for f in os.listdir(self._directory) if f.endswith(self.suffix))
@@ -1,4 +1,6 @@
 from itertools import chain
+from collections import OrderedDict
+import numpy
 from nineml.user.component import Property, Component, Prototype, Definition
 from nineml.exceptions import (
     NineMLUsageError, NineMLNameError, name_error, NineMLUnitMismatchError)
@@ -83,6 +85,59 @@ class DynamicsProperties(Component, DynamicPortsObject):
                     .format(var.name, initial_dimension, self.name,
                             self.component_class.name, var_dimension))
 
+    def property_table(self, size, rng=None, as_dict=False):
+        """
+        Expands the properties and initial values into per-cell columns in
+        SI units (i.e. with a power of 0 and no offset), broadcasting single
+        values, copying array values (which must be of length `size`) and
+        sampling random distribution values in a single call per column
+
+        Parameters
+        ----------
+        size : int
+            The number of cells to expand the values to
+        rng : numpy.random.Generator | int | None
+            The generator to sample random distribution values from, or a
+            seed to create one with `numpy.random.default_rng`
+        as_dict : bool
+            Whether to return a dictionary of column arrays instead of a
+            structured array
+
+        Returns
+        -------
+        table : numpy.ndarray | OrderedDict(str, numpy.ndarray(float))
+            A structured array with a float field for each property and
+            initial value (or a dictionary of column arrays if `as_dict`)
+        """
+        quantities = sorted(chain(self.properties, self.initial_values),
+                            key=lambda p: p.name)
+        if not isinstance(rng, numpy.random.Generator):
+            rng = numpy.random.default_rng(rng)
+        table = numpy.empty(size, dtype=[(str(q.name), numpy.float64)
+                                         for q in quantities])
+        for qty in quantities:
+            column = table[qty.name]
+            if qty.value.is_single():
+                column[:] = qty.value.value
+            elif qty.value.is_array():
+                if len(qty.value) != size:
+                    raise NineMLUsageError(
+                        "Length of '{}' array value ({}) in '{}' does not "
+                        "match size of table ({})".format(
+                            qty.name, len(qty.value), self.name, size))
+                column[:] = qty.value.values
+            else:
+                column[:] = qty.value.distribution.sample(size, rng=rng)
+            # Convert to SI units in place
+            if qty.units.power:
+                column *= 10.0 ** qty.units.power
+            if qty.units.offset:
+                column += qty.units.offset
+        if as_dict:
+            table = OrderedDict((n, numpy.ascontiguousarray(table[n]))
+                                for n in table.dtype.names)
+        return table
+
     def __getinitargs__(self):
         return (self.name, self.definition, self._properties,
                 self._initial_values, self._url)
@@ -278,7 +278,7 @@ class MultiDynamics(Dynamics):
                  event_receive_port_exposures=None,
                  analog_receive_port_exposures=None,
                  analog_reduce_port_exposures=None,
-                 validate_dimensions=True,
+                 validate=True, validate_dimensions=True,
                  **kwargs):
         self._name = validate_identifier(name)
         BaseALObject.__init__(self)
@@ -339,7 +339,8 @@ class MultiDynamics(Dynamics):
 
         self.annotations.set((VALIDATION, PY9ML_NS), DIMENSIONALITY,
                              validate_dimensions)
-        self.validate(**kwargs)
+        if validate:
+            self.validate(**kwargs)
 
     def __getitem__(self, comp_name):
         return self._sub_components[comp_name]
@@ -836,7 +837,8 @@ class MultiDynamics(Dynamics):
         return cls(name=node.attr('name', **options),
                    sub_components=sub_components,
                    port_exposures=port_exposures,
-                   port_connections=port_connections)
+                   port_connections=port_connections,
+                   validate=node.visitor.validate)
 
     def serialize_node_v1(self, node, **options):
         self.serialize_node(node, **options)
@@ -1156,7 +1158,7 @@ class MultiDynamicsProperties(DynamicsProperties):
 
     def __init__(self, name, sub_components, port_connections=[],
                  port_exposures=[], check_initial_values=False,
-                 definition=None):
+                 definition=None, validate=True):
         self._name = validate_identifier(name)
         # Initiate inherited base classes
         BaseULObject.__init__(self)
@@ -1174,7 +1176,8 @@ class MultiDynamicsProperties(DynamicsProperties):
             # This is just until the user layer is split into structure and
             # property layers
             self._definition = self._extract_definition(
-                sub_components, port_exposures, port_connections)
+                sub_components, port_exposures, port_connections,
+                validate=validate)
         else:
             self._definition = definition
         # Check for property/parameter matches
@@ -1183,7 +1186,7 @@ class MultiDynamicsProperties(DynamicsProperties):
             self.check_initial_values()
 
     def _extract_definition(self, sub_components, port_exposures,
-                            port_connections):
+                            port_connections, validate=True):
         sub_dynamics = [
             SubDynamics(sc.name, sc.component.component_class)
             for sc in sub_components]
@@ -1192,7 +1195,7 @@ class MultiDynamicsProperties(DynamicsProperties):
             self.name + '_dynamics', sub_dynamics,
             port_exposures=port_exposures,
             port_connections=port_connections,
-            document=self.document))
+            document=self.document, validate=validate))
 
     def flatten(self, name=None):
         if name is None:
@@ -1268,7 +1271,8 @@ class MultiDynamicsProperties(DynamicsProperties):
         return cls(name=node.attr('name', **options),
                    sub_components=sub_component_properties,
                    port_exposures=port_exposures,
-                   port_connections=port_connections)
+                   port_connections=port_connections,
+                   validate=node.visitor.validate)
 
     def serialize_node_v1(self, node, **options):
         self.serialize_node(node, **options)
@@ -1,15 +1,20 @@
+import os
 import re
 import math
+import numpy
 from itertools import chain
 from .component import Property
 import nineml.units as un
 from .population import Population
 from .projection import Projection
+from .connectionrule import Connectivity
 from .selection import Selection
 from . import BaseULObject
 from nineml.exceptions import name_error
 from nineml.base import DocumentLevelObject, ContainerObject
 from nineml.utils import validate_identifier
+from nineml.utils.seeding import RandomSeeds
+from nineml.annotations import PY9ML_NS, RANDOM, SEED
 from .component_array import ComponentArray
 from .connection_group import BaseConnectionGroup
 from nineml.values import RandomDistributionValue
@@ -30,13 +35,18 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
         An iterable containing the projections contained in the network.
     selections : iterable(Selection)
         An iterable containing the selections contained in the network.
+    random_seed : int | None
+        The seed the random seeds of the projections (and the generators used
+        to sample the random properties of the populations) are derived from
+        (see `set_random_seed`). The seed is stored in the annotations of the
+        network so that it is serialized and cloned along with it.
     """
     nineml_type = "Network"
     nineml_children = (Population, Projection, Selection)
     nineml_attr = ('name',)
 
     def __init__(self, name, populations=[], projections=[],
-                 selections=[]):
+                 selections=[], random_seed=None):
         # better would be *items, then sort by type, taking the name from the
         # item
         self._name = validate_identifier(name)
@@ -46,6 +56,8 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
         self.add(*populations)
         self.add(*projections)
         self.add(*selections)
+        if random_seed is not None:
+            self.set_random_seed(random_seed)
 
     @property
     def name(self):
@@ -118,6 +130,60 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
         for projection in self.projections:
             projection.resample_connectivity(*args, **kwargs)
 
+    @property
+    def random_seeds(self):
+        """
+        The RandomSeeds derived from the network seed (None if the network
+        hasn't been seeded)
+        """
+        seed = self.annotations.get((RANDOM, PY9ML_NS), SEED, default=None)
+        return RandomSeeds(int(seed)) if seed is not None else None
+
+    def set_random_seed(self, random_seed):
+        """
+        Seeds the connectivity of each projection with a seed derived from the
+        network seed and the name of the projection (see
+        `nineml.utils.seeding.RandomSeeds`), so that the connections of each
+        projection don't depend on the order the projections are sampled in.
+        Projections added to the network afterwards keep their own seeds.
+
+        Parameters
+        ----------
+        random_seed : int
+            The network seed
+        """
+        random_seeds = RandomSeeds(random_seed)
+        self.annotations.set((RANDOM, PY9ML_NS), SEED, random_seeds.seed)
+        for projection in self.projections:
+            conn = projection.connectivity
+            if isinstance(conn, Connectivity):
+                projection.resample_connectivity(
+                    random_seed=random_seeds.derive(projection.name),
+                    rng_cls=conn.rng_cls, engine=conn.engine,
+                    sampling=conn.sampling, cache=conn.cache)
+
+    def property_table(self, population_name, as_dict=False):
+        """
+        The per-cell properties and initial values of a population (see
+        `Population.property_table`), sampled from a generator derived from
+        the network seed and the population name if the network is seeded
+
+        Parameters
+        ----------
+        population_name : str
+            The name of the population
+        as_dict : bool
+            Whether to return a dictionary of column arrays instead of a
+            structured array
+        """
+        random_seeds = self.random_seeds
+        if random_seeds is not None:
+            rng = random_seeds.generator(population_name)
+        else:
+            rng = None
+        return self.population(population_name).property_table(
+            rng=rng, as_dict=as_dict)
+
     def connectivity_has_been_sampled(self):
         return any(p.connectivity.has_been_sampled() for p in self.projections)
 
@@ -144,6 +210,34 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
                     min_delay = delay
         return {'min_delay': min_delay, 'max_delay': max_delay}
 
+    def connectivity_summary(self, block_size=None):
+        """
+        Summarises the connectivity of each projection in the network without
+        holding the full list of connections of any projection in memory
+        (see `Connectivity.degree_stats`)
+
+        Parameters
+        ----------
+        block_size : int | None
+            The maximum number of candidate pairs in each block the degrees of
+            sampled connectivities are accumulated over
+
+        Returns
+        -------
+        summary : dict(str, dict(str, int | float))
+            The number of connections, the maximum and mean in and out
+            degrees and the source and destination sizes of each projection
+            mapped by projection name
+        """
+        summary = {}
+        for proj in self.projections:
+            conn = proj.connectivity
+            stats = conn.degree_stats(block_size=block_size).summary()
+            stats['source_size'] = conn.source_size
+            stats['destination_size'] = conn.destination_size
+            summary[proj.name] = stats
+        return summary
+
     def serialize_node(self, node, **options):  # @UnusedVariable
         node.attr('name', self.name, **options)
         node.children(self.populations, **options)
@@ -151,23 +245,33 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
         node.children(self.projections, **options)
 
     @classmethod
-    def unserialize_node(cls, node, **options):
+    def unserialize_node(cls, node, random_seed=None, **options):
         populations = node.children(Population, allow_ref=True, **options)
         projections = node.children(Projection, allow_ref=True, **options)
         selections = node.children(Selection, allow_ref=True, **options)
+        # The seed is loaded from the annotations of the network (see
+        # BaseUnserializer._set_load_options_from_annotations) so that the
+        # connectivity of the projections is seeded as before
         network = cls(name=node.attr('name', **options),
                       populations=populations, projections=projections,
-                      selections=selections)
+                      selections=selections, random_seed=random_seed)
         return network
 
     _conn_group_name_re = re.compile(
         r'(\w+)__(\w+)_(\w+)__(\w+)_(\w+)__connection_group')
 
-    def flatten(self):
+    def flatten(self, executor=None):
         """
         Flattens the populations and projections of the network into
         component arrays and connection groups (i.e. core 9ML objects)
 
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor | None
+            If provided, the connections of the projections are generated in
+            parallel by submitting them to the executor (see
+            `generate_connectivity`)
+
         Returns
         -------
         component_arrays : list(ComponentArray)
@@ -180,18 +284,120 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
             (ComponentArray(p.name + ComponentArray.suffix['post'], len(p),
                             p.cell.flatten())
              for p in self.populations),
-            (ComponentArray(p.name + ComponentArray.suffix['response'], len(p),
-                            p.response.flatten())
+            (ComponentArray(p.name + ComponentArray.suffix['response'],
+                            len(p), p.response.flatten())
              for p in self.projections),
             (ComponentArray(p.name + ComponentArray.suffix['plasticity'],
                             len(p), p.plasticity.flatten())
              for p in self.projections if p.plasticity is not None)))
-        connection_groups = list(chain(*(
-            (BaseConnectionGroup.from_port_connection(pc, p, component_arrays)
-             for pc in p.port_connections)
-            for p in self.projections)))
+        if executor is not None:
+            connection_arrays = self.generate_connectivity(executor=executor)
+        else:
+            connection_arrays = {}
+        connection_groups = []
+        for projection in self.projections:
+            try:
+                conn_arrays = connection_arrays[projection.name]
+            except KeyError:
+                # Generate the connections once for all port connections
+                conn_arrays = projection.connectivity.connection_arrays()
+            connection_groups.extend(
+                BaseConnectionGroup.from_port_connection(
+                    pc, projection, component_arrays,
+                    connection_arrays=conn_arrays)
+                for pc in projection.port_connections)
         return list(component_arrays.values()), connection_groups
 
+    def generate_connectivity(self, n_workers=None, executor=None,
+                              block_size=None):
+        """
+        Generates the connections of every projection in the network in
+        parallel. The generation of each block of connections (see
+        `Connectivity.iter_blocks`) is submitted to a process pool, which
+        passes the generated index arrays back via shared memory. Since each
+        block is generated from its own random streams the connections are
+        identical to those generated serially. The connections of random
+        rules generated by the 'random' engine (see `Connectivity`), which
+        can't be split into independent blocks, are generated by a single
+        worker per projection.
+
+        The blocks are concatenated into a single pair of (private) arrays
+        per projection and their shared memory segments are unlinked before
+        this method returns (see `_gather_connections`), so the returned
+        arrays don't hold on to any shared memory.
+
+        Parameters
+        ----------
+        n_workers : int | None
+            The number of worker processes in the process pool created to
+            generate the connections (if `executor` is not provided). If None
+            the number of processors on the machine is used, and if 1 the
+            connections are generated serially
+        executor : concurrent.futures.Executor | None
+            The executor to submit the generation of the blocks to, e.g.
+            a concurrent.futures.ProcessPoolExecutor
+        block_size : int | None
+            The maximum number of candidate pairs in each block (see
+            `Connectivity.iter_blocks`)
+
+        Returns
+        -------
+        connection_arrays : dict(str, (numpy.ndarray, numpy.ndarray))
+            The source and destination indices of the connections of each
+            projection, keyed by the projection names
+        """
+        if executor is None:
+            if n_workers == 1:
+                return dict(
+                    (p.name, p.connectivity.connection_arrays())
+                    for p in self.projections)
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                return self.generate_connectivity(executor=executor,
+                                                  block_size=block_size)
+        futures = {}
+        for projection in self.projections:
+            connectivity = projection.connectivity
+            cache = getattr(connectivity, 'cache', None)
+            if connectivity.lib_type == 'Explicit' or (
+                    cache is not None and
+                    os.path.exists(cache.path(connectivity))):
+                # Nothing to gain from generating explicit (or cached)
+                # connections in parallel
+                futures[projection.name] = connectivity.connection_arrays()
+                continue
+            # Clone the connectivity to detach it from its document before
+            # it is pickled and sent to the worker processes
+            clone = connectivity.clone(random_seeds=True)
+            if connectivity.independent_blocks:
+                futures[projection.name] = [
+                    executor.submit(_generate_connections, clone, i,
+                                    block_size)
+                    for i in range(connectivity.num_blocks(block_size))]
+            else:
+                futures[projection.name] = [
+                    executor.submit(_generate_connections, clone)]
+        connection_arrays = {}
+        error = None
+        for name, fs in futures.items():
+            try:
+                if isinstance(fs, tuple):
+                    connection_arrays[name] = fs
+                else:
+                    connection_arrays[name] = _gather_connections(fs)
+                    connectivity = self.projection(name).connectivity
+                    if getattr(connectivity, 'cache', None) is not None:
+                        connectivity.cache.store(connectivity,
+                                                 *connection_arrays[name])
+            except Exception as e:
+                # Gather the remaining projections so that their shared
+                # memory is released before the error is raised
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return connection_arrays
+
     def scale(self, scale):
         """
         Scales the size of the populations in the network and corresponding
@@ -221,4 +427,90 @@ class Network(BaseULObject, DocumentLevelObject, ContainerObject):
                 props.set(Property(
                     number.name,
                     int(math.ceil(float(number.value) * scale)) * un.unitless))
+            # Clear the content hash memoized by the connectivity cache
+            conn._content_hash = None
         return scaled
+
+
+def _generate_connections(connectivity, index=None, block_size=None):
+    """
+    Generates a block of connections (or all of them if `index` is None) in
+    a worker process and copies the index arrays into a shared memory
+    segment that is unlinked by the parent process (see
+    `_gather_connections`)
+    """
+    from multiprocessing import shared_memory
+    if index is None:
+        src, dest = connectivity.connection_arrays()
+    else:
+        src, dest = connectivity.block(index, block_size=block_size)
+    num_conns = len(src)
+    if not num_conns:
+        return None, 0
+    shm = shared_memory.SharedMemory(
+        create=True, size=2 * num_conns * numpy.dtype(numpy.int64).itemsize)
+    try:
+        conns = numpy.ndarray((2, num_conns), dtype=numpy.int64,
+                              buffer=shm.buf)
+        conns[0] = src
+        conns[1] = dest
+        del conns  # Release the view of the buffer so it can be closed
+        try:
+            # The segment is owned by the parent process from here on so it
+            # shouldn't be cleaned up when the worker process exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except (ImportError, AttributeError):
+            pass
+    finally:
+        shm.close()
+    return shm.name, num_conns
+
+
+def _gather_connections(futures):
+    """
+    Concatenates the blocks of connections generated by
+    `_generate_connections` and unlinks their shared memory segments.
+
+    The blocks are copied out of the segments rather than returned as views
+    onto them. The number of connections in each block isn't known until it
+    has been generated, so the blocks can't be written into a single segment
+    by the workers. They therefore have to be copied once to give the same
+    contiguous arrays as the serial path. Views would also leave the unlink
+    of each segment to the owner of the arrays. Segments that are never
+    unlinked outlive the process in /dev/shm (e.g. if it is killed). Copying
+    lets every segment be released before this function returns, whether or
+    not the generation succeeds.
+    """
+    from multiprocessing import shared_memory
+    segments = []
+    error = None
+    for future in futures:
+        try:
+            name, num_conns = future.result()
+        except Exception as e:
+            # Wait for the remaining blocks so their segments are released
+            if error is None:
+                error = e
+            continue
+        if num_conns:
+            segments.append((shared_memory.SharedMemory(name=name),
+                             num_conns))
+    try:
+        if error is not None:
+            raise error
+        src = numpy.empty(sum(n for _, n in segments), dtype=numpy.int64)
+        dest = numpy.empty(len(src), dtype=numpy.int64)
+        offset = 0
+        for shm, num_conns in segments:
+            conns = numpy.ndarray((2, num_conns), dtype=numpy.int64,
+                                  buffer=shm.buf)
+            src[offset:offset + num_conns] = conns[0]
+            dest[offset:offset + num_conns] = conns[1]
+            del conns  # Release the view of the buffer so it can be closed
+            offset += num_conns
+    finally:
+        for shm, _ in segments:
+            shm.close()
+            shm.unlink()
+    return src, dest
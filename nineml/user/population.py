@@ -84,6 +84,22 @@ class Population(BaseULObject, DocumentLevelObject, DynamicPortsObject):
                 self.cell.get_random_distributions())
         return components
 
+    def property_table(self, rng=None, as_dict=False):
+        """
+        The properties and initial values of each of the cells in SI units
+        (see `DynamicsProperties.property_table`)
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator | int | None
+            The generator to sample random distribution values from, or a
+            seed to create one with `numpy.random.default_rng`
+        as_dict : bool
+            Whether to return a dictionary of column arrays instead of a
+            structured array
+        """
+        return self.cell.property_table(self.size, rng=rng, as_dict=as_dict)
+
     @property
     def attributes_with_units(self):
         return chain(*[c.attributes_with_units for c in self.all_components()])
@@ -124,7 +124,7 @@ class Projection(BaseULObject, ContainerObject, DocumentLevelObject):
             self.add(port_connection)
 
     def __len__(self):
-        return sum(1 for _ in self.connectivity.connections())
+        return self.connectivity.num_connections()
 
     @property
     def name(self):
@@ -154,8 +154,10 @@ class Projection(BaseULObject, ContainerObject, DocumentLevelObject):
     def connection_rule_properties(self):
         return self.connectivity.rule_properties
 
-    def connections(self):
-        return self.connectivity.connections()
+    def connections(self, source_indices=None, destination_indices=None):
+        return self.connectivity.connections(
+            source_indices=source_indices,
+            destination_indices=destination_indices)
 
     @property
     def delay(self):
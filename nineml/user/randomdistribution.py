@@ -1,4 +1,6 @@
+import numpy
 from nineml.user.component import Component
+from nineml.exceptions import NineMLUsageError, NineMLNameError
 
 
 class RandomDistributionProperties(Component):
@@ -16,5 +18,124 @@ class RandomDistributionProperties(Component):
     def standard_library(self):
         return self.component_class.standard_library
 
+    @property
+    def standard_type(self):
+        """
+        The name of the UncertML distribution, e.g. 'normal', 'gamma'
+        """
+        return self.standard_library[
+            len(self.component_class.standard_library_basepath):]
+
     def get_nineml_type(self):
         return self.nineml_type
+
+    def sample(self, size, rng=None):
+        """
+        Draws samples from the distribution in a single vectorized call to
+        the matching method of a `numpy.random.Generator`. The properties of
+        the distribution are passed to the generator in the units they are
+        specified in and can be arrays (of length `size`) to draw each sample
+        from a distribution with different properties.
+
+        Parameters
+        ----------
+        size : int
+            The number of samples to draw
+        rng : numpy.random.Generator | int | None
+            The generator to draw the samples from, or a seed to create one
+            with `numpy.random.default_rng`
+
+        Returns
+        -------
+        samples : numpy.ndarray(float)
+            The samples drawn from the distribution
+        """
+        try:
+            sampler = _samplers[self.standard_type]
+        except KeyError:
+            raise NineMLUsageError(
+                "Sampling from '{}' distributions is not supported ('{}')"
+                .format(self.standard_type, self.name))
+        if not isinstance(rng, numpy.random.Generator):
+            rng = numpy.random.default_rng(rng)
+        samples = sampler(rng, self._sample_property, size)
+        return numpy.asarray(samples, dtype=numpy.float64)
+
+    def _sample_property(self, *names):
+        """
+        Returns the value of the first of the given (alternative) property
+        names as a float or array
+        """
+        for name in names:
+            try:
+                value = self.property(name).value
+            except NineMLNameError:
+                continue
+            if value.is_array():
+                return value.values
+            elif value.is_single():
+                return value.value
+            raise NineMLUsageError(
+                "Cannot sample from '{}' distribution as its '{}' property is "
+                "itself random".format(self.name, name))
+        raise NineMLUsageError(
+            "'{}' {} distribution requires a '{}' property to be sampled "
+            "from".format(self.name, self.standard_type,
+                          "' or '".join(names)))
+
+
+def _normal(rng, prop, size):
+    try:
+        stddev = prop('standardDeviation', 'stddev')
+    except NineMLUsageError:
+        stddev = numpy.sqrt(prop('variance'))
+    return rng.normal(prop('mean'), stddev, size)
+
+
+def _hypergeometric(rng, prop, size):
+    successes = prop('numberOfSuccesses')
+    return rng.hypergeometric(successes,
+                              prop('populationSize') - successes,
+                              prop('numberOfTrials'), size)
+
+
+# Maps the UncertML distributions to functions that draw samples from them
+# given a generator, a function to look up the values of properties from
+# their (alternative) names, and the number of samples
+_samplers = {
+    'bernoulli': lambda rng, prop, size: rng.binomial(
+        1, prop('probabilities', 'probability'), size),
+    'beta': lambda rng, prop, size: rng.beta(
+        prop('alpha'), prop('beta'), size),
+    'binomial': lambda rng, prop, size: rng.binomial(
+        prop('numberOfTrials'), prop('probabilityOfSuccess'), size),
+    'cauchy': lambda rng, prop, size: (
+        prop('location') + prop('scale') * rng.standard_cauchy(size)),
+    'chi-square': lambda rng, prop, size: rng.chisquare(
+        prop('degreesOfFreedom'), size),
+    'exponential': lambda rng, prop, size: rng.exponential(
+        1.0 / numpy.asarray(prop('rate'), dtype=float), size),
+    'f': lambda rng, prop, size: rng.f(
+        prop('numerator'), prop('denominator'), size),
+    'gamma': lambda rng, prop, size: rng.gamma(
+        prop('shape'), prop('scale'), size),
+    'geometric': lambda rng, prop, size: rng.geometric(
+        prop('probability'), size),
+    'hypergeometric': _hypergeometric,
+    'laplace': lambda rng, prop, size: rng.laplace(
+        prop('location'), prop('scale'), size),
+    'logistic': lambda rng, prop, size: rng.logistic(
+        prop('location'), prop('scale'), size),
+    'log-normal': lambda rng, prop, size: rng.lognormal(
+        prop('logScale'), prop('shape'), size),
+    'negative-binomial': lambda rng, prop, size: rng.negative_binomial(
+        prop('numberOfFailures'), prop('probability'), size),
+    'normal': _normal,
+    # NumPy's pareto method samples from the Lomax (Pareto II) distribution
+    'pareto': lambda rng, prop, size: (
+        prop('scale') * (rng.pareto(prop('shape'), size) + 1.0)),
+    'poisson': lambda rng, prop, size: rng.poisson(prop('rate'), size),
+    'uniform': lambda rng, prop, size: rng.uniform(
+        prop('minimum'), prop('maximum'), size),
+    'weibull': lambda rng, prop, size: (
+        prop('scale') * rng.weibull(prop('shape'), size))}
@@ -7,6 +7,7 @@ from past.builtins import basestring
 import pkgutil
 from collections import defaultdict
 from itertools import chain
+import numpy
 import nineml
 import nineml.units as un
 from nineml.annotations import Annotations
@@ -535,7 +536,8 @@ def add_with_sub_elements(element):
     Recursively adds 9ML elements from the example document to a dictionary
     sorted by 9ML types
     """
-    if isinstance(element, (basestring, Document)) or element in loading:
+    if (isinstance(element, (basestring, Document, numpy.ndarray)) or
+            element in loading):
         return
     if not isinstance(element, (dict, list, tuple, int, float, str,
                                 sympy.Basic, Connectivity)):
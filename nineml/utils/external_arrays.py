@@ -0,0 +1,324 @@
+"""
+Loading of the arrays referenced by external array values (see
+`nineml.values.ArrayValue`), which are memory-mapped from binary .npy, .npz
+and HDF5 files where possible instead of being read into memory.
+"""
+import os
+import io
+import re
+import struct
+import zipfile
+import weakref
+import contextlib
+from urllib.request import urlopen
+import numpy
+from nineml.exceptions import NineMLUsageError, NineMLIOError
+
+
+# The arrays that have been loaded (or mapped) from each file, mapped by url,
+# modification time and column name so that repeated references to the same
+# file share the same mapping for as long as any of them are in use
+_loaded_arrays = weakref.WeakValueDictionary()
+
+_remote_url_re = re.compile(r'^\w{2,}://')
+
+mimetypes = {
+    'application/x-npy': 'npy',
+    'application/npy': 'npy',
+    'application/x-npz': 'npz',
+    'application/npz': 'npz',
+    'application/x-hdf5': 'hdf5',
+    'application/x-hdf': 'hdf5',
+    'application/hdf5': 'hdf5'}
+
+extensions = {
+    '.npy': 'npy',
+    '.npz': 'npz',
+    '.h5': 'hdf5',
+    '.hdf5': 'hdf5',
+    '.hdf': 'hdf5'}
+
+
+def load_external_array(url, mimetype=None, column_name=None):
+    """
+    Loads the array referenced by an external array value. Binary .npy files,
+    uncompressed members of .npz archives and contiguous, uncompressed HDF5
+    datasets are memory-mapped (read-only) instead of being read into
+    memory, and other files are parsed as text with `numpy.loadtxt`.
+
+    Parameters
+    ----------
+    url : str
+        The url or path of the file
+    mimetype : str | None
+        The mimetype of the file. If None (or not recognised) the format is
+        determined from the extension of the url
+    column_name : str | None
+        Selects a single column of the file. The name of the member of .npz
+        archives, the path of the dataset in HDF5 files, the field name of
+        structured arrays, or the index (or header name for text files) of
+        the column of two-dimensional arrays
+
+    Returns
+    -------
+    array : numpy.ndarray
+        The read-only array
+    """
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    if _remote_url_re.match(url) is not None:
+        mtime = None
+    else:
+        try:
+            mtime = os.path.getmtime(url)
+        except OSError:
+            raise NineMLIOError(
+                "Could not find external array file '{}'".format(url))
+    key = (url, mtime, column_name)
+    try:
+        return _loaded_arrays[key]
+    except KeyError:
+        pass
+    fmt = mimetypes.get(mimetype, extensions.get(
+        os.path.splitext(url)[1].lower(), 'text'))
+    if fmt == 'npy':
+        array = _select_column(_shared(url, mtime, None, _load_npy), url,
+                               column_name)
+    elif fmt == 'npz':
+        array = _load_npz_member(url, column_name)
+    elif fmt == 'hdf5':
+        array = _load_hdf5_dataset(url, column_name)
+    else:
+        array = _select_column(
+            _shared(url, mtime, None, _load_text), url, column_name)
+    if array.flags.writeable:
+        array.flags.writeable = False
+    _loaded_arrays[key] = array
+    return array
+
+
+def _shared(url, mtime, column_name, loader):
+    """
+    Returns the array loaded from the file previously if it is still in use
+    and otherwise loads it with `loader`
+    """
+    key = (url, mtime, column_name)
+    try:
+        array = _loaded_arrays[key]
+    except KeyError:
+        array = loader(url)
+        if array.flags.writeable:
+            array.flags.writeable = False
+        _loaded_arrays[key] = array
+    return array
+
+
+def _open(url):
+    if _remote_url_re.match(url) is not None:
+        # Remote files are downloaded into memory
+        with contextlib.closing(urlopen(url)) as f:
+            return io.BytesIO(f.read())
+    return open(url, 'rb')
+
+
+def _load_npy(url):
+    if _remote_url_re.match(url) is not None:
+        return numpy.load(_open(url))
+    return numpy.load(url, mmap_mode='r')
+
+
+def _load_text(url):
+    with contextlib.closing(_open(url)) as f:
+        return numpy.loadtxt(f)
+
+
+def _load_npz_member(url, member):
+    with contextlib.closing(_open(url)) as f:
+        with zipfile.ZipFile(f) as archive:
+            names = [n[:-len('.npy')] if n.endswith('.npy') else n
+                     for n in archive.namelist()]
+            if member is None:
+                if len(names) != 1:
+                    raise NineMLUsageError(
+                        "A column name is required to select one of the "
+                        "arrays in '{}' ('{}')".format(url,
+                                                       "', '".join(names)))
+                member = names[0]
+            try:
+                info = archive.getinfo(member + '.npy')
+            except KeyError:
+                try:
+                    info = archive.getinfo(member)
+                except KeyError:
+                    raise NineMLUsageError(
+                        "'{}' is not one of the arrays in '{}' ('{}')"
+                        .format(member, url, "', '".join(names)))
+            if (info.compress_type == zipfile.ZIP_STORED and
+                    not isinstance(f, io.BytesIO)):
+                array = _map_stored_npy(f, url, info)
+                if array is not None:
+                    return array
+            with archive.open(info) as member_file:
+                return numpy.lib.format.read_array(member_file)
+
+
+def _map_stored_npy(f, url, info):
+    """
+    Memory-maps an uncompressed .npy member of a zip archive, returning None
+    if it can't be mapped (e.g. arrays of Python objects)
+    """
+    # Skip the local file header (whose extra field can differ from the one
+    # in the central directory) to get to the start of the member
+    f.seek(info.header_offset)
+    header = struct.unpack('<4s2B4HL2L2H', f.read(30))
+    f.seek(info.header_offset + 30 + header[-2] + header[-1])
+    version = numpy.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = (
+            numpy.lib.format.read_array_header_1_0(f))
+    else:
+        shape, fortran_order, dtype = (
+            numpy.lib.format.read_array_header_2_0(f))
+    if dtype.hasobject:
+        return None
+    return numpy.memmap(url, dtype=dtype, mode='r', offset=f.tell(),
+                        shape=shape, order='F' if fortran_order else 'C')
+
+
+def _load_hdf5_dataset(url, path):
+    try:
+        import h5py
+    except ImportError:
+        raise NineMLUsageError(
+            "h5py needs to be installed to load external array values from "
+            "HDF5 files ('{}')".format(url))
+    with h5py.File(_open(url), 'r') as f:
+        if path is None:
+            names = list(f)
+            if len(names) != 1:
+                raise NineMLUsageError(
+                    "A column name is required to select one of the "
+                    "datasets in '{}' ('{}')".format(url, "', '".join(names)))
+            path = names[0]
+        try:
+            dataset = f[path]
+        except KeyError:
+            raise NineMLUsageError(
+                "Could not find dataset '{}' in '{}'".format(path, url))
+        offset = dataset.id.get_offset()
+        if (offset is not None and dataset.chunks is None and
+                dataset.compression is None and
+                _remote_url_re.match(url) is None):
+            return numpy.memmap(url, dtype=dataset.dtype, mode='r',
+                                offset=offset, shape=dataset.shape)
+        return dataset[()]
+
+
+def _select_column(array, url, column_name):
+    if column_name is None:
+        return array
+    if array.dtype.names is not None:
+        try:
+            return array[column_name]
+        except ValueError:
+            raise NineMLUsageError(
+                "'{}' is not one of the fields of '{}' ('{}')".format(
+                    column_name, url, "', '".join(array.dtype.names)))
+    if array.ndim != 2:
+        raise NineMLUsageError(
+            "Cannot select column '{}' from {}-dimensional array in '{}'"
+            .format(column_name, array.ndim, url))
+    try:
+        index = int(column_name)
+    except ValueError:
+        index = _header_index(url, column_name)
+    if not -array.shape[1] <= index < array.shape[1]:
+        raise NineMLUsageError(
+            "Column {} is out of range for array with {} columns in '{}'"
+            .format(index, array.shape[1], url))
+    return array[:, index]
+
+
+def _header_index(url, column_name):
+    """
+    Returns the index of the column in the commented header line of a text
+    file (e.g. as written by `numpy.savetxt(..., header=...)`)
+    """
+    with contextlib.closing(_open(url)) as f:
+        for line in io.TextIOWrapper(f):
+            if line.startswith('#'):
+                names = line[1:].replace(',', ' ').split()
+                if column_name in names:
+                    return names.index(column_name)
+    raise NineMLUsageError(
+        "Could not find column '{}' in '{}'".format(column_name, url))
+
+
+class LazyArray(object):
+    """
+    A one-dimensional array that is read from its source (e.g. an HDF5
+    dataset) when it is accessed, reading only the requested elements when it
+    is indexed or sliced. Used to defer loading the values of array values
+    until they are required (see `nineml.values.ArrayValue`).
+
+    Parameters
+    ----------
+    source : h5py.Dataset | array-like
+        The source of the array, which needs to support NumPy-style basic
+        indexing with non-negative indices and slice steps and have `shape`
+        and `dtype` attributes
+    dtype : numpy.dtype | None
+        The data type the array is converted to when it is read. If None the
+        data type of the source is used
+    """
+
+    def __init__(self, source, dtype=None):
+        if len(source.shape) != 1:
+            raise NineMLUsageError(
+                "Lazy arrays need to be one-dimensional ({} given)"
+                .format(source.shape))
+        self._source = source
+        self._dtype = numpy.dtype(dtype if dtype is not None
+                                  else source.dtype)
+
+    def __repr__(self):
+        return "{}({}, dtype={})".format(self.__class__.__name__,
+                                         self._source, self._dtype)
+
+    def __len__(self):
+        return self._source.shape[0]
+
+    @property
+    def shape(self):
+        return self._source.shape
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            indices = range(*index.indices(length))
+            if not indices:
+                return numpy.array([], dtype=self._dtype)
+            elif indices.step < 0:
+                # Sources such as HDF5 datasets don't support negative steps
+                # so the slice is read forwards and then reversed
+                return self[indices[-1]:indices[0] + 1:-indices.step][::-1]
+            index = slice(indices.start, indices.stop, indices.step)
+        else:
+            index = int(index)
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError(
+                    "Index {} is out of bounds for lazy array of length {}"
+                    .format(index, length))
+        return numpy.asarray(self._source[index], dtype=self._dtype)[()]
+
+    def read(self):
+        """
+        Reads the whole array from its source
+        """
+        return self[:]
@@ -0,0 +1,65 @@
+"""
+Pickling of the read-only arrays held by NineML objects (e.g. the values of
+`nineml.values.ArrayValue` and the indices of sampled connectivity), which
+are wrapped in `pickle.PickleBuffer` objects for pickle protocol 5 so that
+they can be transferred out-of-band (i.e. without copying them into the
+pickle stream) when a `buffer_callback` is passed to the pickler.
+"""
+import numpy
+try:
+    from pickle import PickleBuffer
+except ImportError:  # Python < 3.8
+    PickleBuffer = None
+
+
+def reduce_with_arrays(obj, protocol, arrays, state=None):
+    """
+    Returns a value for `obj.__reduce_ex__(protocol)` that pickles the given
+    arrays separately from the rest of the object's state
+
+    Parameters
+    ----------
+    obj : object
+        The object to pickle
+    protocol : int
+        The pickle protocol
+    arrays : dict(str, numpy.ndarray)
+        The attributes of the object that hold arrays, which are removed
+        from the object's state
+    state : dict | None
+        The state of the object (without the arrays). If None then the
+        object's __dict__ (minus the array attributes) is used
+    """
+    if state is None:
+        state = dict((k, v) for k, v in obj.__dict__.items()
+                     if k not in arrays)
+    return (_rebuild_with_arrays,
+            (type(obj), dict((name, _pickle_array(array, protocol))
+                             for name, array in arrays.items())),
+            state)
+
+
+def _pickle_array(array, protocol):
+    if array is None:
+        return None
+    # Memory-mapped arrays are pickled as plain arrays
+    array = numpy.ascontiguousarray(array)
+    if protocol >= 5 and PickleBuffer is not None:
+        data = PickleBuffer(array)
+    else:
+        data = array.tobytes()
+    return data, array.dtype.str, array.shape
+
+
+def _unpickle_array(data, dtype, shape):
+    array = numpy.frombuffer(data, dtype=dtype).reshape(shape)
+    array.flags.writeable = False
+    return array
+
+
+def _rebuild_with_arrays(cls, arrays):
+    obj = cls.__new__(cls)
+    for name, args in arrays.items():
+        setattr(obj, name, _unpickle_array(*args) if args is not None
+                else None)
+    return obj
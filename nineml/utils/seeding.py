@@ -0,0 +1,120 @@
+"""
+Derivation of the random seeds and generators used to sample the random
+elements of a network (e.g. connectivity and random distribution values) from
+a single network seed, so they can be sampled in any order (or in parallel)
+and still be reproducible.
+"""
+import sys
+import hashlib
+from random import randint
+import numpy
+from nineml.exceptions import NineMLUsageError
+
+
+def new_seed():
+    """
+    Draws a new random seed for objects that aren't given one explicitly
+    """
+    return randint(0, sys.maxsize)
+
+
+class RandomSeeds(object):
+    """
+    Derives independent seeds and counter-based (Philox) random generators
+    from a network seed, keyed by the names of the elements of the network
+    (e.g. projections or populations) and optionally the indices of blocks
+    within them. As each seed only depends on the network seed and its key
+    (not on the number of seeds that have been derived before it) they can
+    be derived in any order or in separate processes.
+
+    Parameters
+    ----------
+    seed : int | None
+        The network seed. If None a random seed is drawn
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = new_seed()
+        elif seed < 0:
+            raise NineMLUsageError(
+                "Random seeds must be non-negative integers ({} given)"
+                .format(seed))
+        self._seed = int(seed)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self._seed)
+
+    def __eq__(self, other):
+        return isinstance(other, RandomSeeds) and self._seed == other._seed
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._seed)
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def seed_sequence(self, name, *indices):
+        """
+        The NumPy seed sequence for the given key
+
+        Parameters
+        ----------
+        name : str
+            The name of the element of the network, e.g. a projection name
+        indices : int
+            Further indices to distinguish streams within the element, e.g. a
+            block index
+        """
+        return numpy.random.SeedSequence(
+            self._seed, spawn_key=(self._name_key(name),) + tuple(
+                int(i) for i in indices))
+
+    def derive(self, name, *indices):
+        """
+        Derives an integer seed (between 0 and sys.maxsize) for the given key,
+        e.g. to pass as the `random_seed` of a Connectivity
+
+        Parameters
+        ----------
+        name : str
+            The name of the element of the network, e.g. a projection name
+        indices : int
+            Further indices to distinguish streams within the element, e.g. a
+            block index
+        """
+        state = self.seed_sequence(name, *indices).generate_state(
+            1, dtype=numpy.uint64)
+        return int(state[0]) & sys.maxsize
+
+    def generator(self, name, *indices):
+        """
+        A random generator using the counter-based Philox bit generator seeded
+        for the given key
+
+        Parameters
+        ----------
+        name : str
+            The name of the element of the network, e.g. a population name
+        indices : int
+            Further indices to distinguish streams within the element, e.g. a
+            block index
+
+        Returns
+        -------
+        generator : numpy.random.Generator
+            The seeded random generator
+        """
+        return numpy.random.Generator(
+            numpy.random.Philox(self.seed_sequence(name, *indices)))
+
+    @classmethod
+    def _name_key(cls, name):
+        # Python's hash of strings is randomised between processes so a
+        # stable hash is used instead
+        return int.from_bytes(
+            hashlib.sha256(name.encode('utf-8')).digest()[:8], 'little')
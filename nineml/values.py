@@ -4,8 +4,8 @@ standard_library.install_aliases()
 from builtins import zip  # @IgnorePep8
 from .base import AnnotatedNineMLObject  # @IgnorePep8
 from abc import ABCMeta  # @IgnorePep8
-from urllib.request import urlopen  # @IgnorePep8
-import contextlib  # @IgnorePep8
+import os.path  # @IgnorePep8
+import hashlib  # @IgnorePep8
 import collections  # @IgnorePep8
 import sympy  # @IgnorePep8
 import itertools  # @IgnorePep8
@@ -15,6 +15,9 @@ import nineml  # @IgnorePep8
 from nineml.exceptions import (  # @IgnorePep8
     NineMLUsageError, NineMLValueError, NineMLSerializationError)
 from future.utils import with_metaclass  # @IgnorePep8
+from nineml.visitors.equality import NEARLY_EQUAL_PLACES_DEFAULT  # @IgnorePep8
+from nineml.utils.pickling import reduce_with_arrays  # @IgnorePep8
+from nineml.utils.external_arrays import LazyArray  # @IgnorePep8
 
 # =============================================================================
 # Operator argument decorators
@@ -240,64 +243,323 @@ class SingleValue(BaseValue):
 
 
 class ArrayValue(BaseValue):
+    """
+    An array of values, which are stored as a read-only, C-contiguous NumPy
+    array. Integer NumPy arrays and lists made up only of integers (e.g. the
+    indices of explicit connectivity) are stored as int64 arrays and all
+    other values as float64 arrays. Note that previous versions stored all
+    values as floats, so the values of array values created from lists of
+    integers are now integers (they still compare equal to the same values
+    given as floats).
+
+    The values can be used by NumPy without copying them via
+    `numpy.asarray(array_value)` (see `__array__`) or the `values`
+    attribute. The buffer protocol is only supported by the array value
+    itself (e.g. `memoryview(array_value)`) on Python >= 3.12 (see
+    `__buffer__`). On earlier versions use `memoryview(array_value.values)`.
+
+    Parameters
+    ----------
+    values : array-like | LazyArray | None
+        The values of the array. Can be None if `datafile` is provided, in
+        which case the values are loaded from the data file when they are
+        first accessed (memory-mapping binary .npy, .npz and HDF5 files, see
+        `nineml.utils.external_arrays.load_external_array`). Lazy arrays
+        (e.g. the datasets of HDF5 documents) are read when the values are
+        first accessed, or only in part if the array value is indexed or
+        sliced before then (see `nineml.utils.external_arrays.LazyArray`)
+    datafile : tuple(str, str, str) | None
+        The url, mimetype and column name of an external file the values are
+        stored in
+    relative_to : str | None
+        The directory a relative datafile url is resolved from when the
+        values are loaded (e.g. the directory of the document the array value
+        was read from). The url is kept as given so that it is serialized
+        unchanged
+    """
 
     nineml_type = "ArrayValue"
     nineml_attr = ('values',)
 
     DataFile = collections.namedtuple('DataFile', 'url mimetype, columnName')
+    DataFile.__qualname__ = 'ArrayValue.DataFile'  # So it can be pickled
+
+    # The number of values that are rounded at a time when calculating the
+    # digest, which keeps the intermediate arrays in the CPU cache
+    DIGEST_CHUNK_SIZE = 2 ** 16
 
-    def __init__(self, values, datafile=None):
+    def __init__(self, values=None, datafile=None, relative_to=None):
         super(ArrayValue, self).__init__()
-        try:
-            self._values = values.astype(float)  # If NumPy array
-        except AttributeError:
+        if datafile is None:
+            self._datafile = None
+        else:
+            self._datafile = self.DataFile(*datafile)
+        self._relative_to = relative_to
+        if values is None:
+            if datafile is None:
+                raise NineMLValueError(
+                    "Either values or a datafile needs to be provided to "
+                    "ArrayValue")
+            self._array = None  # Loaded on first access
+            self._lazy = None
+        elif isinstance(values, LazyArray):
+            self._array = None  # Read on first access
+            self._lazy = values
+        else:
+            self._array = self._to_array(values)
+            self._lazy = None
+        self._digests = {}
+        # The name, offset, dtype and shape of the values within a shared
+        # memory block if they have been shared (see nineml.shared)
+        self._shared = None
+
+    @classmethod
+    def _to_array(cls, values):
+        """
+        Converts the values to a read-only, C-contiguous NumPy array
+        """
+        if not isinstance(values, numpy.ndarray):
             try:
-                self._values = [float(v) for v in values]
+                values = list(values)
+                if values and all(cls._is_int(v) for v in values):
+                    values = numpy.array(values, dtype=numpy.int64)
+                else:
+                    values = numpy.array([float(v) for v in values],
+                                         dtype=numpy.float64)
             except (TypeError, ValueError):
                 raise NineMLValueError(
                     "Values provided to ArrayValue ({}) could not be "
                     "converted to a list of floats"
                     .format(type(values)))
-        if datafile is None:
-            self._datafile = None
-        else:
-            self._datafile = self.DataFile(*datafile)
+        # Integer arrays (e.g. the source/destination indices of explicit
+        # connectivity) are kept as integers and everything else is stored
+        # as floats
+        dtype = (numpy.int64 if values.dtype.kind in 'iu'
+                 else numpy.float64)
+        if (values.dtype == dtype and values.flags.c_contiguous and
+                not values.flags.writeable):
+            # Already a read-only array (e.g. a slice of another ArrayValue
+            # or a memory-mapped file) so it can be shared without copying
+            return values
+        array = numpy.array(values, dtype=dtype, order='C')
+        array.flags.writeable = False
+        return array
 
     @property
     def values(self):
+        """
+        The values as a read-only, C-contiguous NumPy array
+        """
         return self._values
 
+    @property
+    def _values(self):
+        if self._array is None:
+            if self._lazy is not None:
+                self._array = self._to_array(self._lazy.read())
+                self._lazy = None
+            else:
+                from nineml.utils.external_arrays import load_external_array
+                self._array = self._to_array(load_external_array(
+                    self.datafile_path, self.mimetype, self.columnName))
+        return self._array
+
+    def is_loaded(self):
+        """
+        Whether the values have been loaded (always True unless the values
+        are stored in an external data file or are lazily read from a
+        document and haven't been accessed yet)
+        """
+        return self._array is not None
+
+    @property
+    def datafile(self):
+        return self._datafile
+
+    @property
+    def url(self):
+        return self._datafile.url if self._datafile is not None else None
+
+    @property
+    def relative_to(self):
+        return self._relative_to
+
+    @property
+    def datafile_path(self):
+        """
+        The url of the external data file with relative paths resolved from
+        `relative_to`
+        """
+        url = self.url
+        if (url is not None and self._relative_to is not None and
+                '://' not in url and not os.path.isabs(url)):
+            url = os.path.join(self._relative_to, url)
+        return url
+
+    @property
+    def mimetype(self):
+        return (self._datafile.mimetype if self._datafile is not None
+                else None)
+
+    @property
+    def columnName(self):
+        return (self._datafile.columnName if self._datafile is not None
+                else None)
+
     @property
     def key(self):
-        # TODO: Should put a hash on the end of this to make it unique
-        return str('_'.join(str(v) for v in self._values[:10]))
+        return self.digest()
+
+    def digest(self, places=NEARLY_EQUAL_PLACES_DEFAULT):
+        """
+        A hash of the contents of the array, calculated over the values
+        after the mantissa of each has been rounded to `places` decimal
+        places (i.e. the same tolerance used to check the equality of
+        values, see `nineml.visitors.equality.EqualityChecker`) so that
+        values that are equal have the same digest. As the values are
+        immutable the digest is only calculated once for each number of
+        places.
+
+        Parameters
+        ----------
+        places : int
+            The number of decimal places the mantissas are rounded to
+
+        Returns
+        -------
+        digest : str
+            The hexadecimal SHA-256 digest
+        """
+        try:
+            return self._digests[places]
+        except KeyError:
+            pass
+        values = self._values
+        hsh = hashlib.sha256()
+        hsh.update(str(len(values)).encode('utf-8'))
+        chunk_size = max(min(self.DIGEST_CHUNK_SIZE, len(values)), 1)
+        mantissas = numpy.empty(chunk_size, dtype=numpy.float64)
+        exponents = numpy.empty(chunk_size, dtype=numpy.intc)
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            mantissa = mantissas[:len(chunk)]
+            exponent = exponents[:len(chunk)]
+            self._round_mantissas(chunk, places, mantissa, exponent)
+            hsh.update(mantissa)
+            hsh.update(exponent)
+        digest = self._digests[places] = hsh.hexdigest()
+        return digest
+
+    @classmethod
+    def _round_mantissas(cls, values, places, mantissa=None, exponent=None):
+        """
+        Splits the values into mantissas, rounded to the given number of
+        decimal places, and exponents (the vectorized equivalent of
+        `EqualityChecker._not_nearly_equal`)
+        """
+        if mantissa is None:
+            mantissa = numpy.empty(len(values), dtype=numpy.float64)
+            exponent = numpy.empty(len(values), dtype=numpy.intc)
+        numpy.frexp(values, out=(mantissa, exponent))
+        numpy.round(mantissa, places, out=mantissa)
+        # Normalise -0.0 to 0.0 so they have the same digest
+        mantissa += 0.0
+        return mantissa, exponent
 
     def is_array(self):
         return True
 
+    def is_integer(self):
+        """
+        Whether the values are stored as an array of integers
+        """
+        return self._values.dtype.kind in 'iu'
+
+    @classmethod
+    def _is_int(cls, value):
+        return (isinstance(value, (int, numpy.integer)) and
+                not isinstance(value, bool))
+
     def __iter__(self):
         return iter(self._values)
 
     def __getitem__(self, index):
+        if self._lazy is not None and isinstance(
+                index, (slice, int, numpy.integer)):
+            # Only read the requested values from the source
+            values = self._lazy[index]
+            return ArrayValue(values) if isinstance(index, slice) else values
+        if isinstance(index, slice):
+            # Contiguous slices share the memory of the array
+            return ArrayValue(self._values[index])
         return self._values[index]
 
     def __len__(self):
+        if self._lazy is not None:
+            return len(self._lazy)
         return len(self._values)
 
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return numpy.array(self._values, dtype=dtype)
+        if dtype is None or numpy.dtype(dtype) == self._values.dtype:
+            return self._values
+        return self._values.astype(dtype)
+
+    def __buffer__(self, flags):  # @UnusedVariable
+        # Exposes the values through the buffer protocol. This method is only
+        # used by Python >= 3.12 (PEP 688), on earlier versions
+        # memoryview(array_value) raises a TypeError and
+        # memoryview(array_value.values) should be used instead
+        return memoryview(self._values)
+
+    def __release_buffer__(self, view):
+        view.release()
+
+    def __reduce_ex__(self, protocol):
+        # The values are pickled as a PickleBuffer for protocol 5 so they can
+        # be transferred out-of-band, except for values memory-mapped from an
+        # external data file, which are mapped again when unpickled, and
+        # values in shared memory, which are attached to in __setstate__.
+        # Lazy arrays are read first as their sources can't be pickled.
+        self._values
+        state = dict(self.__dict__)
+        array = state.pop('_array')
+        if self._shared is not None:
+            arrays = {}
+        elif self._datafile is not None and isinstance(array, numpy.memmap):
+            arrays = {'_array': None}
+        else:
+            arrays = {'_array': array}
+        return reduce_with_arrays(self, protocol, arrays, state=state)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._shared is not None:
+            from nineml.shared import attach
+            name, offset, dtype, shape = self._shared
+            self._array = attach(name).view(offset, dtype, shape)
+
     def __repr__(self):
         return "ArrayValue({}{})".format(
-            ', '.join(str(v) for v in self._values[:5]),
+            ', '.join(str(v) for v in self[:5]),
             ('...' if len(self) >= 5 else ''))
 
     def inverse(self):
-        try:
-            return ArrayValue(1.0 / self._values)
-        except AttributeError:
-            return ArrayValue(1.0 / v for v in self._values)
-
-    def serialize_node(self, node, **options):  # @UnusedVariable
-        if self._datafile is None:
-            for i, value in enumerate(self._values):
+        return ArrayValue(1.0 / self._values)
+
+    def serialize_node(self, node, compact_arrays=True,
+                       **options):  # @UnusedVariable
+        if self._datafile is None and compact_arrays and (
+                node.visitor.major_version >= 2 or
+                node.visitor.compact_arrays_v1):
+            # Encode the values in bulk instead of as a row element per entry
+            # (e.g. as base64 in XML/JSON/YAML or as a native HDF5 dataset)
+            node.attr('encoding', node.visitor.array_encoding, **options)
+            node.attr('dtype', self._values.dtype.name, **options)
+            node.array(self._values, **options)
+        elif self._datafile is None:
+            for i, value in enumerate(self._values.tolist()):
                 row_elem = node.visitor.create_elem(
                     'ArrayValueRow', parent=node.serial_element, multiple=True,
                     **options)
@@ -305,19 +567,37 @@ class ArrayValue(BaseValue):
                 node.visitor.set_attr(row_elem, 'value', value)
         else:
             node.attr('url', self.url, **options)
-            node.attr('mimetype', self.mimetype, **options)
-            node.attr('columnName', self.columnName, **options)
+            if self.mimetype is not None:
+                node.attr('mimetype', self.mimetype, **options)
+            if self.columnName is not None:
+                node.attr('columnName', self.columnName, **options)
 
     @classmethod
     def unserialize_node(cls, node, **options):  # @UnusedVariable
-        if node.name == 'ExternalArrayValue':
-            url = node.attr('url', **options)
-            with contextlib.closing(urlopen(url)) as f:
-                # FIXME: Should use a non-numpy version of this load function
-                values = numpy.loadtxt(f)
-            return cls(values, (node.attr('url', **options),
-                                node.attr('mimetype', **options),
-                                node.attr('columnName', **options)))
+        url = node.attr('url', default=None, **options)
+        if node.name == 'ExternalArrayValue' or url is not None:
+            if url is None:
+                url = node.attr('url', **options)  # Raise missing error
+            if (node.visitor.url is not None and
+                    '://' not in node.visitor.url):
+                # Relative paths are resolved from the directory of the
+                # document when the values are loaded
+                relative_to = os.path.dirname(
+                    os.path.abspath(node.visitor.url))
+            else:
+                relative_to = None
+            # The values are loaded when they are first accessed
+            return cls(None, (url,
+                              node.attr('mimetype', default=None, **options),
+                              node.attr('columnName', default=None,
+                                        **options)),
+                       relative_to=relative_to)
+        elif node.attr('encoding', default=None, **options) is not None:
+            dtype = node.attr('dtype', default='float64', **options)
+            if dtype not in ('float64', 'int64'):
+                raise NineMLSerializationError(
+                    "Unsupported dtype '{}' for ArrayValue".format(dtype))
+            return cls(node.array(numpy.dtype(dtype), **options))
         else:
             rows = []
             for name, elem in node.visitor.get_all_children(
@@ -328,7 +608,8 @@ class ArrayValue(BaseValue):
                         .format(name))
                 rows.append((
                     int(node.visitor.get_attr(elem, 'index', **options)),
-                    float(node.visitor.get_attr(elem, 'value', **options))))
+                    cls._parse_row_value(
+                        node.visitor.get_attr(elem, 'value', **options))))
                 node.unprocessed_children.discard('ArrayValueRow')
             sorted_rows = sorted(rows, key=itemgetter(0))
             indices, values = list(zip(*sorted_rows))
@@ -345,6 +626,21 @@ class ArrayValue(BaseValue):
                     "Indices greater or equal to the number of array rows")
             return cls(values)
 
+    @classmethod
+    def _parse_row_value(cls, value):
+        """
+        Parses the value of an array row, keeping integer values as integers
+        (so that arrays of indices are read back as integer arrays)
+        """
+        if cls._is_int(value):
+            return int(value)
+        if not isinstance(value, (float, numpy.floating)):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                pass
+        return float(value)
+
     # =========================================================================
     # Magic methods to allow the SingleValue to be treated like a
     # floating point number
@@ -359,31 +655,19 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __add__(self, num):
-        try:
-            return ArrayValue(self._values + num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v + num) for v in self._values])
+        return ArrayValue(self._values + num)
 
     @parse_float_operand
     def __sub__(self, num):
-        try:
-            return ArrayValue(self._values - num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v - num) for v in self._values])
+        return ArrayValue(self._values - num)
 
     @parse_float_operand
     def __mul__(self, num):
-        try:
-            return ArrayValue(self._values * num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v * num) for v in self._values])
+        return ArrayValue(self._values * num)
 
     @parse_float_operand
     def __truediv__(self, num):
-        try:
-            return ArrayValue(self._values.__truediv__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(v / num) for v in self._values])
+        return ArrayValue(self._values / num)
 
     @parse_float_operand
     def __div__(self, num):
@@ -391,45 +675,29 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __pow__(self, power):
-        try:
-            return ArrayValue(self._values ** power)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v ** power) for v in self._values])
+        return ArrayValue(self._values ** power)
 
     @parse_float_operand
     def __floordiv__(self, num):
-        try:
-            return ArrayValue(self._values // num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v // num) for v in self._values])
+        return ArrayValue(self._values // num)
 
     @parse_float_operand
     def __mod__(self, num):
-        try:
-            return ArrayValue(self._values % num)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(v % num) for v in self._values])
+        return ArrayValue(self._values % num)
 
     def __radd__(self, num):
         return self.__add__(num)
 
     @parse_float_operand
     def __rsub__(self, num):
-        try:
-            return ArrayValue(num - self._values)  # if numpy array
-        except TypeError:
-            return ArrayValue([float(num - v) for v in self._values])
+        return ArrayValue(num - self._values)
 
     def __rmul__(self, num):
         return self.__mul__(num)
 
     @parse_float_operand
     def __rtruediv__(self, num):
-        try:
-            return ArrayValue(self._values.__rtruediv__(num))  # if np
-        except AttributeError:
-            return ArrayValue([float(num.__truediv__(v))
-                               for v in self._values])
+        return ArrayValue(num / self._values)
 
     @parse_float_operand
     def __rdiv__(self, num):
@@ -437,64 +705,37 @@ class ArrayValue(BaseValue):
 
     @parse_float_operand
     def __rpow__(self, num):
-        try:
-            return ArrayValue(self._values.__rpow__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(num ** v) for v in self._values])
+        return ArrayValue(num ** self._values)
 
     @parse_float_operand
     def __rfloordiv__(self, num):
-        try:
-            return ArrayValue(self._values.__rfloordiv__(num))  # if numpy arr.
-        except AttributeError:
-            return ArrayValue([float(num // v) for v in self._values])
+        return ArrayValue(num // self._values)
 
     @parse_float_operand
     def __rmod__(self, num):
-        try:
-            return ArrayValue(self._values.__rmod__(num))  # if numpy array
-        except AttributeError:
-            return ArrayValue([float(num % v) for v in self._values])
+        return ArrayValue(num % self._values)
 
     def __neg__(self):
-        try:
-            return ArrayValue(self._values.__neg__())  # if numpy array
-        except AttributeError:
-            return ArrayValue([-v for v in self._values])
+        return ArrayValue(-self._values)
 
     def __abs__(self):
-        try:
-            return ArrayValue(self._values.__abs__())
-        except AttributeError:
-            return ArrayValue([abs(v) for v in self._values])
+        return ArrayValue(numpy.abs(self._values))
 
     @parse_float_operand
     def __lt__(self, other):
-        try:
-            return ArrayValue(self._values.__lt__(other))
-        except AttributeError:
-            return ArrayValue([v < other for v in self._values])
+        return ArrayValue(self._values < other)
 
     @parse_float_operand
     def __le__(self, other):
-        try:
-            return ArrayValue(self._values.__le__(other))
-        except AttributeError:
-            return ArrayValue([v <= other for v in self._values])
+        return ArrayValue(self._values <= other)
 
     @parse_float_operand
     def __ge__(self, other):
-        try:
-            return ArrayValue(self._values.__ge__(other))
-        except AttributeError:
-            return ArrayValue([v >= other for v in self._values])
+        return ArrayValue(self._values >= other)
 
     @parse_float_operand
     def __gt__(self, other):
-        try:
-            return ArrayValue(self._values.__gt__(other))
-        except AttributeError:
-            return ArrayValue([v > other for v in self._values])
+        return ArrayValue(self._values > other)
 
 
 class RandomDistributionValue(BaseValue):
@@ -545,6 +786,26 @@ class RandomDistributionValue(BaseValue):
         """
         self._generator = generator_cls(self.distribution)
 
+    def sample(self, size, rng=None):
+        """
+        Draws an array of samples from the distribution in a single
+        vectorized call (see `RandomDistributionProperties.sample`)
+
+        Parameters
+        ----------
+        size : int
+            The number of samples to draw
+        rng : numpy.random.Generator | int | None
+            The generator to draw the samples from, or a seed to create one
+            with `numpy.random.default_rng`
+
+        Returns
+        -------
+        samples : ArrayValue
+            The samples drawn from the distribution
+        """
+        return ArrayValue(self.distribution.sample(size, rng=rng))
+
     def __repr__(self):
         return ("RandomDistributionValue({})".format(self.distribution.name))
 
@@ -104,11 +104,49 @@ class Cloner(BaseChildResultsVisitor):
         clone = nineml_cls(
             child_results['rule_properties'],
             random_seed=random_seed,
+            rng_cls=connectivity.rng_cls,
+            engine=connectivity.engine,
+            sampling=connectivity.sampling,
+            cache=connectivity.cache,
             source_size=connectivity.source_size,
             destination_size=connectivity.destination_size,
             **kwargs)
         return clone
 
+    def action_network(self, network, nineml_cls, child_results,
+                       children_results, **kwargs):  # @UnusedVariable
+        clone = self.default_action(network, nineml_cls, child_results,
+                                    children_results, **kwargs)
+        random_seeds = network.random_seeds
+        if random_seeds is not None and not self.random_seeds:
+            # Derive the seeds of the cloned projections from the network
+            # seed instead of drawing new ones
+            clone.set_random_seed(random_seeds.seed)
+        return clone
+
+    def action__sparseconnectivity(self, connectivity, nineml_cls,
+                                   child_results, children_results,
+                                   **kwargs):  # @UnusedVariable
+        # The (read-only) index arrays are shared with the clone
+        indptr, indices = connectivity.csr
+        return nineml_cls(
+            child_results['rule_properties'],
+            source_size=connectivity.source_size,
+            destination_size=connectivity.destination_size,
+            indptr=indptr, indices=indices, **kwargs)
+
+    def action_arrayvalue(self, array_value, nineml_cls, child_results,
+                          children_results, **kwargs):  # @UnusedVariable
+        # The (read-only) values are shared with the clone, and values stored
+        # in external data files or lazily read from a document are not
+        # loaded if they haven't been already
+        clone = nineml_cls(
+            array_value.values if array_value.is_loaded()
+            else array_value._lazy, datafile=array_value.datafile,
+            relative_to=array_value.relative_to)
+        clone._shared = array_value._shared  # see nineml.shared
+        return clone
+
     def action_reference(self, reference, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
         """
         Typically won't be called unless Reference is created and referenced
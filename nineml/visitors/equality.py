@@ -1,5 +1,5 @@
-from builtins import zip
 import math
+import numpy
 import sympy
 from itertools import chain
 from .base import BaseVisitor, BaseDualVisitor, DualWithContextMixin
@@ -78,10 +78,24 @@ class EqualityChecker(BaseDualVisitor):
     def action_arrayvalue(self, val1, val2, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
         if len(val1.values) != len(val2.values):
             self._raise_value_exception('values', val1, val2, nineml_cls)
-        if any(self._not_nearly_equal(s, o)
-               for s, o in zip(val1.values, val2.values)):
+        if val1.is_integer() and val2.is_integer():
+            # Integers can be compared exactly (and without a Python loop)
+            if not numpy.array_equal(val1.values, val2.values):
+                self._raise_value_exception('values', val1, val2, nineml_cls)
+        elif (val1.digest(self.nearly_equal_places) !=
+              val2.digest(self.nearly_equal_places)):
+            # The digests are calculated from the rounded mantissas and
+            # exponents of the values (and memoized) so are equal only if
+            # the values are nearly equal
             self._raise_value_exception('values', val1, val2, nineml_cls)
 
+    def action__sparseconnectivity(self, conn1, conn2, nineml_cls,
+                                   **kwargs):  # @UnusedVariable
+        self.default_action(conn1, conn2, nineml_cls, **kwargs)
+        if not all(numpy.array_equal(a1, a2)
+                   for a1, a2 in zip(conn1.csr, conn2.csr)):
+            self._raise_value_exception('csr', conn1, conn2, nineml_cls)
+
     def action_unit(self, unit1, unit2, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
         # Ignore name
         self._check_attr(unit1, unit2, 'power', nineml_cls)
@@ -179,8 +193,12 @@ class Hasher(BaseVisitor):
         self._hash_value(val.value)
 
     def action_arrayvalue(self, val, nineml_cls, **kwargs):  # @UnusedVariable @IgnorePep8
-        for v in val.values:
-            self._hash_value(v)
+        self._hash_attr(val.digest(self.nearly_equal_places))
+
+    def action__sparseconnectivity(self, conn, nineml_cls,
+                                   **kwargs):  # @UnusedVariable
+        self.default_action(conn, nineml_cls, **kwargs)
+        self._hash_attr(conn.digest())
 
     def _hash_rhs(self, rhs, **kwargs):  # @UnusedVariable
         try:
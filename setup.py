@@ -33,19 +33,16 @@ setup(
                  'License :: OSI Approved :: BSD License',
                  'Natural Language :: English',
                  'Operating System :: OS Independent',
-                 'Programming Language :: Python :: 2',
-                 'Programming Language :: Python :: 2.7',
                  'Programming Language :: Python :: 3',
-                 'Programming Language :: Python :: 3.5',
-                 'Programming Language :: Python :: 3.6',
-                 'Programming Language :: Python :: 3.7',
+                 'Programming Language :: Python :: 3.8',
+                 'Programming Language :: Python :: 3.9',
                  'Topic :: Scientific/Engineering'],
     install_requires=['lxml>=3.7.3',
                       'future>=0.16.0',
                       'h5py>=2.7.0',
                       'PyYAML>=3.1',
                       'sympy>=1.5.1',
-                      'numpy>=1.11.0'],
-    python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, <4',
+                      'numpy>=1.17.0'],
+    python_requires='>=3.8, <4',
     tests_require=['nose']
 )
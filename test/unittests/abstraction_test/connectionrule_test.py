@@ -1,14 +1,26 @@
 from __future__ import division
 from itertools import groupby
+import os
+import shutil
+import tempfile
 import unittest
 import random
+import math
+from unittest.mock import patch
+import numpy
 import nineml.units as un
+from nineml import Document
 from nineml.utils.comprehensive_example import conA
 from nineml.abstraction.connectionrule import (
     all_to_all_connection_rule, one_to_one_connection_rule,
     explicit_connection_rule, probabilistic_connection_rule,
-    random_fan_in_connection_rule, random_fan_out_connection_rule)
-from nineml.user.connectionrule import (ConnectionRuleProperties, Connectivity)
+    random_fan_in_connection_rule, random_fan_out_connection_rule,
+    distance_dependent_connection_rule)
+from nineml.user.connectionrule import (
+    ConnectionRuleProperties, Connectivity, SparseConnectivity,
+    InverseConnectivity, _stream_uniforms)
+from nineml.user.connectivity_cache import ConnectivityCache
+from nineml.exceptions import NineMLUsageError
 
 # Fix seed to remove stochasticity from probabilistic connectivity
 random.seed(12345)
@@ -83,3 +95,586 @@ class Connectivity_test(unittest.TestCase):
         num_conns = len(list(connectivity.connections()))
         self.assertAlmostEqual(num_conns / size ** 2, p, 2)
 
+
+class ConnectionArrays_test(unittest.TestCase):
+
+    def _connectivity(self, rule, props, src_size, dest_size, **kwargs):
+        if 'rng_cls' not in kwargs:
+            kwargs.setdefault('engine', 'vectorized')
+        return Connectivity(
+            ConnectionRuleProperties(rule.name, rule, props), src_size,
+            dest_size, **kwargs)
+
+    def test_deterministic_rules(self):
+        for rule, props, src_size, dest_size in (
+                (all_to_all_connection_rule, {}, 3, 5),
+                (one_to_one_connection_rule, {}, 4, 4),
+                (explicit_connection_rule,
+                 {'sourceIndices': [0, 0, 1, 3, 5],
+                  'destinationIndices': [2, 4, 2, 4, 5]}, 6, 6)):
+            connectivity = self._connectivity(rule, props, src_size,
+                                              dest_size)
+            src, dest = connectivity.connection_arrays(dtype=numpy.int32)
+            self.assertEqual(src.dtype, numpy.int32)
+            self.assertEqual(dest.dtype, numpy.int32)
+            self.assertEqual(sorted(zip(src.tolist(), dest.tolist())),
+                             sorted(connectivity.connections()))
+
+    def test_random_rules_reproducible(self):
+        for rule, props in (
+                (probabilistic_connection_rule, {'probability': 0.2}),
+                (random_fan_in_connection_rule, {'number': 4}),
+                (random_fan_out_connection_rule, {'number': 4})):
+            connectivity = self._connectivity(rule, props, 50, 40,
+                                              random_seed=4321)
+            src, dest = connectivity.connection_arrays()
+            src2, dest2 = self._connectivity(
+                rule, props, 50, 40, random_seed=4321).connection_arrays()
+            self.assertTrue(numpy.array_equal(src, src2))
+            self.assertTrue(numpy.array_equal(dest, dest2))
+            self.assertEqual(list(zip(src.tolist(), dest.tolist())),
+                             list(connectivity.connections()))
+            self.assertTrue(((src >= 0) & (src < 50)).all())
+            self.assertTrue(((dest >= 0) & (dest < 40)).all())
+
+    def test_fan_in_degrees(self):
+        connectivity = self._connectivity(
+            random_fan_in_connection_rule, {'number': 7}, 30, 20)
+        _, dest = connectivity.connection_arrays()
+        self.assertTrue((numpy.bincount(dest, minlength=20) == 7).all())
+
+    def test_independent_streams(self):
+        # Fan-in and fan-out rules with the same seed and sizes don't select
+        # mirrored index sets
+        src, dest = self._connectivity(
+            random_fan_in_connection_rule, {'number': 5}, 20, 20,
+            random_seed=99).connection_arrays()
+        src2, dest2 = self._connectivity(
+            random_fan_out_connection_rule, {'number': 5}, 20, 20,
+            random_seed=99).connection_arrays()
+        self.assertNotEqual(sorted(zip(src.tolist(), dest.tolist())),
+                            sorted(zip(dest2.tolist(), src2.tolist())))
+        # and neither do rules of the same type between populations of
+        # different sizes
+        src3, dest3 = self._connectivity(
+            random_fan_in_connection_rule, {'number': 5}, 20, 21,
+            random_seed=99).connection_arrays()
+        self.assertNotEqual(src.tolist(), src3[:len(src)].tolist())
+
+    def test_probabilistic_batching(self):
+        connectivity = self._connectivity(
+            probabilistic_connection_rule, {'probability': 0.3}, 40, 25,
+            random_seed=99)
+        src, dest = connectivity.connection_arrays()
+        connectivity.batch_size = 30  # Force more than one batch
+        src2, dest2 = connectivity.connection_arrays()
+        self.assertTrue(numpy.array_equal(src, src2))
+        self.assertTrue(numpy.array_equal(dest, dest2))
+
+    def test_degree_stats(self):
+        for rule, props, src_size, dest_size in (
+                (all_to_all_connection_rule, {}, 6, 9),
+                (one_to_one_connection_rule, {}, 8, 8),
+                (explicit_connection_rule,
+                 {'sourceIndices': [0, 0, 1, 3, 5],
+                  'destinationIndices': [2, 4, 2, 4, 5]}, 6, 7),
+                (probabilistic_connection_rule, {'probability': 0.3}, 30, 20),
+                (random_fan_in_connection_rule, {'number': 4}, 30, 20),
+                (random_fan_out_connection_rule, {'number': 4}, 30, 20)):
+            connectivity = self._connectivity(rule, props, src_size,
+                                              dest_size, random_seed=7)
+            src, dest = connectivity.connection_arrays()
+            stats = connectivity.degree_stats(block_size=50)
+            self.assertEqual(
+                stats.in_degrees.tolist(),
+                numpy.bincount(dest, minlength=dest_size).tolist())
+            self.assertEqual(
+                stats.out_degrees.tolist(),
+                numpy.bincount(src, minlength=src_size).tolist())
+            self.assertEqual(stats.num_connections, len(src))
+            self.assertEqual(connectivity.num_connections(), len(src))
+            self.assertEqual(stats.max_in_degree,
+                             int(stats.in_degrees.max()))
+            self.assertAlmostEqual(stats.mean_out_degree,
+                                   len(src) / float(src_size))
+            self.assertEqual(stats.in_degree_distribution().sum(), dest_size)
+
+    def test_iter_blocks(self):
+        for rule, props, src_size, dest_size, kwargs in (
+                (all_to_all_connection_rule, {}, 13, 7, {}),
+                (one_to_one_connection_rule, {}, 20, 20, {}),
+                (explicit_connection_rule,
+                 {'sourceIndices': [0, 0, 1, 3, 5],
+                  'destinationIndices': [2, 4, 2, 4, 5]}, 6, 6, {}),
+                (probabilistic_connection_rule, {'probability': 0.2}, 31, 17,
+                 {}),
+                (probabilistic_connection_rule, {'probability': 0.2}, 31, 17,
+                 {'sampling': 'geometric'}),
+                (random_fan_in_connection_rule, {'number': 3}, 11, 23, {}),
+                (random_fan_out_connection_rule, {'number': 3}, 23, 11, {})):
+            connectivity = self._connectivity(rule, props, src_size,
+                                              dest_size, random_seed=77,
+                                              **kwargs)
+            src, dest = connectivity.connection_arrays()
+            for block_size in (1, 10, 64, 10000):
+                blocks = list(connectivity.iter_blocks(block_size))
+                self.assertEqual(len(blocks),
+                                 connectivity.num_blocks(block_size))
+                self.assertTrue(numpy.array_equal(
+                    numpy.concatenate([s for s, _ in blocks]), src))
+                self.assertTrue(numpy.array_equal(
+                    numpy.concatenate([d for _, d in blocks]), dest))
+                # Check that a block can be regenerated on its own
+                index = len(blocks) // 2
+                block_src, block_dest = connectivity.block(index, block_size)
+                self.assertTrue(numpy.array_equal(block_src,
+                                                  blocks[index][0]))
+                self.assertTrue(numpy.array_equal(block_dest,
+                                                  blocks[index][1]))
+            self.assertRaises(NineMLUsageError, connectivity.block,
+                              connectivity.num_blocks(10), 10)
+            self.assertRaises(NineMLUsageError, list,
+                              connectivity.iter_blocks(0))
+
+    def test_index_filtering(self):
+        sources = [3, 1, 8, 8, 14]
+        destinations = numpy.arange(2, 20, 3)
+        for rule, props, src_size, dest_size, kwargs in (
+                (all_to_all_connection_rule, {}, 15, 21, {}),
+                (one_to_one_connection_rule, {}, 20, 20, {}),
+                (explicit_connection_rule,
+                 {'sourceIndices': [0, 3, 1, 8, 5],
+                  'destinationIndices': [2, 5, 2, 4, 5]}, 15, 21, {}),
+                (probabilistic_connection_rule, {'probability': 0.3}, 15, 21,
+                 {}),
+                (probabilistic_connection_rule, {'probability': 0.3}, 15, 21,
+                 {'sampling': 'geometric'}),
+                (random_fan_in_connection_rule, {'number': 5}, 15, 21, {}),
+                (random_fan_out_connection_rule, {'number': 5}, 15, 21, {}),
+                (random_fan_out_connection_rule, {'number': 5}, 15, 21,
+                 {'rng_cls': random.Random})):
+            connectivity = self._connectivity(rule, props, src_size,
+                                              dest_size, random_seed=3,
+                                              **kwargs)
+            all_conns = list(connectivity.connections())
+            for src_inds, dest_inds in ((sources, None),
+                                        (None, destinations),
+                                        (sources, destinations)):
+                expected = [
+                    (s, d) for s, d in all_conns
+                    if ((src_inds is None or s in src_inds) and
+                        (dest_inds is None or d in dest_inds))]
+                self.assertEqual(
+                    list(connectivity.connections(
+                        source_indices=src_inds,
+                        destination_indices=dest_inds)), expected)
+                src, dest = connectivity.connection_arrays(
+                    source_indices=src_inds, destination_indices=dest_inds)
+                self.assertEqual(list(zip(src.tolist(), dest.tolist())),
+                                 expected)
+            self.assertRaises(NineMLUsageError, connectivity.connection_arrays,
+                              destination_indices=[0, dest_size])
+
+    def test_iter_blocks_bounded(self):
+        connectivity = self._connectivity(
+            all_to_all_connection_rule, {}, 100, 30)
+        # Blocks are made up of whole rows of 30 destinations
+        self.assertEqual([len(s) for s, _ in connectivity.iter_blocks(95)],
+                         [90] * 33 + [30])
+        connectivity = self._connectivity(
+            random_fan_out_connection_rule, {'number': 4}, 10, 10,
+            rng_cls=random.Random)
+        self.assertEqual([len(s) for s, _ in connectivity.iter_blocks(15)],
+                         [15, 15, 10])
+
+    def test_probabilistic_geometric(self):
+        p = 0.05
+        connectivity = self._connectivity(
+            probabilistic_connection_rule, {'probability': p}, 300, 200,
+            random_seed=1234, sampling='geometric')
+        src, dest = connectivity.connection_arrays()
+        self.assertAlmostEqual(len(src) / (300 * 200), p, 2)
+        self.assertTrue(((src >= 0) & (src < 300)).all())
+        self.assertTrue(((dest >= 0) & (dest < 200)).all())
+        # Check all pairs are unique and sorted in destination-major order
+        flat = dest * 300 + src
+        self.assertTrue((numpy.diff(flat) > 0).all())
+        # Check the connections don't depend on the size of the batches
+        connectivity.batch_size = 17
+        src2, dest2 = connectivity.connection_arrays()
+        self.assertTrue(numpy.array_equal(src, src2))
+        self.assertTrue(numpy.array_equal(dest, dest2))
+        clone = connectivity.clone(random_seeds=True)
+        self.assertEqual(clone.sampling, 'geometric')
+        self.assertTrue(numpy.array_equal(clone.connection_arrays()[0], src))
+
+    def test_probabilistic_geometric_limits(self):
+        for p, expected in ((0.0, 0), (1.0, 60)):
+            connectivity = self._connectivity(
+                probabilistic_connection_rule, {'probability': p}, 6, 10,
+                sampling='geometric')
+            self.assertEqual(len(connectivity.connection_arrays()[0]),
+                             expected)
+
+    def test_unrecognised_sampling(self):
+        self.assertRaises(
+            NineMLUsageError, self._connectivity,
+            probabilistic_connection_rule, {'probability': 0.1}, 5, 5,
+            sampling='unknown')
+        # Geometric sampling isn't supported by the 'random' engine
+        for kwargs in ({'rng_cls': random.Random}, {'engine': 'random'}):
+            self.assertRaises(
+                NineMLUsageError, self._connectivity,
+                probabilistic_connection_rule, {'probability': 0.1}, 5, 5,
+                sampling='geometric', **kwargs)
+
+    def test_rng_cls_fallback(self):
+        connectivity = self._connectivity(
+            probabilistic_connection_rule, {'probability': 0.25}, 20, 20,
+            random_seed=5, rng_cls=random.Random)
+        src, dest = connectivity.connection_arrays()
+        self.assertEqual(list(zip(src.tolist(), dest.tolist())),
+                         list(connectivity.connections()))
+
+    def test_default_engine(self):
+        rule_props = ConnectionRuleProperties(
+            'fan_out', random_fan_out_connection_rule, {'number': 3})
+        connectivity = Connectivity(rule_props, 10, 8, random_seed=21)
+        self.assertEqual(connectivity.engine, 'random')
+        self.assertIs(connectivity.rng_cls, random.Random)
+        self.assertFalse(connectivity.independent_blocks)
+        # The same connections are drawn from the seed as previous versions
+        rng = random.Random(21)
+        expected = [(s, int(math.floor(rng.random() * 8)))
+                    for s in range(10) for _ in range(3)]
+        self.assertEqual(list(connectivity.connections()), expected)
+        src, dest = connectivity.connection_arrays()
+        self.assertEqual(list(zip(src.tolist(), dest.tolist())), expected)
+        self.assertEqual(connectivity.clone(random_seeds=True).engine,
+                         'random')
+        vectorized = Connectivity(rule_props, 10, 8, random_seed=21,
+                                  engine='vectorized')
+        self.assertTrue(vectorized.independent_blocks)
+        self.assertIsNone(vectorized.rng_cls)
+        self.assertEqual(vectorized.clone().engine, 'vectorized')
+        # Deterministic rules are vectorized by both engines
+        self.assertTrue(Connectivity(ConnectionRuleProperties(
+            'all', all_to_all_connection_rule, {}), 4, 4).independent_blocks)
+        self.assertRaises(NineMLUsageError, Connectivity, rule_props, 10, 8,
+                          engine='unknown')
+        self.assertRaises(NineMLUsageError, Connectivity, rule_props, 10, 8,
+                          engine='vectorized', rng_cls=random.Random)
+
+
+class SparseConnectivity_test(unittest.TestCase):
+
+    def setUp(self):
+        self.connectivity = Connectivity(
+            ConnectionRuleProperties('fan_out',
+                                     random_fan_out_connection_rule,
+                                     {'number': 4}),
+            15, 10, random_seed=42)
+        self.sparse = SparseConnectivity.from_connectivity(self.connectivity)
+        self.conns = sorted(self.connectivity.connections())
+
+    def test_csr_csc(self):
+        indptr, indices = self.sparse.csr
+        self.assertEqual(len(indptr), 16)
+        self.assertEqual(len(self.sparse), len(self.conns))
+        self.assertEqual(sorted(self.sparse.connections()), self.conns)
+        for s in range(15):
+            self.assertEqual(
+                sorted(self.sparse.destinations_of(s).tolist()),
+                sorted(d for i, d in self.conns if i == s))
+        for d in range(10):
+            self.assertEqual(
+                sorted(self.sparse.sources_of(d).tolist()),
+                sorted(i for i, j in self.conns if j == d))
+        self.assertTrue((self.sparse.out_degrees() == 4).all())
+        self.assertEqual(self.sparse.in_degrees().tolist(),
+                         [sum(1 for _, j in self.conns if j == d)
+                          for d in range(10)])
+        self.assertEqual(self.sparse.in_degrees([3, 5]).tolist(),
+                         self.sparse.in_degrees()[[3, 5]].tolist())
+        self.assertRaises(ValueError, indices.__setitem__, 0, 1)
+
+    def test_degree_stats(self):
+        stats = self.sparse.degree_stats()
+        self.assertEqual(stats.in_degrees.tolist(),
+                         self.sparse.in_degrees().tolist())
+        self.assertTrue((stats.out_degrees == 4).all())
+        inverse_stats = InverseConnectivity(self.connectivity).degree_stats()
+        self.assertEqual(inverse_stats.out_degrees.tolist(),
+                         stats.in_degrees.tolist())
+        self.assertEqual(inverse_stats.in_degrees.tolist(),
+                         stats.out_degrees.tolist())
+
+    def test_filtering(self):
+        self.assertEqual(
+            sorted(self.sparse.connections(source_indices=[2, 7],
+                                           destination_indices=range(5))),
+            [(s, d) for s, d in self.conns if s in (2, 7) and d < 5])
+
+    def test_clone(self):
+        clone = self.sparse.clone()
+        self.assertEqual(clone, self.sparse)
+        self.assertTrue(clone.equals(self.sparse))
+        self.assertEqual(clone.key, self.sparse.key)
+        self.assertIs(clone.csr[1].base, self.sparse.csr[1].base)
+
+    def test_equality(self):
+        indptr, indices = self.sparse.csr
+        changed = indices.copy()
+        changed[0] = (changed[0] + 1) % 10
+        other = SparseConnectivity(self.sparse.rule_properties, 15, 10,
+                                   indptr, changed)
+        # Connectivities with the same rule and sizes but different
+        # connections aren't equal, and neither are their clones
+        self.assertNotEqual(other, self.sparse)
+        self.assertNotEqual(other.clone(), self.sparse.clone())
+        self.assertFalse(other.equals(self.sparse))
+        self.assertNotEqual(other.key, self.sparse.key)
+        self.assertEqual(
+            SparseConnectivity(self.sparse.rule_properties, 15, 10,
+                               indptr.copy(), indices.copy()),
+            self.sparse)
+        self.assertNotEqual(self.sparse, self.connectivity)
+
+    def test_inverse(self):
+        inverse = InverseConnectivity(self.connectivity)
+        self.assertEqual(inverse.source_size, 10)
+        self.assertEqual(inverse.destination_size, 15)
+        self.assertEqual(sorted(inverse.connections()),
+                         sorted((d, s) for s, d in self.conns))
+        # Check the inverse is a view of the sampled connectivity
+        self.assertIs(inverse.csr[1], inverse.sparse.csc[1])
+        self.assertIs(inverse.csc[1], inverse.sparse.csr[1])
+        self.assertEqual(inverse.out_degrees().tolist(),
+                         self.sparse.in_degrees().tolist())
+        self.assertEqual(
+            sorted(inverse.destinations_of(3).tolist()),
+            sorted(self.sparse.sources_of(3).tolist()))
+        self.assertEqual(
+            sorted(inverse.connections(destination_indices=[1, 4])),
+            sorted((d, s) for s, d in self.conns if s in (1, 4)))
+        self.assertEqual(InverseConnectivity(self.sparse).sparse, self.sparse)
+
+    def test_to_scipy_sparse(self):
+        try:
+            import scipy.sparse
+        except ImportError:
+            self.assertRaises(NineMLUsageError, self.sparse.to_scipy_sparse)
+            return
+        for fmt in ('csr', 'csc'):
+            matrix = self.sparse.to_scipy_sparse(format=fmt)
+            self.assertTrue(scipy.sparse.issparse(matrix))
+            self.assertEqual(matrix.shape, (15, 10))
+            self.assertEqual(matrix.sum(), len(self.conns))
+            self.assertEqual(
+                InverseConnectivity(self.sparse).to_scipy_sparse(
+                    format=fmt).shape, (10, 15))
+
+
+class ConnectivityCache_test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.rule_props = ConnectionRuleProperties(
+            'prob', probabilistic_connection_rule, {'probability': 0.1})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load(self):
+        cache = ConnectivityCache(self.tmp_dir)
+        connectivity = Connectivity(self.rule_props, 100, 80,
+                                    random_seed=11, cache=cache)
+        src, dest = connectivity.connection_arrays()
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 1)
+        # Check the connections are memory-mapped from the cache
+        cached = Connectivity(self.rule_props, 100, 80, random_seed=11,
+                              cache=cache)
+        cached_src, cached_dest = cached.connection_arrays()
+        self.assertIsInstance(cached_src.base, numpy.memmap)
+        self.assertTrue(numpy.array_equal(src, cached_src))
+        self.assertTrue(numpy.array_equal(dest, cached_dest))
+        self.assertEqual(cached.num_connections(), len(src))
+        # Filtered queries bypass the cache
+        self.assertEqual(
+            list(cached.connections(destination_indices=[3])),
+            [(s, d) for s, d in zip(src.tolist(), dest.tolist()) if d == 3])
+
+    def test_content_hash(self):
+        cache = ConnectivityCache(self.tmp_dir)
+        connectivity = Connectivity(self.rule_props, 100, 80,
+                                    random_seed=11, engine='vectorized')
+        key = cache.content_hash(connectivity)
+        self.assertEqual(key, cache.content_hash(
+            connectivity.clone(random_seeds=True)))
+        for other in (
+                Connectivity(self.rule_props, 100, 80, random_seed=12),
+                Connectivity(self.rule_props, 100, 81, random_seed=11),
+                Connectivity(self.rule_props, 100, 80, random_seed=11),
+                Connectivity(self.rule_props, 100, 80, random_seed=11,
+                             engine='vectorized', sampling='geometric'),
+                Connectivity(ConnectionRuleProperties(
+                    'prob', probabilistic_connection_rule,
+                    {'probability': 0.2}), 100, 80, random_seed=11)):
+            self.assertNotEqual(key, cache.content_hash(other))
+
+    def test_content_hash_memoized(self):
+        cache = ConnectivityCache(self.tmp_dir)
+        connectivity = Connectivity(self.rule_props, 100, 80,
+                                    random_seed=11, cache=cache)
+        key = cache.content_hash(connectivity)
+        with patch('nineml.user.connectivity_cache.hashlib.sha256') as sha256:
+            self.assertEqual(cache.content_hash(connectivity), key)
+            src, _ = connectivity.connection_arrays()
+            # Storing the connections again replaces the existing file
+            cache.store(connectivity, src, src)
+            self.assertEqual(connectivity.num_connections(), len(src))
+        self.assertFalse(sha256.called)
+        self.assertTrue(numpy.array_equal(cache.load(connectivity)[1], src))
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 1)
+
+    def test_eviction(self):
+        connectivities = [Connectivity(self.rule_props, 100, 80,
+                                       random_seed=i) for i in range(4)]
+        cache = ConnectivityCache(self.tmp_dir)
+        connectivities[0]._cache = cache
+        connectivities[0].connection_arrays()
+        file_size = cache.size
+        cache = ConnectivityCache(self.tmp_dir,
+                                  max_bytes=int(file_size * 2.5))
+        cache.clear()
+        for i, connectivity in enumerate(connectivities):
+            connectivity._cache = cache
+            connectivity.connection_arrays()
+            # Mark the first connectivity as recently used
+            os.utime(cache.path(connectivities[0]), (i + 1e9, i + 1e9))
+            if i:
+                os.utime(cache.path(connectivity), (i + 1e8, i + 1e8))
+        self.assertLessEqual(cache.size, file_size * 2.5)
+        self.assertTrue(os.path.exists(cache.path(connectivities[0])))
+        self.assertTrue(os.path.exists(cache.path(connectivities[3])))
+        self.assertFalse(os.path.exists(cache.path(connectivities[1])))
+
+    def test_default_cache(self):
+        cache = ConnectivityCache(self.tmp_dir)
+        Connectivity.default_cache = cache
+        try:
+            connectivity = Connectivity(self.rule_props, 10, 10)
+        finally:
+            Connectivity.default_cache = None
+        self.assertIs(connectivity.cache, cache)
+        self.assertIs(connectivity.clone().cache, cache)
+
+
+class ExplicitIndices_test(unittest.TestCase):
+
+    def setUp(self):
+        self.rule_props = ConnectionRuleProperties(
+            'explicit_props', explicit_connection_rule,
+            {'sourceIndices': numpy.array([0, 2, 2, 5], dtype=numpy.int32),
+             'destinationIndices': [1, 1, 3, 0]})
+
+    def test_integer_values(self):
+        for name in ('sourceIndices', 'destinationIndices'):
+            value = self.rule_props.property(name).value
+            self.assertTrue(value.is_integer())
+            self.assertEqual(value.values.dtype, numpy.int64)
+        clone = self.rule_props.clone()
+        self.assertTrue(
+            clone.property('destinationIndices').value.is_integer())
+        self.assertEqual(clone, self.rule_props)
+        connectivity = Connectivity(self.rule_props, 6, 6)
+        self.assertEqual(list(connectivity.connections()),
+                         [(0, 1), (2, 1), (2, 3), (5, 0)])
+        # Float indices are still accepted
+        float_props = ConnectionRuleProperties(
+            'explicit_props', explicit_connection_rule,
+            {'sourceIndices': [0.0, 2.0, 2.0, 5.0],
+             'destinationIndices': [1.0, 1.0, 3.0, 0.0]})
+        self.assertEqual(float_props, self.rule_props)
+        self.assertEqual(list(Connectivity(float_props, 6, 6).connections()),
+                         list(connectivity.connections()))
+
+    def test_serialization(self):
+        document = Document(self.rule_props, explicit_connection_rule)
+        for fmt in ('xml', 'yaml', 'dict'):
+            serialized = self.rule_props.serialize(format=fmt, version=2,
+                                                   document=document)
+            unserialized = ConnectionRuleProperties.unserialize(
+                serialized, format=fmt, version=2, document=document)
+            value = unserialized.property('sourceIndices').value
+            self.assertTrue(value.is_integer(), fmt)
+            self.assertEqual(value.values.tolist(), [0, 2, 2, 5])
+
+
+class DistanceDependent_test(unittest.TestCase):
+
+    def setUp(self):
+        rng = numpy.random.RandomState(11)
+        self.src_pos = rng.uniform(0.0, 1000.0, (120, 3))
+        self.dest_pos = rng.uniform(0.0, 1000.0, (90, 3))
+        self.connectivity = self._connectivity(self.src_pos, self.dest_pos)
+
+    def _connectivity(self, src_pos, dest_pos, **kwargs):
+        if 'rng_cls' not in kwargs:
+            kwargs.setdefault('engine', 'vectorized')
+        return Connectivity(
+            ConnectionRuleProperties(
+                'distance_dependent_props',
+                distance_dependent_connection_rule,
+                {'sourcePositions': un.Quantity(src_pos.ravel(), un.um),
+                 'destinationPositions': un.Quantity(dest_pos.ravel(),
+                                                     un.um),
+                 'probability': 0.9,
+                 'lengthScale': 100.0 * un.um,
+                 'maximumDistance': 0.02 * un.cm}),
+            len(src_pos), len(dest_pos), random_seed=123, **kwargs)
+
+    def test_matches_all_pairs(self):
+        # Compare with evaluating the kernel on every candidate pair
+        dists = numpy.sqrt(((self.src_pos[None, :, :] -
+                             self.dest_pos[:, None, :]) ** 2).sum(axis=2))
+        probs = 0.9 * numpy.exp(-dists ** 2 / (2 * 100.0 ** 2))
+        uniforms = _stream_uniforms(self.connectivity._stream_key,
+                                    numpy.arange(90)[:, None],
+                                    numpy.arange(120)[None, :])
+        dest, src = numpy.nonzero((dists <= 200.0) & (uniforms < probs))
+        conn_src, conn_dest = self.connectivity.connection_arrays()
+        self.assertTrue(len(src))
+        self.assertEqual(conn_src.tolist(), src.tolist())
+        self.assertEqual(conn_dest.tolist(), dest.tolist())
+        # The candidates are restricted to the neighbouring grid cells
+        self.assertLess(self.connectivity._row_layout()[1], 120)
+
+    def test_blocks_and_filtering(self):
+        src, dest = self.connectivity.connection_arrays()
+        blocks = list(self.connectivity.iter_blocks(block_size=200))
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(
+            numpy.concatenate([s for s, _ in blocks]).tolist(), src.tolist())
+        f_src, f_dest = self.connectivity.connection_arrays(
+            source_indices=range(0, 120, 3), destination_indices=[4, 8, 50])
+        selected = (src % 3 == 0) & numpy.isin(dest, [4, 8, 50])
+        self.assertEqual(f_src.tolist(), src[selected].tolist())
+        self.assertEqual(f_dest.tolist(), dest[selected].tolist())
+
+    def test_rng_cls(self):
+        connectivity = self._connectivity(self.src_pos, self.dest_pos,
+                                          rng_cls=random.Random)
+        conns = list(connectivity.connections())
+        self.assertEqual(conns, list(self._connectivity(
+            self.src_pos, self.dest_pos,
+            rng_cls=random.Random).connections()))
+        for s, d in conns:
+            self.assertLessEqual(
+                numpy.sqrt(((self.src_pos[s] - self.dest_pos[d]) ** 2).sum()),
+                200.0)
+
+    def test_mismatched_positions(self):
+        connectivity = self._connectivity(self.src_pos[:, :2],
+                                          self.dest_pos)
+        self.assertRaises(NineMLUsageError, connectivity.connection_arrays)
@@ -2,6 +2,7 @@ from __future__ import division
 from builtins import zip
 from builtins import next
 from builtins import range
+import sys
 import unittest
 from string import ascii_lowercase
 from itertools import chain, cycle, repeat
@@ -245,7 +246,7 @@ class TestValues(unittest.TestCase):
 
     def test_array_value_inline_operators(self):
         for array_val in array_values:
-            np_val = np.asarray(array_val)
+            np_val = np.array(array_val)  # values are read-only
             np_array_val = ArrayValue(np.asarray(array_val))
             for i, (op, val) in enumerate(zip(
                     self.iops, cycle(single_values))):
@@ -306,6 +307,75 @@ class TestValues(unittest.TestCase):
                 np_array_val = nv_result
                 np_val = np_result
 
+    def test_array_value_storage(self):
+        values = np.arange(10, dtype=float)
+        array_val = ArrayValue(values)
+        self.assertIsNot(array_val.values, values)
+        self.assertEqual(array_val.values.dtype, np.float64)
+        self.assertFalse(array_val.values.flags.writeable)
+        self.assertTrue(array_val.values.flags.c_contiguous)
+        self.assertRaises(ValueError, array_val.values.__setitem__, 0, 1.0)
+        # Lists are stored as arrays too
+        list_val = ArrayValue([1.0, 2.5, 3.0])
+        self.assertIsInstance(list_val.values, np.ndarray)
+        self.assertEqual(list_val.values.dtype, np.float64)
+        # NumPy can use the values without copying
+        self.assertIs(np.asarray(array_val), array_val.values)
+        self.assertEqual(memoryview(array_val.values).nbytes, 80)
+        # Slices are views onto the same memory
+        sliced = array_val[2:5]
+        self.assertIsInstance(sliced, ArrayValue)
+        self.assertEqual(sliced.values.tolist(), [2.0, 3.0, 4.0])
+        self.assertTrue(np.shares_memory(sliced.values, array_val.values))
+        self.assertEqual(array_val[3], 3.0)
+        # Lists of integers are stored as int64 arrays
+        int_val = ArrayValue([1, 2, 3])
+        self.assertEqual(int_val.values.dtype, np.int64)
+        self.assertEqual(int_val, ArrayValue([1.0, 2.0, 3.0]))
+
+    @unittest.skipIf(sys.version_info < (3, 12),
+                     "__buffer__ is only used by Python >= 3.12")
+    def test_array_value_buffer(self):
+        array_val = ArrayValue(np.arange(10, dtype=float))
+        view = memoryview(array_val)
+        self.assertTrue(view.readonly)
+        self.assertEqual(view.format, 'd')
+        self.assertEqual(view.nbytes, 80)
+        self.assertTrue(np.shares_memory(np.frombuffer(view),
+                                         array_val.values))
+        view.release()
+
+    def test_array_value_digest(self):
+        values = np.random.RandomState(1).uniform(size=1000)
+        array_val = ArrayValue(values)
+        # Values that differ by less than the rounding tolerance are equal
+        # and have the same digest, key and hash
+        nearly = ArrayValue(values * (1.0 + 1e-17))
+        self.assertEqual(array_val.digest(), nearly.digest())
+        self.assertEqual(array_val.key, nearly.key)
+        self.assertEqual(hash(array_val), hash(nearly))
+        self.assertEqual(array_val, nearly)
+        self.assertEqual(ArrayValue([0.0, 1.0]), ArrayValue([-0.0, 1.0]))
+        self.assertEqual(hash(ArrayValue([0.0, 1.0])),
+                         hash(ArrayValue([-0.0, 1.0])))
+        # Integer and float arrays with the same values are equal
+        self.assertEqual(ArrayValue(np.arange(10)),
+                         ArrayValue(np.arange(10, dtype=float)))
+        self.assertEqual(hash(ArrayValue(np.arange(10))),
+                         hash(ArrayValue(np.arange(10, dtype=float))))
+        # Arrays that share the same first values have different keys
+        changed = values.copy()
+        changed[-1] += 0.5
+        self.assertNotEqual(array_val.key, ArrayValue(changed).key)
+        self.assertNotEqual(array_val, ArrayValue(changed))
+        self.assertNotEqual(array_val.key, ArrayValue(values[:-1]).key)
+        # Fewer places is a looser tolerance
+        close = ArrayValue(values * (1.0 + 1e-9))
+        self.assertNotEqual(array_val.digest(), close.digest())
+        self.assertEqual(array_val.digest(places=5), close.digest(places=5))
+        # The digest is memoized
+        self.assertIs(array_val.digest(), array_val.digest())
+
 
 class TestExpressions(unittest.TestCase):
 
@@ -1,8 +1,17 @@
-from future import standard_library
-standard_library.install_aliases()
 import pickle as pkl
+import os.path
+import shutil
+import tempfile
 import unittest
+import numpy
 from nineml.utils.comprehensive_example import instances_of_all_types
+from nineml.values import ArrayValue
+import nineml.units as un
+from nineml.units import Quantity
+from nineml.abstraction.connectionrule import (
+    explicit_connection_rule, random_fan_out_connection_rule)
+from nineml.user.connectionrule import (
+    ConnectionRuleProperties, Connectivity, SparseConnectivity)
 
 
 class TestPickle(unittest.TestCase):
@@ -12,3 +21,91 @@ class TestPickle(unittest.TestCase):
             pkl_str = pkl.dumps(obj)
             unpickled = pkl.loads(pkl_str)
             self.assertEqual(obj, unpickled)
+
+    def test_pickle_out_of_band(self):
+        for obj in instances_of_all_types:
+            buffers = []
+            pkl_str = pkl.dumps(obj, protocol=5,
+                                buffer_callback=buffers.append)
+            unpickled = pkl.loads(pkl_str, buffers=buffers)
+            self.assertEqual(obj, unpickled)
+
+
+class TestPickleArrays(unittest.TestCase):
+
+    size = 100000
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def _dumps_out_of_band(self, obj):
+        buffers = []
+        pkl_str = pkl.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        return pkl_str, buffers
+
+    def test_array_value(self):
+        array_value = ArrayValue(numpy.arange(self.size, dtype=float))
+        pkl_str, buffers = self._dumps_out_of_band(array_value)
+        # The values are not copied into the pickle stream
+        self.assertLess(len(pkl_str), 1000)
+        self.assertEqual(len(buffers), 1)
+        unpickled = pkl.loads(pkl_str, buffers=buffers)
+        self.assertEqual(unpickled, array_value)
+        self.assertFalse(unpickled.values.flags.writeable)
+        self.assertTrue(numpy.shares_memory(unpickled.values,
+                                            numpy.asarray(buffers[0])))
+        # Values are still read-only when pickled with older protocols
+        for protocol in (2, 4, 5):
+            unpickled = pkl.loads(pkl.dumps(array_value, protocol=protocol))
+            self.assertEqual(unpickled, array_value)
+            self.assertFalse(unpickled.values.flags.writeable)
+
+    def test_memory_mapped_array_value(self):
+        path = os.path.join(self._tmp_dir, 'values.npy')
+        numpy.save(path, numpy.arange(self.size, dtype=float))
+        array_value = ArrayValue(datafile=(path, None, None))
+        self.assertEqual(array_value[10], 10.0)
+        # Memory-mapped values are mapped again when unpickled
+        pkl_str, buffers = self._dumps_out_of_band(array_value)
+        self.assertLess(len(pkl_str), 1000)
+        self.assertEqual(len(buffers), 0)
+        unpickled = pkl.loads(pkl_str)
+        self.assertFalse(unpickled.is_loaded())
+        self.assertEqual(unpickled, array_value)
+
+    def test_connectivity(self):
+        # NB: the rules and units are cloned as they are otherwise pickled
+        # with the documents they have been added to in other tests
+        unitless = un.unitless.clone()
+        connectivity = Connectivity(
+            ConnectionRuleProperties(
+                'explicit_props', explicit_connection_rule.clone(),
+                {'sourceIndices': Quantity(numpy.arange(self.size) % 100,
+                                           unitless),
+                 'destinationIndices': Quantity(numpy.arange(self.size) % 70,
+                                                unitless)}),
+            100, 70)
+        connectivity.connection_arrays()  # Cache the explicit indices
+        pkl_str, buffers = self._dumps_out_of_band(connectivity)
+        self.assertLess(len(pkl_str), 10000)
+        self.assertEqual(len(buffers), 2)  # The indices are not duplicated
+        unpickled = pkl.loads(pkl_str, buffers=buffers)
+        self.assertEqual(list(unpickled.connections()),
+                         list(connectivity.connections()))
+        sparse = SparseConnectivity.from_connectivity(Connectivity(
+            ConnectionRuleProperties('fan_out',
+                                     random_fan_out_connection_rule.clone(),
+                                     {'number': Quantity(100, unitless)}),
+            1000, 1000, random_seed=42))
+        sparse.csc  # Not pickled as it is regenerated on demand
+        pkl_str, buffers = self._dumps_out_of_band(sparse)
+        self.assertLess(len(pkl_str), 10000)
+        self.assertEqual(len(buffers), 2)
+        unpickled = pkl.loads(pkl_str, buffers=buffers)
+        for orig, new in zip(sparse.csr + sparse.csc,
+                             unpickled.csr + unpickled.csc):
+            self.assertTrue(numpy.array_equal(orig, new))
+            self.assertFalse(new.flags.writeable)
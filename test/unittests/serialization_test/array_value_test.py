@@ -0,0 +1,171 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+import numpy
+import nineml
+import nineml.units as un
+from nineml import Document
+from nineml.values import ArrayValue
+from nineml.user import ConnectionRuleProperties
+from nineml.abstraction.connectionrule import (
+    explicit_connection_rule, probabilistic_connection_rule)
+from nineml.serialization import ext_to_format
+
+
+format_to_ext = dict((v, k) for k, v in ext_to_format.items())
+
+
+class TestArrayValueSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self.probs = numpy.random.RandomState(1).uniform(size=1000)
+        self.explicit = ConnectionRuleProperties(
+            'explicit_props', explicit_connection_rule,
+            {'sourceIndices': numpy.arange(1000) % 7,
+             'destinationIndices': numpy.arange(1000) % 11})
+        self.probabilistic = ConnectionRuleProperties(
+            'probabilistic_props', probabilistic_connection_rule,
+            {'probability': un.Quantity(ArrayValue(self.probs),
+                                        un.unitless)})
+        self.document = Document(self.explicit, self.probabilistic,
+                                 explicit_connection_rule,
+                                 probabilistic_connection_rule)
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def _check(self, document, msg):
+        probs = document['probabilistic_props'].property('probability').value
+        self.assertEqual(probs.values.dtype, numpy.float64, msg)
+        # The floats are written exactly
+        self.assertTrue(numpy.array_equal(probs.values, self.probs), msg)
+        sources = document['explicit_props'].property('sourceIndices').value
+        self.assertTrue(sources.is_integer(), msg)
+        self.assertEqual(sources.values.tolist(),
+                         (numpy.arange(1000) % 7).tolist(), msg)
+
+    def test_roundtrip(self):
+        # NB: JSON is written with the same base64 encoding as YAML
+        for format in ('xml', 'yaml', 'hdf5'):  # @ReservedAssignment
+            ext = format_to_ext[format]
+            for compact_arrays in (True, False):
+                url = os.path.join(self._tmp_dir, 'test{}{}'.format(
+                    compact_arrays, ext))
+                nineml.write(url, self.document, format=format, version=2,
+                             compact_arrays=compact_arrays)
+                self._check(nineml.read(url, reload=True),
+                            '{} (compact={})'.format(format, compact_arrays))
+
+    def test_encodings(self):
+        serialized = self.probabilistic.serialize(
+            format='xml', version=2, document=self.document)
+        value = serialized.find('.//{*}ArrayValue')
+        self.assertEqual(value.attrib['encoding'], 'base64')
+        self.assertEqual(value.attrib['dtype'], 'float64')
+        self.assertEqual(len(value), 0)  # No ArrayValueRow elements
+        serialized = self.probabilistic.serialize(
+            format='dict', version=2, document=self.document)
+        value = serialized['ConnectionRuleProperties']['Property'][0][
+            'Quantity']['ArrayValue']
+        self.assertEqual(value['encoding'], 'list')
+        self.assertEqual(value['@body'], self.probs.tolist())
+        unserialized = ConnectionRuleProperties.unserialize(
+            serialized, format='dict', version=2, document=self.document)
+        self.assertEqual(unserialized, self.probabilistic)
+        # Version 1 documents still use ArrayValueRow elements
+        serialized = self.probabilistic.serialize(
+            format='xml', version=1, document=self.document)
+        self.assertEqual(
+            len(serialized.findall('.//{*}ArrayValueRow')), 1000)
+
+    def test_hdf5_datasets(self):
+        import h5py
+        size = 100000
+        values = numpy.random.RandomState(2).uniform(size=size)
+        document = Document(
+            ConnectionRuleProperties(
+                'probabilistic_props', probabilistic_connection_rule,
+                {'probability': un.Quantity(ArrayValue(values),
+                                            un.unitless)}),
+            probabilistic_connection_rule)
+        # Version 1 documents only store arrays in datasets if requested
+        for version, kwargs in ((1, {'compact_arrays_v1': True}), (2, {})):
+            url = os.path.join(self._tmp_dir, 'large{}.h5'.format(version))
+            nineml.write(url, document, version=version, **kwargs)
+            # Arrays are stored in chunked, compressed datasets (instead of a
+            # group per element)
+            with h5py.File(url, 'r') as f:
+                datasets = []
+                f.visititems(lambda _, o: datasets.append(o)
+                             if isinstance(o, h5py.Dataset) else None)
+                self.assertEqual(len(datasets), 1)
+                self.assertEqual(datasets[0].compression, 'gzip')
+                self.assertIsNotNone(datasets[0].chunks)
+            reread = nineml.read(url, reload=True)
+            # The dataset is only read when the values are accessed
+            value = reread['probabilistic_props'].property('probability').value
+            self.assertFalse(value.is_loaded())
+            self.assertEqual(len(value), size)
+            self.assertEqual(value[10], values[10])
+            self.assertEqual(value[-1], values[-1])
+            self.assertTrue(numpy.array_equal(value[100:200:3].values,
+                                              values[100:200:3]))
+            self.assertTrue(numpy.array_equal(value[200:100:-3].values,
+                                              values[200:100:-3]))
+            self.assertFalse(value.is_loaded())
+            self.assertTrue(numpy.array_equal(value.values, values))
+            self.assertTrue(value.is_loaded())
+
+    def test_hdf5_v1_layout(self):
+        import h5py
+        # The layout of version 1 documents is unchanged by default
+        url = os.path.join(self._tmp_dir, 'v1.h5')
+        nineml.write(url, self.document, version=1)
+        with h5py.File(url, 'r') as f:
+            datasets = []
+            f.visititems(lambda _, o: datasets.append(o)
+                         if isinstance(o, h5py.Dataset) else None)
+            self.assertEqual(datasets, [])
+        self._check(nineml.read(url, reload=True), 'hdf5 (version 1)')
+
+    def test_empty(self):
+        empty = ArrayValue([])
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.key, ArrayValue(numpy.array([])).key)
+        self.assertEqual(hash(empty), hash(ArrayValue(numpy.array([]))))
+        self.assertEqual(empty, ArrayValue(numpy.array([], dtype=int)))
+        self.assertNotEqual(empty, ArrayValue([0.0]))
+        props = ConnectionRuleProperties(
+            'probabilistic_props', probabilistic_connection_rule,
+            {'probability': un.Quantity(empty, un.unitless)})
+        clone = props.clone()
+        self.assertTrue(props.equals(clone), props.find_mismatch(clone))
+        self.assertEqual(hash(props), hash(clone))
+
+    def test_relative_datafile(self):
+        numpy.save(os.path.join(self._tmp_dir, 'probs.npy'), self.probs)
+        document = Document(
+            ConnectionRuleProperties(
+                'probabilistic_props', probabilistic_connection_rule,
+                {'probability': un.Quantity(
+                    ArrayValue(datafile=('probs.npy', None, None)),
+                    un.unitless)}),
+            probabilistic_connection_rule)
+        url = os.path.join(self._tmp_dir, 'doc.xml')
+        nineml.write(url, document, version=2)
+        reread = nineml.read(url, reload=True)
+        value = reread['probabilistic_props'].property('probability').value
+        # The url is kept as written and only resolved from the directory of
+        # the document when the values are loaded
+        self.assertEqual(value.url, 'probs.npy')
+        self.assertEqual(value.datafile_path,
+                         os.path.join(self._tmp_dir, 'probs.npy'))
+        self.assertTrue(numpy.array_equal(value.values, self.probs))
+        self.assertEqual(value.clone().datafile_path, value.datafile_path)
+        # so the document is written back unchanged
+        rewritten = os.path.join(self._tmp_dir, 'rewritten.xml')
+        nineml.write(rewritten, reread, version=2)
+        with open(url) as f, open(rewritten) as f2:
+            self.assertEqual(f.read(), f2.read())
@@ -0,0 +1,97 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+import numpy
+import nineml
+from nineml.abstraction import Dynamics
+from nineml.utils.comprehensive_example import (
+    instances_of_all_types, v1_safe_docs, doc1)
+from nineml.serialization.binary import encode, decode
+from nineml.exceptions import NineMLSerializationError
+
+
+class TestBinaryFormat(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def test_write_read_roundtrip(self):
+        for version in (1.0, 2.0):
+            if version == 1.0:
+                docs = v1_safe_docs
+            else:
+                docs = list(instances_of_all_types['NineML'].values())
+            for i, document in enumerate(docs):
+                doc = document.clone()
+                url = os.path.join(self._tmp_dir,
+                                   'test{}v{}.9mlb'.format(i, version))
+                nineml.write(url, doc, version=version)
+                reread_doc = nineml.read(url, reload=True)
+                self.assertTrue(doc.equals(reread_doc),
+                                doc.find_mismatch(reread_doc))
+
+    def test_validate(self):
+        url = os.path.join(self._tmp_dir, 'validate.9mlb')
+        nineml.write(url, doc1.clone(), version=2)
+        xml_url = os.path.join(self._tmp_dir, 'validate.xml')
+        nineml.write(xml_url, doc1.clone(), version=2)
+        # Binary files are validated when they are read unless opted out of
+        for kwargs, validated in (({}, True), ({'validate': False}, False)):
+            with patch.object(Dynamics, 'validate') as validate:
+                reread_doc = nineml.read(url, reload=True, **kwargs)
+                list(reread_doc.elements)
+            self.assertEqual(validate.called, validated)
+        # but are still equal to documents read from validated formats
+        xml_doc = nineml.read(xml_url, reload=True)
+        self.assertTrue(xml_doc.equals(reread_doc),
+                        xml_doc.find_mismatch(reread_doc))
+
+    def test_encode_decode(self):
+        tree = OrderedDict([
+            ('name', 'a'), ('repeated', ['a', 'a', u'α', '']),
+            ('none', None), ('flags', [True, False, numpy.bool_(True)]),
+            ('numbers', [0, -1, 2 ** 63 - 1, -2 ** 70, 1.5, float('inf'),
+                         numpy.float64(0.1), numpy.int32(7)]),
+            ('child', {'@body': numpy.arange(5, dtype=numpy.int64)}),
+            ('floats', numpy.linspace(0.0, 1.0, 7))])
+        data = encode(tree)
+        decoded = decode(data)
+        self.assertEqual(list(decoded.keys()), list(tree.keys()))
+        self.assertEqual(decoded['repeated'], tree['repeated'])
+        self.assertIsNone(decoded['none'])
+        self.assertEqual(decoded['flags'], [True, False, True])
+        self.assertEqual(decoded['numbers'], [0, -1, 2 ** 63 - 1, -2 ** 70,
+                                              1.5, float('inf'), 0.1, 7])
+        for name, array in (('floats', tree['floats']),
+                            ('child', tree['child']['@body'])):
+            value = decoded[name]
+            if name == 'child':
+                value = value['@body']
+            self.assertEqual(value.dtype, array.dtype)
+            self.assertTrue(numpy.array_equal(value, array))
+            self.assertFalse(value.flags.writeable)
+        # Repeated strings are only stored once
+        self.assertEqual(data.count(b'repeated'), 1)
+        self.assertLess(len(encode(['name'] * 100)),
+                        len(encode(['name'])) + 100 * 5 + 1)
+
+    def test_corrupt(self):
+        data = encode({'a': [1.0, 2.0]})
+        for corrupt in (b'NOT9' + data[4:], data[:-3], data + b'\x00',
+                        data[:5] + b'\xff' + data[6:]):
+            self.assertRaises(NineMLSerializationError, decode, corrupt)
+        # Arrays with object dtypes or misaligned lengths
+        data = encode({'a': numpy.arange(3, dtype=numpy.int64)})
+        start = data.index(b'<i8')
+        for corrupt in (data.replace(b'<i8', b'|O8'),
+                        data[:start + 3] + (23).to_bytes(8, 'little') +
+                        data[start + 11:-1]):
+            self.assertRaises(NineMLSerializationError, decode, corrupt)
+        self.assertRaises(NineMLSerializationError, encode,
+                          {'a': numpy.array(['a', 'b'])})
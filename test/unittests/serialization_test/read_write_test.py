@@ -2,9 +2,20 @@ from __future__ import unicode_literals
 import unittest
 import tempfile
 import os
+import shutil
+from unittest.mock import patch
+import numpy
+import nineml.units as un
 from nineml import read, write
-from nineml import DynamicsProperties
-from nineml.utils.comprehensive_example import dynA, dynB
+from nineml import Document, DynamicsProperties
+from nineml.values import ArrayValue
+from nineml.user import ConnectionRuleProperties
+from nineml.abstraction.connectionrule import probabilistic_connection_rule
+from nineml.utils.comprehensive_example import dynA, dynB, doc1
+from nineml.serialization.xml import StreamedElement, XMLUnserializer
+from nineml.serialization.cache import load_snapshot, snapshot_path
+from nineml.serialization.parallel import element_dependencies
+from nineml.exceptions import NineMLSerializationError, NineMLUsageError
 
 
 class TestReadWrite(unittest.TestCase):
@@ -23,3 +34,144 @@ class TestReadWrite(unittest.TestCase):
             definition='{}#dynB'.format(os.path.join(tmp_dir, self.tmp_path)),
             properties={'P1': 1, 'P2': 2, 'P3': 3})
         self.assertEqual(dynB, dynBProps.component_class)
+
+
+class TestStreamingRead(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def test_streaming_read(self):
+        for version, pretty_print in ((1, True), (2, False)):
+            path = os.path.join(self._tmp_dir, 'doc{}.xml'.format(version))
+            write(path, doc1.clone(), version=version,
+                  pretty_print=pretty_print)
+            doc = read(path, register=False)
+            streamed = read(path, register=False, streaming=True)
+            # Only the document-level elements are indexed when read
+            unserializer = streamed._unserializer
+            self.assertTrue(all(
+                isinstance(e, StreamedElement)
+                for e, _ in unserializer._doc_elems.values()))
+            self.assertEqual(sorted(streamed.keys()), sorted(doc.keys()))
+            for name in doc.keys():
+                self.assertEqual(streamed[name], doc[name],
+                                 "Mismatch in '{}' ({}, {})".format(
+                                     name, version, pretty_print))
+
+    def test_streaming_unsupported(self):
+        path = os.path.join(self._tmp_dir, 'doc.json')
+        with open(path, 'w') as f:
+            f.write('{}')
+        self.assertRaises(NineMLSerializationError, read, path,
+                          streaming=True)
+
+
+class TestParallelRead(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self._tmp_dir, 'doc.xml')
+        write(self.path, doc1.clone(), version=2)
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def test_parallel_read(self):
+        doc = read(self.path, register=False)
+        parallel = read(self.path, register=False, workers=2)
+        self.assertEqual(sorted(parallel.keys()), sorted(doc.keys()))
+        for name in doc.keys():
+            self.assertEqual(parallel[name], doc[name],
+                             "Mismatch in '{}'".format(name))
+            # References between elements are resolved to the elements of
+            # the merged document
+            self.assertIs(parallel[name].document, parallel)
+        self.assertIs(parallel['dynPropA'].component_class,
+                      parallel['dynA'])
+        self.assertRaises(NineMLUsageError, read, self.path, register=False,
+                          workers=2, streaming=True)
+
+    def test_element_dependencies(self):
+        with open(self.path) as f:
+            unserializer = XMLUnserializer(f, url=self.path)
+        dependencies, sizes = element_dependencies(unserializer)
+        self.assertIn('dynA', dependencies['dynPropA'])
+        self.assertNotIn('dynPropA', dependencies['dynPropA'])
+        self.assertGreater(sizes['dynA'], sizes['dynPropA'])
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self._tmp_dir, 'cache')
+        self.defn_path = os.path.join(self._tmp_dir, 'defn.xml')
+        self.props_path = os.path.join(self._tmp_dir, 'props.xml')
+        write(self.defn_path, dynB.clone(), version=2)
+        write(self.props_path, DynamicsProperties(
+            name='dynBProps', definition='{}#dynB'.format(self.defn_path),
+            properties={'P1': 1, 'P2': 2, 'P3': 3}), version=2)
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def test_cache(self):
+        doc = read(self.props_path, register=False, cache_dir=self.cache_dir)
+        self.assertTrue(os.path.exists(snapshot_path(self.props_path,
+                                                     self.cache_dir)))
+        # The snapshot is loaded instead of unserializing the file again
+        with patch.object(XMLUnserializer, 'unserialize',
+                          side_effect=AssertionError('File was unserialized')):
+            cached = read(self.props_path, register=False,
+                          cache_dir=self.cache_dir)
+        self.assertEqual(cached, doc)
+        self.assertEqual(cached['dynBProps'].component_class, dynB)
+        self.assertEqual(cached.url, self.props_path)
+
+    def test_invalidation(self):
+        read(self.props_path, register=False, cache_dir=self.cache_dir)
+        with open(self.defn_path) as f:
+            defn_xml = f.read()
+        # Rewriting the referenced file without changing it doesn't
+        # invalidate the snapshot
+        with open(self.defn_path, 'w') as f:
+            f.write(defn_xml)
+        self.assertIsNotNone(load_snapshot(self.props_path, self.cache_dir))
+        # but changing it does
+        with open(self.defn_path, 'w') as f:
+            f.write(defn_xml.replace('dynB', 'dynB '))
+        self.assertIsNone(load_snapshot(self.props_path, self.cache_dir))
+
+    def test_datafile_invalidation(self):
+        datafile = os.path.join(self._tmp_dir, 'probs.npy')
+        numpy.save(datafile, numpy.linspace(0.0, 1.0, 10))
+        path = os.path.join(self._tmp_dir, 'probs.xml')
+        write(path, Document(
+            ConnectionRuleProperties(
+                'probabilistic_props', probabilistic_connection_rule,
+                {'probability': un.Quantity(
+                    ArrayValue(datafile=('probs.npy', None, None)),
+                    un.unitless)}),
+            probabilistic_connection_rule), version=2)
+        read(path, register=False, cache_dir=self.cache_dir)
+        self.assertIsNotNone(load_snapshot(path, self.cache_dir))
+        # Changing the data file of an array value invalidates the snapshot
+        numpy.save(datafile, numpy.linspace(0.0, 0.5, 10))
+        self.assertIsNone(load_snapshot(path, self.cache_dir))
+        doc = read(path, register=False, cache_dir=self.cache_dir)
+        self.assertEqual(doc['probabilistic_props'].property(
+            'probability').value.values[-1], 0.5)
+
+    def test_registration(self):
+        read(self.props_path, register=False, cache_dir=self.cache_dir)
+        Document.registry.pop(self.defn_path, None)
+        cached = load_snapshot(self.props_path, self.cache_dir)
+        # The documents referenced by the snapshot are registered so that
+        # they are reused when they are read again
+        defn_doc = cached['dynBProps'].component_class.document
+        self.assertIs(Document.registry[self.defn_path][0](), defn_doc)
+        self.assertIs(read(self.defn_path), defn_doc)
@@ -0,0 +1,72 @@
+import pickle as pkl
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+from nineml import Document
+from nineml.values import ArrayValue
+from nineml.units import Quantity
+import nineml.units as un
+from nineml.abstraction.connectionrule import explicit_connection_rule
+from nineml.user.connectionrule import ConnectionRuleProperties
+from nineml.shared import attach
+from nineml.exceptions import NineMLUsageError
+
+
+def _sum_values(array_value):
+    return float(array_value.values.sum()), array_value.values.flags.writeable
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    size = 100000
+
+    def setUp(self):
+        unitless = un.unitless.clone()
+        self.values = [numpy.arange(self.size, dtype=float) % 100,
+                       numpy.arange(self.size, dtype=float) % 70]
+        self.document = Document(ConnectionRuleProperties(
+            'explicit_props', explicit_connection_rule.clone(),
+            {'sourceIndices': Quantity(ArrayValue(self.values[0]), unitless),
+             'destinationIndices': Quantity(ArrayValue(self.values[1]),
+                                            unitless)}))
+        self.properties = [
+            self.document['explicit_props'].property(n)
+            for n in ('sourceIndices', 'destinationIndices')]
+        self.shared = None
+
+    def tearDown(self):
+        if self.shared is not None:
+            self.shared.unlink()
+
+    def test_share_arrays(self):
+        self.shared = self.document.share_arrays()
+        self.assertGreaterEqual(self.shared.size,
+                                sum(v.nbytes for v in self.values))
+        for prop, values in zip(self.properties, self.values):
+            shared_values = prop.value.values
+            self.assertFalse(shared_values.flags.writeable)
+            self.assertTrue(numpy.array_equal(shared_values, values))
+            # Shared values are pickled by reference to the block
+            pkl_str = pkl.dumps(prop.value, protocol=5)
+            self.assertLess(len(pkl_str), 1000)
+            unpickled = pkl.loads(pkl_str)
+            self.assertEqual(unpickled, prop.value)
+            self.assertFalse(unpickled.values.flags.writeable)
+        # Values that are already shared aren't shared again
+        with self.document.share_arrays() as empty:
+            self.assertEqual(empty.size, 1)
+
+    def test_workers(self):
+        self.shared = self.document.share_arrays()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(
+                _sum_values, [p.value for p in self.properties]))
+        self.assertEqual(results,
+                         [(float(v.sum()), False) for v in self.values])
+
+    def test_unlinked(self):
+        self.shared = self.document.share_arrays()
+        name = self.shared.name
+        self.shared.unlink()
+        self.shared = None
+        self.assertRaises(NineMLUsageError, attach, name)
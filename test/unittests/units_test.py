@@ -1,6 +1,10 @@
 import unittest
+import numpy
 from sympy import sympify
 from nineml import units as un
+from nineml.user import Property
+from nineml.values import ArrayValue, SingleValue
+from nineml.exceptions import NineMLDimensionError, NineMLUsageError
 from nineml.serialization.xml import XMLUnserializer
 
 
@@ -34,6 +38,55 @@ class TestUnitsDimensions(unittest.TestCase):
                 self.assertEqual(getattr(dim, abbrev), dim._dims[i])
                 self.assertEqual(getattr(dim, name), dim._dims[i])
 
+
+class TestUnitConversion(unittest.TestCase):
+
+    def test_conversion_factors(self):
+        self.assertEqual(un.conversion_factors(un.mV, un.V), (0.001, 0.0))
+        self.assertEqual(un.conversion_factors(un.s, un.ms), (1000, 0.0))
+        self.assertEqual(un.conversion_factors(un.degC, un.K), (1, 273.15))
+        self.assertIs(un.conversion_factors(un.mV, un.V),
+                      un.conversion_factors(un.mV, un.V))
+        self.assertRaises(NineMLDimensionError, un.conversion_factors,
+                          un.mV, un.ms)
+
+    def test_array_in_units(self):
+        values = numpy.arange(1000, dtype=float)
+        qty = un.Quantity(ArrayValue(values), un.mV)
+        converted = qty.in_units(un.V)
+        self.assertIsInstance(converted, ArrayValue)
+        self.assertTrue(numpy.allclose(converted.values, values / 1000.0))
+        self.assertFalse(converted.values.flags.writeable)
+        # Values that don't need to be converted are shared
+        self.assertIs(qty.in_units(un.mV), qty.value)
+        self.assertEqual((qty + 1.0 * un.V).value.values[0], 1000.0)
+        self.assertEqual(float(un.Quantity(SingleValue(20.0),
+                                           un.degC).in_units(un.K)), 293.15)
+        # Offsets aren't applied when adding/subtracting quantities
+        temp = un.Quantity(SingleValue(20.0), un.degC)
+        self.assertEqual(float((temp + 1.0 * un.K).value), 21.0)
+        self.assertEqual(float((temp - 1.0 * un.K).value), 19.0)
+        self.assertEqual(float((1.0 * un.K + temp).value), 21.0)
+
+    def test_convert_properties(self):
+        props = [Property('v_rest', ArrayValue([-65.0, -70.0]) * un.mV),
+                 Property('tau', 20.0 * un.ms),
+                 Property('count', 3.0 * un.unitless)]
+        by_dimension = un.convert_properties(props, [un.V, un.s])
+        self.assertEqual(list(by_dimension), ['count', 'tau', 'v_rest'])
+        self.assertEqual(by_dimension['v_rest'].units, un.V)
+        self.assertTrue(numpy.allclose(by_dimension['v_rest'].value.values,
+                                       [-0.065, -0.07]))
+        self.assertAlmostEqual(float(by_dimension['tau']), 0.02)
+        self.assertIs(by_dimension['count'], props[2].quantity)
+        by_name = un.convert_properties(props, {'tau': un.s})
+        self.assertEqual(by_name['v_rest'].units, un.mV)
+        self.assertEqual(by_name['tau'].units, un.s)
+        self.assertRaises(NineMLDimensionError, un.convert_properties,
+                          props, {'tau': un.mV})
+        self.assertRaises(NineMLUsageError, un.convert_properties,
+                          props, [un.V, un.mV])
+
 # FIXME: Currently the 'scale' attribute isn't supported, need to work out
 #        whether we want to do this or not.
 units_xml_str = """<?xml version="1.0" encoding="UTF-8"?>
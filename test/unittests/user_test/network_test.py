@@ -11,7 +11,11 @@ backend.
 """
 from __future__ import division
 import os.path
+import shutil
+import tempfile
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy
 from nineml.abstraction import ConnectionRule
 from nineml.abstraction import (
     Dynamics, Parameter, AnalogSendPort, AnalogReducePort, StateVariable,
@@ -22,7 +26,10 @@ from nineml.user import (
     DynamicsProperties, Population,
     Projection, ConnectionRuleProperties, RandomDistributionProperties,
     Network, Selection, Concatenate)
+from nineml.user.connectionrule import Connectivity
 from nineml.values import RandomDistributionValue
+from nineml import Document, read, write
+from nineml.utils.comprehensive_example import netA
 import nineml.units as un
 from nineml.exceptions import NineMLRandomDistributionDelayException
 
@@ -330,3 +337,93 @@ class TestNetwork(unittest.TestCase):
         scaled = self.model.scale(10 * self.order)
         scaled.resample_connectivity()
         self.assertTrue(scaled.connectivity_has_been_sampled())
+
+    def test_generate_connectivity(self):
+        scaled = self.model.scale(0.05)
+        for engine in Connectivity.engines:
+            scaled.resample_connectivity(engine=engine)
+            serial = scaled.generate_connectivity(n_workers=1)
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                parallel = scaled.generate_connectivity(executor=executor,
+                                                        block_size=1000)
+            self.assertEqual(set(parallel), set(scaled.projection_names))
+            for name, (src, dest) in serial.items():
+                self.assertTrue(numpy.array_equal(src, parallel[name][0]))
+                self.assertTrue(numpy.array_equal(dest, parallel[name][1]))
+                self.assertEqual(len(src), len(scaled.projection(name)))
+
+    def test_connectivity_summary(self):
+        scaled = self.model.scale(0.05)
+        summary = scaled.connectivity_summary()
+        self.assertEqual(set(summary), set(scaled.projection_names))
+        for proj in scaled.projections:
+            src, dest = proj.connectivity.connection_arrays()
+            stats = summary[proj.name]
+            self.assertEqual(stats['num_connections'], len(src))
+            self.assertEqual(stats['source_size'], proj.pre.size)
+            self.assertEqual(stats['destination_size'], proj.post.size)
+            self.assertEqual(
+                stats['max_in_degree'],
+                int(numpy.bincount(dest, minlength=proj.post.size).max()))
+
+    def test_random_seed(self):
+        net1 = self.model.scale(0.05)
+        net1.set_random_seed(42)
+        net2 = self.model.scale(0.05)
+        net2.set_random_seed(42)
+        seeds = [p.connectivity.random_seed for p in net1.projections]
+        self.assertEqual(len(set(seeds)), len(seeds))
+        # The connections don't depend on the order the projections are
+        # sampled in
+        conns1 = dict((p.name, p.connectivity.connection_arrays())
+                      for p in net1.projections)
+        conns2 = dict((p.name, p.connectivity.connection_arrays())
+                      for p in reversed(list(net2.projections)))
+        for name, (src, dest) in conns1.items():
+            self.assertTrue(numpy.array_equal(src, conns2[name][0]))
+            self.assertTrue(numpy.array_equal(dest, conns2[name][1]))
+        net2.set_random_seed(43)
+        self.assertNotEqual(
+            seeds, [p.connectivity.random_seed for p in net2.projections])
+
+    def test_random_seed_clone_roundtrip(self):
+        network = netA.clone()
+        network.set_random_seed(42)
+        conns = dict((p.name, p.connectivity.connection_arrays())
+                     for p in network.projections)
+        clone = network.clone()
+        self.assertEqual(clone.random_seeds, network.random_seeds)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            url = os.path.join(tmp_dir, 'network.xml')
+            write(url, Document(network.clone()), version=2)
+            reread = read(url, register=False)[network.name]
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(reread.random_seeds, network.random_seeds)
+        # The connectivity of the cloned and reread networks is seeded from
+        # the network seed so the same connections are generated
+        for net in (clone, reread):
+            for proj in net.projections:
+                src, dest = proj.connectivity.connection_arrays()
+                self.assertTrue(numpy.array_equal(src, conns[proj.name][0]))
+                self.assertTrue(numpy.array_equal(dest,
+                                                  conns[proj.name][1]))
+
+    def test_flatten_executor(self):
+        scaled = self.model.scale(0.05)
+        component_arrays, connection_groups = scaled.flatten()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            par_component_arrays, par_connection_groups = scaled.flatten(
+                executor=executor)
+        self.assertEqual(sorted(component_arrays, key=lambda c: c.name),
+                         sorted(par_component_arrays, key=lambda c: c.name))
+        self.assertEqual(connection_groups, par_connection_groups)
+
+    def test_connection_group_connections(self):
+        _, connection_groups = self.model.scale(0.05).flatten()
+        for conn_group in connection_groups:
+            conns = list(conn_group.connections())
+            self.assertEqual(
+                list(conn_group.connections(source_indices=[0, 1])),
+                [c for c in conns if c[0] in (0, 1)])
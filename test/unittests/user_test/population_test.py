@@ -3,6 +3,15 @@ import unittest
 from nineml import read
 from nineml.serialization.xml import XMLUnserializer
 from nineml.serialization import DEFAULT_VERSION
+import numpy
+import nineml.units as un
+from nineml.abstraction import (
+    Dynamics, Parameter, StateVariable, Regime, RandomDistribution)
+from nineml.user import (
+    Population, DynamicsProperties, RandomDistributionProperties,
+    ComponentArray)
+from nineml.values import ArrayValue, RandomDistributionValue
+from nineml.exceptions import NineMLUsageError
 
 # 
 # class TestPopulation(unittest.TestCase):
@@ -18,3 +27,54 @@ from nineml.serialization import DEFAULT_VERSION
 #         self.assertEqual(document1, document2,
 #                           "Documents don't match after write/read from file:\n"
 #                           "{}".format(document2.find_mismatch(document1)))
+
+
+class TestPropertyTable(unittest.TestCase):
+
+    def setUp(self):
+        self.definition = Dynamics(
+            name='leaky',
+            parameters=[Parameter('tau', dimension=un.time),
+                        Parameter('v_rest', dimension=un.voltage)],
+            state_variables=[StateVariable('v', dimension=un.voltage)],
+            regimes=[Regime('dv/dt = (v_rest - v) / tau', name='default')])
+        rand_dist = RandomDistribution(
+            name='uniform', parameters=[
+                Parameter('minimum', dimension=un.dimensionless),
+                Parameter('maximum', dimension=un.dimensionless)],
+            standard_library=(RandomDistribution.standard_library_basepath +
+                              'uniform'))
+        self.rand_value = RandomDistributionValue(
+            RandomDistributionProperties(
+                'uniform_props', rand_dist,
+                {'minimum': -70.0 * un.unitless,
+                 'maximum': -60.0 * un.unitless}))
+        self.v_rest = numpy.linspace(-70.0, -60.0, 100)
+        self.cell = DynamicsProperties(
+            'leaky_props', self.definition,
+            properties={'tau': 20.0 * un.ms,
+                        'v_rest': ArrayValue(self.v_rest) * un.mV},
+            initial_values={'v': self.rand_value * un.mV})
+        self.population = Population('pop', 100, self.cell)
+
+    def test_property_table(self):
+        table = self.population.property_table(rng=1)
+        self.assertEqual(len(table), 100)
+        self.assertEqual(table.dtype.names, ('tau', 'v', 'v_rest'))
+        # Values are converted to SI units
+        self.assertTrue((table['tau'] == 0.02).all())
+        self.assertTrue(numpy.allclose(table['v_rest'], self.v_rest / 1000))
+        self.assertTrue(numpy.allclose(
+            table['v'], self.rand_value.sample(100, rng=1).values / 1000))
+        self.assertTrue(((table['v'] >= -0.07) & (table['v'] < -0.06)).all())
+        columns = self.population.property_table(rng=1, as_dict=True)
+        self.assertEqual(list(columns), ['tau', 'v', 'v_rest'])
+        self.assertTrue(numpy.array_equal(columns['v'], table['v']))
+        # Component arrays share the same implementation
+        array = ComponentArray('array', 100, self.cell)
+        self.assertTrue(numpy.array_equal(array.property_table(rng=1),
+                                          table))
+
+    def test_size_mismatch(self):
+        self.assertRaises(NineMLUsageError,
+                          Population('pop', 99, self.cell).property_table)
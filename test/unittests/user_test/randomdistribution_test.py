@@ -0,0 +1,89 @@
+import unittest
+import numpy
+import nineml.units as un
+from nineml.abstraction import Parameter, RandomDistribution
+from nineml.user import RandomDistributionProperties, Property
+from nineml.values import RandomDistributionValue, ArrayValue
+from nineml.exceptions import NineMLUsageError
+
+
+def random_distribution(standard_type, **properties):
+    definition = RandomDistribution(
+        name=standard_type.replace('-', '_'),
+        standard_library=(RandomDistribution.standard_library_basepath +
+                          standard_type),
+        parameters=[Parameter(n, dimension=un.dimensionless)
+                    for n in properties])
+    return RandomDistributionProperties(
+        name=standard_type.replace('-', '_') + '_props',
+        definition=definition,
+        properties=dict((n, v * un.unitless)
+                        for n, v in properties.items()))
+
+
+class TestRandomDistributionSample(unittest.TestCase):
+
+    size = 100000
+
+    def test_moments(self):
+        for standard_type, props, mean, var in [
+                ('normal', {'mean': 2.0, 'variance': 4.0}, 2.0, 4.0),
+                ('normal', {'mean': -1.0, 'stddev': 0.5}, -1.0, 0.25),
+                ('uniform', {'minimum': 1.0, 'maximum': 3.0}, 2.0, 1 / 3.),
+                ('exponential', {'rate': 2.0}, 0.5, 0.25),
+                ('gamma', {'shape': 2.0, 'scale': 3.0}, 6.0, 18.0),
+                ('poisson', {'rate': 4.0}, 4.0, 4.0),
+                ('binomial', {'numberOfTrials': 10,
+                              'probabilityOfSuccess': 0.3}, 3.0, 2.1),
+                ('log-normal', {'logScale': 0.0, 'shape': 0.5},
+                 numpy.exp(0.125), (numpy.exp(0.25) - 1) * numpy.exp(0.25)),
+                ('weibull', {'scale': 1.0, 'shape': 1.0}, 1.0, 1.0),
+                ('pareto', {'scale': 1.0, 'shape': 5.0}, 1.25,
+                 5.0 / (16 * 3))]:
+            samples = random_distribution(standard_type, **props).sample(
+                self.size, rng=1)
+            self.assertEqual(samples.dtype, numpy.float64)
+            self.assertEqual(len(samples), self.size)
+            self.assertAlmostEqual(samples.mean(), mean,
+                                   delta=0.05 * abs(mean), msg=standard_type)
+            self.assertAlmostEqual(samples.var(), var, delta=0.1 * var,
+                                   msg=standard_type)
+
+    def test_reproducible(self):
+        props = random_distribution('normal', mean=0.0, variance=1.0)
+        self.assertTrue(numpy.array_equal(props.sample(10, rng=5),
+                                          props.sample(10, rng=5)))
+        rng = numpy.random.default_rng(5)
+        self.assertTrue(numpy.array_equal(props.sample(10, rng=rng),
+                                          props.sample(10, rng=5)))
+
+    def test_units(self):
+        value = RandomDistributionValue(
+            random_distribution('uniform', minimum=1.0, maximum=2.0))
+        samples = value.sample(1000, rng=1)
+        self.assertIsInstance(samples, ArrayValue)
+        prop = Property('delay', value * un.ms)
+        sampled = prop.sample(1000, rng=1)
+        self.assertEqual(sampled.units, un.ms)
+        self.assertTrue(numpy.array_equal(sampled.value.values,
+                                          samples.values))
+        self.assertTrue(((samples.values >= 1.0) &
+                         (samples.values < 2.0)).all())
+        self.assertRaises(NineMLUsageError,
+                          Property('delay', 1.0 * un.ms).sample, 10)
+
+    def test_array_properties(self):
+        # Each sample is drawn with the corresponding property value
+        means = numpy.arange(10) * 100.0
+        props = random_distribution('normal', mean=ArrayValue(means),
+                                    variance=1.0)
+        samples = props.sample(10, rng=1)
+        self.assertTrue((numpy.abs(samples - means) < 10).all())
+
+    def test_unsupported(self):
+        self.assertRaises(
+            NineMLUsageError,
+            random_distribution('dirichlet', concentration=1.0).sample, 10)
+        self.assertRaises(
+            NineMLUsageError,
+            random_distribution('normal', mean=1.0).sample, 10)
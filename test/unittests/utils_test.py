@@ -3,6 +3,10 @@ import unittest
 import types
 import numbers
 import sys
+import os
+import shutil
+import tempfile
+import numpy
 
 from nineml.utils import (check_inferred_against_declared,
                           assert_no_duplicates, restore_sys_path)
@@ -12,6 +16,9 @@ from nineml.utils.iterables import (
     safe_dict,
     safe_dictionary_merge, filter_expect_single,
     filter_by_type, filter_discrete_types)
+from nineml.utils.external_arrays import load_external_array
+from nineml.utils.seeding import RandomSeeds
+from nineml.values import ArrayValue
 from nineml.exceptions import NineMLUsageError
 
 
@@ -489,3 +496,91 @@ class Testsafe_dictionary_merge(unittest.TestCase):
             safe_dictionary_merge,
             [{1: 'One'}, {2: 'Two', 3: 'Three', 1: 'One'}, {4: 'Four'}]
         )
+
+
+class Testload_external_array(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.array = numpy.arange(30, dtype=float).reshape((10, 3))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, fname):
+        return os.path.join(self.tmp_dir, fname)
+
+    def test_npy(self):
+        numpy.save(self.path('a.npy'), self.array[:, 1].copy())
+        array = load_external_array(self.path('a.npy'))
+        self.assertIsInstance(array, numpy.memmap)
+        self.assertFalse(array.flags.writeable)
+        self.assertEqual(array.tolist(), self.array[:, 1].tolist())
+        # Repeated references share the same mapping
+        self.assertIs(load_external_array(self.path('a.npy')), array)
+        numpy.save(self.path('b.npy'), self.array)
+        column = load_external_array(self.path('b.npy'), column_name='2')
+        self.assertEqual(column.tolist(), self.array[:, 2].tolist())
+        self.assertTrue(numpy.shares_memory(
+            column, load_external_array(self.path('b.npy'))))
+
+    def test_npz(self):
+        numpy.savez(self.path('a.npz'), x=self.array[:, 0].copy(),
+                    y=self.array[:, 1].copy())
+        x = load_external_array(self.path('a.npz'), column_name='x')
+        self.assertIsInstance(x, numpy.memmap)
+        self.assertEqual(x.tolist(), self.array[:, 0].tolist())
+        self.assertEqual(
+            load_external_array(self.path('a.npz'), column_name='y').tolist(),
+            self.array[:, 1].tolist())
+        self.assertRaises(NineMLUsageError, load_external_array,
+                          self.path('a.npz'))
+        numpy.savez_compressed(self.path('b.npz'), x=self.array[:, 0].copy())
+        self.assertEqual(load_external_array(self.path('b.npz')).tolist(),
+                         self.array[:, 0].tolist())
+
+    def test_text(self):
+        numpy.savetxt(self.path('a.txt'), self.array, header='a b c')
+        self.assertEqual(
+            load_external_array(self.path('a.txt'), column_name='b').tolist(),
+            self.array[:, 1].tolist())
+        self.assertEqual(
+            load_external_array(self.path('a.txt'), column_name='0').tolist(),
+            self.array[:, 0].tolist())
+        self.assertRaises(NineMLUsageError, load_external_array,
+                          self.path('a.txt'), column_name='d')
+
+    def test_lazy_array_value(self):
+        numpy.save(self.path('a.npy'), self.array[:, 0].copy())
+        value = ArrayValue(datafile=(self.path('a.npy'), None, None))
+        self.assertFalse(value.is_loaded())
+        self.assertEqual(value.url, self.path('a.npy'))
+        self.assertEqual(len(value), 10)
+        self.assertTrue(value.is_loaded())
+        # Float64 memory maps are used without copying
+        self.assertIsInstance(value.values, numpy.memmap)
+        self.assertEqual(value.values.tolist(), self.array[:, 0].tolist())
+
+
+class TestRandomSeeds(unittest.TestCase):
+
+    def test_derive(self):
+        seeds = RandomSeeds(42)
+        self.assertEqual(seeds.derive('proj'), RandomSeeds(42).derive('proj'))
+        self.assertNotEqual(seeds.derive('proj'), seeds.derive('proj2'))
+        self.assertNotEqual(seeds.derive('proj'), seeds.derive('proj', 0))
+        self.assertNotEqual(seeds.derive('proj', 0), seeds.derive('proj', 1))
+        self.assertNotEqual(seeds.derive('proj'),
+                            RandomSeeds(43).derive('proj'))
+        self.assertTrue(0 <= seeds.derive('proj') <= sys.maxsize)
+        self.assertRaises(NineMLUsageError, RandomSeeds, -1)
+
+    def test_generator(self):
+        seeds = RandomSeeds(42)
+        # Generators for blocks can be created in any order
+        blocks = [seeds.generator('pop', i).random(10) for i in range(3)]
+        self.assertTrue(numpy.array_equal(
+            RandomSeeds(42).generator('pop', 2).random(10), blocks[2]))
+        self.assertFalse(numpy.array_equal(blocks[0], blocks[1]))
+        self.assertIsInstance(seeds.generator('pop').bit_generator,
+                              numpy.random.Philox)